@@ -0,0 +1,72 @@
+"""Benchmark of base58check encoding, decoding and address validation.
+
+Compares bitmerchant.wallet.b58 with the `base58` package, which bitmerchant
+used to depend on, and with the vectorised encoder of
+bitmerchant.wallet.b58_numpy, if they are installed (see
+requirements-dev.txt).
+
+Run it from the root of the repository:
+
+    python benchmarks/bench_base58.py [number of addresses]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bitmerchant.wallet import b58  # NOQA
+from bitmerchant.wallet.address import validate_addresses  # NOQA
+from bitmerchant.wallet.b58_numpy import b58encode_check_rows  # NOQA
+from bitmerchant.wallet.b58_numpy import numpy  # NOQA
+
+try:
+    import base58
+except ImportError:
+    base58 = None
+
+
+def _payloads(number):
+    # Random payloads shaped like bitcoin main net addresses
+    return [b"\0" + os.urandom(20) for _ in range(number)]
+
+
+def _best(func, repeat=3):
+    """Get the best time of a few runs of func, in seconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(number=20000):
+    payloads = _payloads(number)
+    addresses = [b58.b58encode_check(payload) for payload in payloads]
+    codecs = [("bitmerchant", b58)]
+    if base58 is not None:
+        codecs.append(("base58 %s" % getattr(base58, "__version__", ""),
+                       base58))
+
+    print("{0:<24} {1:>12} {2:>14}".format(
+        "operation", "codec", "addresses/s"))
+    for name, codec in codecs:
+        encode = codec.b58encode_check
+        decode = codec.b58decode_check
+        for operation, func in [
+                ("b58encode_check",
+                 lambda: [encode(payload) for payload in payloads]),
+                ("b58decode_check",
+                 lambda: [decode(address) for address in addresses])]:
+            elapsed = _best(func)
+            print("{0:<24} {1:>12} {2:>14.0f}".format(
+                operation, name, number / elapsed))
+    if numpy is not None:
+        elapsed = _best(lambda: b58encode_check_rows(payloads))
+        print("{0:<24} {1:>12} {2:>14.0f}".format(
+            "b58encode_check_rows", "numpy", number / elapsed))
+    elapsed = _best(lambda: validate_addresses(addresses))
+    print("{0:<24} {1:>12} {2:>14.0f}".format(
+        "validate_addresses", "bitmerchant", number / elapsed))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
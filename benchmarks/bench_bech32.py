@@ -0,0 +1,45 @@
+"""Benchmark of bech32 segwit address encoding and decoding.
+
+Run it from the root of the repository:
+
+    python benchmarks/bench_bech32.py [number of addresses]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bitmerchant.wallet import bech32  # NOQA
+
+
+def _best(func, repeat=3):
+    """Get the best time of a few runs of func, in seconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(number=20000):
+    # Random P2WPKH witness programs
+    programs = [os.urandom(20) for _ in range(number)]
+    addresses = bech32.encode_segwit_addresses("bc", 0, programs)
+
+    print("{0:<28} {1:>14}".format("operation", "addresses/s"))
+    for operation, func in [
+            ("encode_segwit_address",
+             lambda: [bech32.encode_segwit_address("bc", 0, program)
+                      for program in programs]),
+            ("encode_segwit_addresses",
+             lambda: bech32.encode_segwit_addresses("bc", 0, programs)),
+            ("decode_segwit_address",
+             lambda: [bech32.decode_segwit_address("bc", address)
+                      for address in addresses]),
+            ("decode_segwit_addresses",
+             lambda: bech32.decode_segwit_addresses("bc", addresses))]:
+        elapsed = _best(func)
+        print("{0:<28} {1:>14.0f}".format(operation, number / elapsed))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
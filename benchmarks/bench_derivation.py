@@ -0,0 +1,83 @@
+"""Microbenchmark for a single BIP32 child derivation.
+
+Reports the time and the transient memory of one `Wallet.get_child` call
+for public and private (prime and non-prime) derivation.
+
+Run it from the root of the repository, before and after a change:
+
+    python benchmarks/bench_derivation.py
+
+Each derivation uses a fresh child number, so the get_child cache never
+hits.
+"""
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # python < 3.4
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bitmerchant.wallet import Wallet  # NOQA
+
+# A fixed seed so that runs are comparable
+SEED = b"bitmerchant benchmark seed"
+
+
+def _derivations():
+    private = Wallet.from_master_secret(SEED)
+    public = private.public_copy()
+    return [
+        ("public", public, False),
+        ("private", private, False),
+        ("private prime", private, True),
+    ]
+
+
+def time_derivation(wallet, is_prime, number):
+    """Get the mean time of one get_child call, in microseconds."""
+    child_numbers = iter(range(number * 4))
+
+    def derive():
+        wallet.get_child(next(child_numbers), is_prime=is_prime)
+
+    # Take the best of a few runs to smooth out noise
+    return min(timeit.repeat(derive, number=number, repeat=3)) / number * 1e6
+
+
+def measure_allocations(wallet, is_prime, number):
+    """Get the mean peak of transient memory of one get_child call."""
+    if tracemalloc is None:
+        return None
+    peaks = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for i in range(number):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            wallet.get_child(10 ** 6 + i, is_prime=is_prime)
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) // len(peaks)
+
+
+def main(number=200):
+    print("{0:<16} {1:>12} {2:>14}".format(
+        "derivation", "us/call", "peak bytes"))
+    for name, wallet, is_prime in _derivations():
+        elapsed = time_derivation(wallet, is_prime, number)
+        peak = measure_allocations(wallet, is_prime, number // 4)
+        print("{0:<16} {1:>12.1f} {2:>14}".format(
+            name, elapsed, "n/a" if peak is None else peak))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,240 @@
+"""Microbenchmark suite for the hot paths of bitmerchant.wallet.
+
+Times each benchmark, prints a table and optionally writes the results as
+JSON. Run it from the root of the repository:
+
+    python benchmarks/run.py --output baseline.json
+
+then, after a change, compare against that baseline:
+
+    python benchmarks/run.py --compare baseline.json --threshold 0.1
+
+The comparison flags every benchmark whose best time got slower by more
+than the threshold (a fraction, 0.1 is 10%), and exits with status 1 if
+there were any, so it can gate a CI job. Baselines are only comparable on
+the same machine and Python.
+
+The derivation and deserialization caches are turned off while timing, so
+every call does the real work.
+"""
+from __future__ import print_function
+
+import argparse
+from collections import OrderedDict
+import json
+import os
+import platform
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bitmerchant.wallet import Wallet  # NOQA
+from bitmerchant.wallet.keys import PrivateKey  # NOQA
+
+# A fixed seed so that runs are comparable
+SEED = b"bitmerchant benchmark seed"
+# Each timing runs for at least this long, in seconds
+MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1
+
+
+def _counter():
+    """Get a function returning 0, 1, 2, ... so no two calls are alike."""
+    numbers = iter(range(0x7fffffff))
+    return lambda: next(numbers)
+
+
+def bench_get_child_private():
+    w = Wallet.from_master_secret(SEED)
+    n = _counter()
+    return lambda: w.get_child(n(), is_prime=False)
+
+
+def bench_get_child_private_prime():
+    w = Wallet.from_master_secret(SEED)
+    n = _counter()
+    return lambda: w.get_child(n(), is_prime=True)
+
+
+def bench_get_child_public():
+    w = Wallet.from_master_secret(SEED).public_copy()
+    n = _counter()
+    return lambda: w.get_child(n(), is_prime=False)
+
+
+def bench_get_child_for_path():
+    w = Wallet.from_master_secret(SEED)
+    n = _counter()
+    return lambda: w.get_child_for_path("m/44'/0'/0'/0/%d" % n())
+
+
+def bench_to_address():
+    w = Wallet.from_master_secret(SEED).public_copy().get_child(0)
+
+    def to_address():
+        # A Wallet caches its hash160, so forget it
+        w._identifier = None
+        return w.to_address()
+    return to_address
+
+
+def bench_deserialize_public():
+    key = Wallet.from_master_secret(SEED).serialize_b58(private=False)
+    return lambda: Wallet.deserialize(key)
+
+
+def bench_deserialize_private():
+    key = Wallet.from_master_secret(SEED).serialize_b58(private=True)
+    return lambda: Wallet.deserialize(key)
+
+
+def bench_serialize_b58():
+    key = Wallet.from_master_secret(SEED).serialize_b58(private=False)
+    return lambda: Wallet.deserialize(key).serialize_b58(private=False)
+
+
+def bench_from_wif():
+    wif = Wallet.from_master_secret(SEED).export_to_wif()
+    return lambda: PrivateKey.from_wif(wif)
+
+
+def bench_from_master_secret_slow():
+    return lambda: Wallet.from_master_secret_slow(SEED)
+
+
+BENCHMARKS = OrderedDict([
+    ("get_child private", bench_get_child_private),
+    ("get_child private prime", bench_get_child_private_prime),
+    ("get_child public", bench_get_child_public),
+    ("get_child_for_path", bench_get_child_for_path),
+    ("to_address", bench_to_address),
+    ("deserialize public", bench_deserialize_public),
+    ("deserialize private", bench_deserialize_private),
+    ("deserialize + serialize_b58", bench_serialize_b58),
+    ("PrivateKey.from_wif", bench_from_wif),
+    ("from_master_secret_slow", bench_from_master_secret_slow),
+])
+
+
+def time_benchmark(setup, repeat=DEFAULT_REPEAT, min_time=MIN_TIME):
+    """Time a benchmark.
+
+    Calls are batched so that each of the `repeat` timings takes at least
+    min_time. Returns a dict with the best and median time of one call, in
+    seconds, and how many calls were timed.
+    """
+    func = setup()
+    # Warm up, so one-off work like building lookup tables isn't timed
+    func()
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    func = setup()
+    times = sorted(
+        t / number for t in timeit.repeat(func, number=number, repeat=repeat))
+    return {
+        "best": times[0],
+        "median": times[len(times) // 2],
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(names, repeat=DEFAULT_REPEAT, min_time=MIN_TIME):
+    """Run the named benchmarks with the caches off. Returns the results.
+    """
+    caches = (Wallet.derivation_cache, Wallet.path_cache,
+              Wallet.deserialize_cache)
+    Wallet.derivation_cache = Wallet.path_cache = None
+    Wallet.deserialize_cache = None
+    try:
+        results = OrderedDict()
+        for name in names:
+            results[name] = time_benchmark(
+                BENCHMARKS[name], repeat=repeat, min_time=min_time)
+            print("{0:<30} {1:>12.2f} us".format(
+                name, results[name]["best"] * 1e6))
+    finally:
+        (Wallet.derivation_cache, Wallet.path_cache,
+         Wallet.deserialize_cache) = caches
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare results with a baseline.
+
+    Returns a list of (name, baseline time, time, ratio, regressed) tuples
+    for every benchmark in both, where ratio is time / baseline time.
+    """
+    comparison = []
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["best"]
+        after = result["best"]
+        ratio = after / before
+        comparison.append((name, before, after, ratio, ratio > 1 + threshold))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the hot paths of bitmerchant.wallet.")
+    parser.add_argument(
+        "--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare", metavar="BASELINE",
+        help="Compare with the results in this JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Flag slowdowns of more than this fraction (default %(default)s)")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="How many timings to take of each benchmark")
+    parser.add_argument(
+        "--min-time", type=float, default=MIN_TIME,
+        help="The minimum length of each timing, in seconds")
+    parser.add_argument(
+        "benchmarks", nargs="*", metavar="NAME",
+        help="Only run the benchmarks whose names contain one of these")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS
+             if not args.benchmarks or
+             any(pattern in name for pattern in args.benchmarks)]
+    if not names:
+        parser.error("No benchmarks match %s" % " ".join(args.benchmarks))
+    results = run(names, repeat=args.repeat, min_time=args.min_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    print()
+    print("{0:<30} {1:>12} {2:>12} {3:>8}".format(
+        "benchmark", "baseline us", "us", "change"))
+    regressions = 0
+    for name, before, after, ratio, regressed in compare(
+            results, baseline, args.threshold):
+        regressions += regressed
+        print("{0:<30} {1:>12.2f} {2:>12.2f} {3:>+7.1%}{4}".format(
+            name, before * 1e6, after * 1e6, ratio - 1,
+            "  REGRESSION" if regressed else ""))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
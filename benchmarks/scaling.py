@@ -0,0 +1,289 @@
+"""Scaling benchmark: address throughput and memory for large ranges.
+
+Derives ranges of up to millions of addresses from a fixed xpub, for a grid
+of methods, range sizes, worker counts and cache sizes, and writes a CSV
+of the measurements and a text summary, to help size production machines.
+It needs nothing but the standard library and runs offline, on Linux or
+another Unix (it uses the resource module for peak RSS).
+
+    python benchmarks/scaling.py --sizes 100000,1000000 --workers 1,2,4
+
+The methods are
+
+* stream: `Wallet.iter_addresses`, in this process, with constant memory
+* pool: `Wallet.generate_addresses`, with a pool of worker processes
+* per_node: `get_child(i).to_address()` for each child, twice, like
+  repeated lookups in a web app, so that the derivation cache size matters
+
+Every measurement runs in a fresh process, so peak RSS isn't carried over
+from one to the next. The measurements are
+
+* addresses_per_sec
+* peak_rss_kb: the peak RSS of the measuring process, and
+  workers_peak_rss_kb, the largest peak RSS of its worker processes
+* allocated_blocks: the growth of CPython's count of allocated memory
+  blocks during the run, so what the run kept alive
+* gc_collections: how many garbage collections ran, which is proportional
+  to how many container objects were allocated
+* traced_peak_kb: with --tracemalloc, the peak of memory allocated by
+  Python, which is exact but makes the run several times slower
+"""
+from __future__ import print_function
+
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # python < 3.4
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bitmerchant.wallet import Wallet  # NOQA
+from bitmerchant.wallet.cache import DerivationCache  # NOQA
+from bitmerchant.wallet.cache import PathCache  # NOQA
+
+# A fixed seed, so every run derives the same addresses
+SEED = b"bitmerchant benchmark seed"
+# The derived account's receive chain, m/44'/0'/0'/0
+PATH = "m/44'/0'/0'/0"
+METHODS = ("stream", "pool", "per_node")
+FIELDS = [
+    "method", "size", "workers", "cache_size", "chunk_size", "seconds",
+    "addresses_per_sec", "peak_rss_kb", "workers_peak_rss_kb",
+    "allocated_blocks", "gc_collections", "traced_peak_kb",
+]
+
+
+def fixed_xpub():
+    """Get the xpub every measurement derives from."""
+    return Wallet.from_master_secret(SEED).get_child_for_path(
+        PATH).serialize_b58(private=False)
+
+
+def _derive(wallet, method, size, workers, chunk_size):
+    """Derive size addresses with method, returning how many there were."""
+    if method == "stream":
+        count = 0
+        for _ in wallet.iter_addresses(0, size, chunk=chunk_size):
+            count += 1
+        return count
+    elif method == "pool":
+        return len(wallet.generate_addresses(
+            0, size, workers=workers, chunk_size=chunk_size))
+    count = 0
+    for _ in range(2):
+        for i in range(size):
+            wallet.get_child(i).to_address()
+            count += 1
+    return count
+
+
+def measure(method, size, workers, cache_size, chunk_size, trace=False):
+    """Take one measurement, in this process. Returns a dict of FIELDS."""
+    Wallet.derivation_cache = DerivationCache(maxsize=cache_size)
+    Wallet.path_cache = PathCache(maxsize=cache_size)
+    wallet = Wallet.deserialize(fixed_xpub())
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    blocks = _allocated_blocks()
+    collections = _gc_collections()
+    start = timeit.default_timer()
+    count = _derive(wallet, method, size, workers, chunk_size)
+    seconds = timeit.default_timer() - start
+    traced_peak = None
+    if trace:
+        traced_peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return {
+        "method": method,
+        "size": size,
+        "workers": workers,
+        "cache_size": cache_size,
+        "chunk_size": chunk_size,
+        "seconds": round(seconds, 3),
+        "addresses_per_sec": int(count / seconds),
+        # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+        "peak_rss_kb": _max_rss(resource.RUSAGE_SELF),
+        "workers_peak_rss_kb": _max_rss(resource.RUSAGE_CHILDREN),
+        "allocated_blocks": _allocated_blocks() - blocks,
+        "gc_collections": _gc_collections() - collections,
+        "traced_peak_kb": traced_peak,
+    }
+
+
+def _max_rss(who):
+    rss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+    return rss
+
+
+def _allocated_blocks():
+    return getattr(sys, "getallocatedblocks", lambda: 0)()
+
+
+def _gc_collections():
+    if not hasattr(gc, "get_stats"):  # python < 3.4
+        return 0
+    return sum(stats["collections"] for stats in gc.get_stats())
+
+
+def measure_in_subprocess(config):
+    """Take one measurement in a fresh python process."""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), "--measure",
+         json.dumps(config)])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def configurations(methods, sizes, workers, cache_sizes, chunk_size, trace):
+    """Generate the grid of measurements to take.
+
+    Worker counts only apply to the pool method and cache sizes only to
+    per_node, so the other methods are measured once per size.
+    """
+    for method in methods:
+        for size in sizes:
+            for worker_count in (workers if method == "pool" else [1]):
+                for cache_size in (cache_sizes if method == "per_node"
+                                   else [0]):
+                    yield {
+                        "method": method,
+                        "size": size,
+                        "workers": worker_count,
+                        "cache_size": cache_size,
+                        "chunk_size": chunk_size,
+                        "trace": trace,
+                    }
+
+
+def environment():
+    """Describe the machine, for the summary."""
+    return [
+        ("python", "%s %s" % (platform.python_implementation(),
+                              platform.python_version())),
+        ("platform", platform.platform()),
+        ("cpus", multiprocessing.cpu_count()),
+        ("xpub", fixed_xpub()),
+    ]
+
+
+def summarize(rows):
+    """Get a text summary of the measurements."""
+    lines = ["bitmerchant scaling benchmark", ""]
+    for name, value in environment():
+        lines.append("{0:<10} {1}".format(name, value))
+    lines.append("")
+    lines.append("{0:<9} {1:>10} {2:>8} {3:>10} {4:>14} {5:>12}".format(
+        "method", "size", "workers", "cache", "addresses/s", "peak RSS MB"))
+    for row in rows:
+        rss = max(row["peak_rss_kb"], row["workers_peak_rss_kb"])
+        lines.append(
+            "{0:<9} {1:>10} {2:>8} {3:>10} {4:>14} {5:>12.1f}".format(
+                row["method"], row["size"], row["workers"],
+                row["cache_size"], row["addresses_per_sec"], rss / 1024.0))
+    lines.append("")
+    for size in sorted(set(row["size"] for row in rows)):
+        best = max((row for row in rows if row["size"] == size),
+                   key=lambda row: row["addresses_per_sec"])
+        lines.append(
+            "Fastest for {0} addresses: {1} with {2} workers, {3} "
+            "addresses/s".format(size, best["method"], best["workers"],
+                                 best["addresses_per_sec"]))
+    return "\n".join(lines) + "\n"
+
+
+def _ints(value):
+    try:
+        return [int(item) for item in value.split(",") if item]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "%s is not a comma separated list of ints" % value)
+
+
+def _methods(value):
+    methods = [item for item in value.split(",") if item]
+    for method in methods:
+        if method not in METHODS:
+            raise argparse.ArgumentTypeError("Unknown method %s" % method)
+    return methods
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure address throughput and memory at scale.")
+    parser.add_argument(
+        "--methods", type=_methods, default=["stream", "pool"],
+        help="Comma separated methods, of %s (default stream,pool)" %
+        ",".join(METHODS))
+    parser.add_argument(
+        "--sizes", type=_ints, default=[10000, 100000],
+        help="Comma separated range sizes (default 10000,100000)")
+    parser.add_argument(
+        "--workers", type=_ints,
+        default=sorted(set([1, multiprocessing.cpu_count()])),
+        help="Comma separated worker counts for the pool method "
+             "(default 1 and the number of CPUs)")
+    parser.add_argument(
+        "--cache-sizes", type=_ints, default=[0, 1024],
+        help="Comma separated derivation cache sizes for the per_node "
+             "method (default 0,1024)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="Addresses per batch (default %(default)s)")
+    parser.add_argument(
+        "--tracemalloc", action="store_true",
+        help="Also measure the peak of Python's allocations (slow)")
+    parser.add_argument(
+        "--output-dir", default="scaling-report",
+        help="Where to write report.csv and summary.txt "
+             "(default %(default)s)")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        config = json.loads(args.measure)
+        trace = config.pop("trace")
+        print(json.dumps(measure(trace=trace, **config)))
+        return 0
+    if args.tracemalloc and tracemalloc is None:
+        parser.error("--tracemalloc needs python 3.4 or later")
+
+    rows = []
+    for config in configurations(args.methods, args.sizes, args.workers,
+                                 args.cache_sizes, args.chunk_size,
+                                 args.tracemalloc):
+        row = measure_in_subprocess(config)
+        print("{method} size={size} workers={workers} "
+              "cache={cache_size}: {addresses_per_sec} addresses/s, "
+              "peak RSS {peak_rss_kb} KB".format(**row))
+        rows.append(row)
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    with open(os.path.join(args.output_dir, "report.csv"), "w") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    summary = summarize(rows)
+    with open(os.path.join(args.output_dir, "summary.txt"), "w") as f:
+        f.write(summary)
+    print()
+    print(summary, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Command line tools.
+
+    bitmerchant derive <xpub> --range 0:1000000 --format csv --workers 4
+
+derives the addresses of a range of non-prime children of an extended key
+and streams them to stdout or a file. Run `bitmerchant derive --help` for
+all of the options.
+"""
+from __future__ import print_function
+
+import argparse
+from binascii import unhexlify
+import json
+import sys
+import time
+
+from . import network as networks
+from .wallet import Wallet
+from .wallet.keys import IncompatibleNetworkException
+from .wallet.utils import hash160_many
+from .wallet.utils import long_to_bytes
+
+
+FORMATS = ("csv", "jsonl", "bin")
+
+# The size of each record of the bin format: a 4 byte big-endian child
+# number followed by the 20 byte hash160 of the child's public key.
+BIN_RECORD_SIZE = 24
+
+
+def _network_classes():
+    """Get every network class in bitmerchant.network, by lowercase name."""
+    return dict(
+        (name.lower(), value) for name, value in vars(networks).items()
+        if isinstance(value, type) and hasattr(value, "EXT_PUBLIC_KEY"))
+
+
+def parse_network(value):
+    """Look up a network class of bitmerchant.network, ignoring case."""
+    classes = _network_classes()
+    try:
+        return classes[value.lower()]
+    except KeyError:
+        raise argparse.ArgumentTypeError(
+            "%s is not a known network. Choose one of %s" % (
+                value,
+                ", ".join(sorted(cls.__name__ for cls in classes.values()))))
+
+
+def parse_range(value):
+    """Parse a START:STOP range of child numbers, like python's range."""
+    try:
+        start, stop = value.split(":")
+        start, stop = int(start or 0), int(stop)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "%s is not a valid range. Use START:STOP" % value)
+    if not 0 <= start <= stop <= 0x80000000:
+        raise argparse.ArgumentTypeError(
+            "%s is not a valid range of non-prime children" % value)
+    return start, stop
+
+
+def parse_key(key, network):
+    """Deserialize an extended key of a network."""
+    try:
+        return Wallet.deserialize(key, network=network)
+    except IncompatibleNetworkException as e:
+        raise argparse.ArgumentTypeError(str(e))
+    except (ValueError, IndexError):
+        raise argparse.ArgumentTypeError(
+            "%s is not a valid extended key" % key)
+
+
+def format_chunk(records, output_format):
+    """Format the records of `Wallet.iter_address_chunks`.
+
+    The records must include public keys for the bin format. Returns a str
+    for the text formats and bytes for bin.
+    """
+    if output_format == "bin":
+        key_hashes = hash160_many(
+            [unhexlify(public_key) for _, public_key, _ in records])
+        return b"".join(
+            long_to_bytes(record[0], 4) + key_hash
+            for record, key_hash in zip(records, key_hashes))
+    if output_format == "csv":
+        lines = ["%s,%s\n" % record for record in records]
+    else:
+        lines = [json.dumps({"index": child_number, "address": address},
+                            sort_keys=True) + "\n"
+                 for child_number, address in records]
+    return "".join(lines)
+
+
+def iter_chunks(wallet, start, stop, output_format, workers=1,
+                chunk_size=1000):
+    """Generate the formatted records of children start to stop, in order.
+    """
+    chunks = wallet.iter_address_chunks(
+        start, stop - start, workers=workers, chunk_size=chunk_size,
+        public_keys=output_format == "bin")
+    try:
+        for records in chunks:
+            yield format_chunk(records, output_format)
+    finally:
+        chunks.close()
+
+
+def derive(args, stdout=None, stderr=None):
+    """Run the derive command with parsed arguments."""
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    wallet = parse_key(args.key, args.network)
+    start, stop = args.range
+
+    if args.output == "-":
+        out = stdout
+        if args.format == "bin":
+            out = getattr(stdout, "buffer", stdout)
+        close = False
+    else:
+        out = open(args.output, "wb" if args.format == "bin" else "w")
+        close = True
+
+    started = time.time()
+    try:
+        for chunk in iter_chunks(wallet, start, stop, args.format,
+                                 workers=args.workers,
+                                 chunk_size=args.chunk_size):
+            out.write(chunk)
+        out.flush()
+    finally:
+        if close:
+            out.close()
+    elapsed = time.time() - started
+    if not args.quiet:
+        count = stop - start
+        print("Derived %s addresses in %.2fs (%.0f addresses/s)" % (
+            count, elapsed, count / elapsed if elapsed else 0),
+            file=stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="bitmerchant", description="Bitcoin/altcoin merchant tools")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    derive_parser = subparsers.add_parser(
+        "derive",
+        help="Derive the addresses of a range of children of an extended key",
+        description=(
+            "Derive the addresses of a range of non-prime children of an "
+            "extended key. Only the public part of the key is used."))
+    derive_parser.add_argument(
+        "key", help="The extended key, base58 or hex encoded")
+    derive_parser.add_argument(
+        "--range", type=parse_range, default=(0, 20), metavar="START:STOP",
+        help="The child numbers to derive, stop excluded (default 0:20)")
+    derive_parser.add_argument(
+        "--format", choices=FORMATS, default="csv",
+        help=("csv and jsonl give the child number and address of each "
+              "child. bin gives fixed 24 byte records: the 4 byte "
+              "big-endian child number and the 20 byte hash160 of the "
+              "public key. (default csv)"))
+    derive_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="The number of worker processes (default 1)")
+    derive_parser.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="The number of children in each unit of work (default 1000)")
+    derive_parser.add_argument(
+        "--network", type=parse_network, default=networks.BitcoinMainNet,
+        help=("The name of the key's network, one of the classes in "
+              "bitmerchant.network (default BitcoinMainNet)"))
+    derive_parser.add_argument(
+        "--output", "-o", default="-",
+        help="The file to write to (default stdout)")
+    derive_parser.add_argument(
+        "--quiet", "-q", action="store_true",
+        help="Don't report the throughput on stderr")
+    derive_parser.set_defaults(func=derive)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "chunk_size", 1) < 1:
+        parser.error("--chunk-size must be positive")
+    try:
+        args.func(args)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Hooks around the public operations of bitmerchant.wallet, for tracing.
+
+    >>> from bitmerchant import hooks
+    >>> from bitmerchant.wallet import Wallet
+    >>> ended = []
+    >>> def on_end(operation, started):
+    ...     ended.append(operation.name)
+    >>> hook = hooks.register(on_end=on_end)
+    >>> wallet = Wallet.from_master_secret(b"my secret seed")
+    >>> child = wallet.get_child(0)
+    >>> ended
+    ['get_child']
+    >>> hooks.unregister(hook)
+    True
+
+on_start is called with an Operation when an operation starts, and on_end
+with the same Operation and whatever on_start returned when it ends, even
+if it raised. With a tracer, on_start would start a span named after the
+operation and return it, and on_end would tag the span with fields of the
+operation, like cache_hit, and finish it. The traced operations are
+
+* "get_child" and "get_child_for_path"
+* "deserialize" and "serialize_b58"
+* the bulk derivations "get_children" (which `derive_children` uses),
+  "get_children_addresses" and "generate_addresses", and "iter_addresses",
+  which is reported once per chunk, since it's a generator.
+
+An operation inside another, like the get_child calls of
+get_child_for_path, is reported too. bitmerchant has no signing APIs yet,
+so there are no signing operations.
+
+To only hear about slow operations, register a hook with `slower_than`, in
+seconds. Its on_start isn't called, and on_end only gets operations that
+took at least that long, with None instead of what on_start returned.
+`Operation.start_time` says when the operation started, for a span that's
+created after the fact.
+
+With no hooks registered, the cost of all this is one check per operation.
+Hooks are called in the thread of the operation, and exceptions they raise
+aren't caught.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import threading
+import time
+from timeit import default_timer
+
+
+# The registered hooks. The tuple is replaced, never changed, so it can be
+# read without the lock.
+_hooks = ()
+_lock = threading.Lock()
+
+
+class Hook(namedtuple("Hook", ["on_start", "on_end", "slower_than"])):
+    """A registered hook, as returned by `register`."""
+    __slots__ = ()
+
+
+class Operation(object):
+    """An operation, as seen by the hooks.
+
+    :ivar name: The operation, like "get_child"
+    :ivar path: The path of "get_child_for_path", or None
+    :ivar index: The child number of "get_child", including the prime bit,
+        or the first child number of a bulk derivation, or None
+    :ivar count: The number of children of a bulk derivation, or None
+    :ivar cache_hit: For "get_child", whether the derivation cache had the
+        child, for "get_child_for_path", whether the path cache had its
+        parent and for "deserialize", whether the deserialize cache had the
+        Wallet. None if no cache was used.
+    :ivar start_time: When it started, as a time.time()
+    :ivar duration: How long it took, in seconds. None until it ends.
+    :ivar error: The exception it raised, or None
+    """
+    __slots__ = ("name", "path", "index", "count", "cache_hit",
+                 "start_time", "duration", "error")
+
+    def __init__(self, name, path=None, index=None, count=None):
+        self.name = name
+        self.path = path
+        self.index = index
+        self.count = count
+        self.cache_hit = None
+        self.start_time = None
+        self.duration = None
+        self.error = None
+
+    def __repr__(self):
+        return "Operation(%s)" % ", ".join(
+            "%s=%r" % (field, getattr(self, field))
+            for field in self.__slots__)
+
+
+def register(on_start=None, on_end=None, slower_than=None):
+    """Register a hook.
+
+    :param on_start: Called as on_start(operation) when an operation starts.
+    :type on_start: callable
+    :param on_end: Called as on_end(operation, started) when it ends, where
+        started is what on_start returned.
+    :type on_end: callable
+    :param slower_than: If given, on_start is never called, and on_end is
+        only called for operations that took at least this many seconds.
+    :type slower_than: float
+
+    Returns the Hook, for `unregister`.
+    """
+    global _hooks
+    if on_start is None and on_end is None:
+        raise ValueError("A hook needs on_start or on_end")
+    hook = Hook(on_start, on_end, slower_than)
+    with _lock:
+        _hooks = _hooks + (hook,)
+    return hook
+
+
+def unregister(hook):
+    """Unregister a hook returned by `register`.
+
+    Returns True if it was registered.
+    """
+    global _hooks
+    with _lock:
+        if hook not in _hooks:
+            return False
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+    return True
+
+
+def clear():
+    """Unregister every hook."""
+    global _hooks
+    with _lock:
+        _hooks = ()
+
+
+@contextmanager
+def traced(name, path=None, index=None, count=None):
+    """Report the body of a with statement to the hooks as an operation.
+
+    The Operation is the target of the with statement, so the body can
+    fill in fields like cache_hit.
+    """
+    hooks = _hooks
+    operation = Operation(name, path=path, index=index, count=count)
+    operation.start_time = time.time()
+    started = [
+        hook.on_start(operation)
+        if hook.on_start is not None and hook.slower_than is None else None
+        for hook in hooks]
+    start = default_timer()
+    try:
+        yield operation
+    except BaseException as e:
+        operation.error = e
+        raise
+    finally:
+        operation.duration = default_timer() - start
+        for hook, value in zip(hooks, started):
+            if hook.on_end is None or (
+                    hook.slower_than is not None and
+                    operation.duration < hook.slower_than):
+                continue
+            hook.on_end(operation, value)
@@ -7,6 +7,7 @@ class BitcoinMainNet(object):
     SCRIPT_ADDRESS = 0x05  # int(0x05) = 5
     PUBKEY_ADDRESS = 0x00  # int(0x00) = 0  # Used to create payment addresses
     SECRET_KEY = 0x80      # int(0x80) = 128  # Used for WIF format
+    BECH32_HRP = "bc"  # Used for native segwit (bech32) addresses
     EXT_PUBLIC_KEY = 0x0488B21E  # Used to serialize public BIP32 addresses
     EXT_SECRET_KEY = 0x0488ADE4  # Used to serialize private BIP32 addresses
 
@@ -20,6 +21,7 @@ class BitcoinTestNet(object):
     SCRIPT_ADDRESS = 0xc4  # int(0xc4) = 196
     PUBKEY_ADDRESS = 0x6f  # int(0x6f) = 111
     SECRET_KEY = 0xEF      # int(0xef) = 239
+    BECH32_HRP = "tb"
     EXT_PUBLIC_KEY = 0x043587CF
     EXT_SECRET_KEY = 0x04358394
 
@@ -37,6 +39,7 @@ class LitecoinMainNet(object):
     SCRIPT_ADDRESS = 0x05  # int(0x05) = 5
     PUBKEY_ADDRESS = 0x30  # int(0x30) = 48
     SECRET_KEY = PUBKEY_ADDRESS + 128  # = int(0xb0) = 176
+    BECH32_HRP = "ltc"
 
     # Unofficial extended version bytes taken from
     # https://bitcointalk.org/index.php?topic=453395.0
@@ -57,6 +60,7 @@ class LitecoinTestNet(object):
     SCRIPT_ADDRESS = 0xc4  # int(0xc4) = 196
     PUBKEY_ADDRESS = 0x6f  # int(0x6f) = 111
     SECRET_KEY = PUBKEY_ADDRESS + 128  # = int(0xef) = 239
+    BECH32_HRP = "tltc"
 
     # Unofficial extended version bytes taken from
     # https://bitcointalk.org/index.php?topic=453395.0
@@ -77,6 +81,7 @@ class DogecoinMainNet(object):
     SCRIPT_ADDRESS = 0x16  # int(0x16) = 22
     PUBKEY_ADDRESS = 0x1e  # int(0x1e) = 30
     SECRET_KEY = PUBKEY_ADDRESS + 128  # int(0x9e) = 158
+    BECH32_HRP = None  # Dogecoin has no segwit
 
     # Unofficial extended version bytes taken from
     # https://bitcointalk.org/index.php?topic=409731
@@ -97,6 +102,7 @@ class DogecoinTestNet(object):
     SCRIPT_ADDRESS = 0xc4  # int(0xc4) = 196
     PUBKEY_ADDRESS = 0x71  # int(0x71) = 113
     SECRET_KEY = PUBKEY_ADDRESS + 128  # int(0xf1) = 241
+    BECH32_HRP = None
 
     # Unofficial extended version bytes taken from
     # https://bitcointalk.org/index.php?topic=409731
@@ -113,5 +119,6 @@ class BlockCypherTestNet(object):
     SCRIPT_ADDRESS = 0x1f  # int(0x1f) = 31
     PUBKEY_ADDRESS = 0x1b  # int(0x1b) = 27  # Used to create payment addresses
     SECRET_KEY = 0x49      # int(0x49) = 73  # Used for WIF format
+    BECH32_HRP = None
     EXT_PUBLIC_KEY = 0x2d413ff  # Used to serialize public BIP32 addresses
     EXT_SECRET_KEY = 0x2d40fc3  # Used to serialize private BIP32 addresses
@@ -0,0 +1,163 @@
+"""Encoding and validation of payment addresses.
+
+    >>> info = validate_address("1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2")
+    >>> info.network.NAME, info.address_type
+    ('Bitcoin Main Net', 'PUBKEY_ADDRESS')
+
+An address is valid if it is base58check encoded, with a correct checksum,
+and is a version byte followed by a 20 byte hash160. The version byte is
+matched against the PUBKEY_ADDRESS and SCRIPT_ADDRESS of the networks in
+bitmerchant.network.
+
+`addresses_for_key_hashes` goes the other way: it encodes the hash160s of
+compressed public keys in any of the ADDRESS_FORMATS, for any networks.
+"""
+from collections import namedtuple
+
+from ..network import BitcoinMainNet
+from ..network import BitcoinTestNet
+from ..network import BlockCypherTestNet
+from ..network import DogecoinMainNet
+from ..network import DogecoinTestNet
+from ..network import LitecoinMainNet
+from ..network import LitecoinTestNet
+from .b58 import b58decode_check
+from .bech32 import encode_segwit_addresses
+from .utils import chr_py2
+from .utils import ensure_str
+from .utils import hash160_many
+
+
+PUBKEY_ADDRESS = "PUBKEY_ADDRESS"
+SCRIPT_ADDRESS = "SCRIPT_ADDRESS"
+
+# Address formats of a single public key
+P2PKH = "p2pkh"  # Legacy pay to public key hash
+P2SH_P2WPKH = "p2sh-p2wpkh"  # Segwit nested in pay to script hash (BIP49)
+P2WPKH = "p2wpkh"  # Native segwit, bech32 encoded (BIP84)
+ADDRESS_FORMATS = (P2PKH, P2SH_P2WPKH, P2WPKH)
+
+# Some networks share version bytes, so the order matters: an address
+# matches the first network in the list that it is valid for.
+DEFAULT_NETWORKS = (
+    BitcoinMainNet,
+    BitcoinTestNet,
+    LitecoinMainNet,
+    LitecoinTestNet,
+    DogecoinMainNet,
+    DogecoinTestNet,
+    BlockCypherTestNet,
+)
+
+
+class AddressInfo(namedtuple(
+        "AddressInfo", ["address", "hash160", "network", "address_type"])):
+    """A valid address.
+
+    hash160 is the raw 20 byte hash of the public key or script, network is
+    the first matching network and address_type is PUBKEY_ADDRESS or
+    SCRIPT_ADDRESS.
+    """
+    __slots__ = ()
+
+
+def _version_table(networks):
+    """Map each version byte to the first (network, address type) using it."""
+    table = {}
+    for network in networks:
+        for address_type in (PUBKEY_ADDRESS, SCRIPT_ADDRESS):
+            table.setdefault(
+                getattr(network, address_type), (network, address_type))
+    return table
+
+
+def _validate(address, table):
+    try:
+        data = bytearray(b58decode_check(address))
+    except (ValueError, TypeError):
+        return None
+    if len(data) != 21 or data[0] not in table:
+        return None
+    network, address_type = table[data[0]]
+    return AddressInfo(ensure_str(address), bytes(data[1:]), network,
+                       address_type)
+
+
+def validate_address(address, networks=DEFAULT_NETWORKS):
+    """Validate a single address.
+
+    :param address: The base58check encoded address
+    :type address: str
+    :param networks: The networks the address may belong to, in order of
+        preference.
+    :type networks: A sequence of the classes in bitmerchant.network
+
+    Returns an AddressInfo, or None if the address isn't valid.
+    """
+    return _validate(address, _version_table(networks))
+
+
+def validate_addresses(addresses, networks=DEFAULT_NETWORKS):
+    """Validate many addresses.
+
+    This is the same as calling `validate_address` on every address, but
+    the table of version bytes is only built once.
+
+    Returns a list with an AddressInfo, or None for invalid addresses, for
+    every address, in order.
+    """
+    table = _version_table(networks)
+    return [_validate(address, table) for address in addresses]
+
+
+def addresses_for_key_hashes(key_hashes, formats=(P2PKH,),
+                             networks=(BitcoinMainNet,)):
+    """Encode hash160s of compressed public keys as addresses.
+
+    :param key_hashes: The hash160 of each compressed public key
+    :type key_hashes: A list of 20 byte strings
+    :param formats: Which of the ADDRESS_FORMATS to encode
+    :param networks: The networks to encode for
+    :type networks: A sequence of the classes in bitmerchant.network
+
+    Each key is hashed once, by the caller, and P2SH_P2WPKH needs one more
+    hash of each key's redeem script, no matter how many networks there
+    are. Everything else is only encoding.
+
+    Returns a list with a dict per key hash, mapping (network, format)
+    tuples to addresses. The address is None if the network doesn't support
+    the format: both segwit formats are None for a network without a
+    BECH32_HRP, since it has no segwit.
+    """
+    # Imported here so that importing bitmerchant.wallet doesn't import numpy
+    from .b58_numpy import encode_addresses
+    for address_format in formats:
+        if address_format not in ADDRESS_FORMATS:
+            raise ValueError("Invalid address format %s" % address_format)
+    script_hashes = None
+    if P2SH_P2WPKH in formats:
+        # The redeem script is OP_0 <20 byte key hash>
+        script_hashes = hash160_many(
+            [b"\x00\x14" + key_hash for key_hash in key_hashes])
+
+    columns = []
+    for network in networks:
+        # Networks without segwit have no bech32 prefix
+        segwit = getattr(network, "BECH32_HRP", None) is not None
+        for address_format in formats:
+            if address_format != P2PKH and not segwit:
+                column = [None] * len(key_hashes)
+            elif address_format == P2PKH:
+                version = chr_py2(network.PUBKEY_ADDRESS)
+                column = encode_addresses(
+                    [version + key_hash for key_hash in key_hashes])
+            elif address_format == P2SH_P2WPKH:
+                version = chr_py2(network.SCRIPT_ADDRESS)
+                column = encode_addresses(
+                    [version + script_hash for script_hash in script_hashes])
+            else:
+                column = encode_segwit_addresses(
+                    network.BECH32_HRP, 0, key_hashes)
+            columns.append(((network, address_format), column))
+    return [dict((key, column[i]) for key, column in columns)
+            for i in range(len(key_hashes))]
@@ -0,0 +1,106 @@
+"""Base58 and Base58Check encoding.
+
+This is a drop-in replacement for the functions of the `base58` package that
+bitmerchant uses, tuned for the short strings of keys and addresses:
+
+* Decoding looks each character up in a 256 entry table instead of calling
+  `alphabet.index`.
+* Bytes are converted to and from one big int in a single step, rather than
+  a byte at a time.
+* Encoding peels two digits off of the big int at a time, and decoding
+  builds it from groups of 10 digits, so there are few big int operations.
+
+Encoding returns a str and decoding returns bytes. Invalid characters and
+bad checksums raise a ValueError.
+"""
+from hashlib import sha256
+
+import six
+
+from .utils import bytes_to_long
+from .utils import ensure_bytes
+from .utils import long_to_bytes
+
+
+ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# _DECODE_TABLE[c] is the value of the base58 digit whose ASCII code is c, or
+# -1 if c isn't a base58 digit.
+_DECODE_TABLE = [-1] * 256
+for _i, _c in enumerate(ALPHABET):
+    _DECODE_TABLE[ord(_c)] = _i
+del _i, _c
+
+# Digits are decoded in groups of this many, mostly with small int math
+_GROUP_DIGITS = 10
+# _PAIRS[i] is the two digit base58 encoding of i, for i < 58 ** 2, so that
+# encoding takes half as many big int divisions.
+_PAIRS = [a + b for a in ALPHABET for b in ALPHABET]
+
+
+def b58encode(data):
+    """Encode bytes as a base58 str."""
+    data = ensure_bytes(data)
+    stripped = data.lstrip(b"\0")
+    n = bytes_to_long(stripped) if stripped else 0
+    pairs = []
+    while n:
+        n, pair = divmod(n, 3364)  # 58 ** 2
+        pairs.append(_PAIRS[pair])
+    # The most significant pair may have a leading zero digit
+    encoded = "".join(reversed(pairs)).lstrip(ALPHABET[0])
+    return ALPHABET[0] * (len(data) - len(stripped)) + encoded
+
+
+def b58decode(data):
+    """Decode a base58 str (or bytes) to bytes."""
+    digits = bytearray(ensure_bytes(data))
+    table = _DECODE_TABLE
+    leading_ones = 0
+    for leading_ones, c in enumerate(digits):
+        if c != 49:  # ord("1")
+            break
+    else:
+        return b"\0" * len(digits)
+
+    n = 0
+    length = len(digits)
+    # The first group takes the odd digits, so the rest are all full
+    end = leading_ones + (length - leading_ones) % _GROUP_DIGITS
+    start = leading_ones
+    while start < length:
+        if end == start:
+            end += _GROUP_DIGITS
+        group = 0
+        for c in digits[start:end]:
+            value = table[c]
+            if value < 0:
+                raise ValueError(
+                    "Invalid base58 character %r" % six.int2byte(c))
+            group = group * 58 + value
+        n = n * 58 ** (end - start) + group
+        start = end
+    size = (n.bit_length() + 7) // 8
+    return b"\0" * leading_ones + long_to_bytes(n, size)
+
+
+def _checksum(data):
+    return sha256(sha256(data).digest()).digest()[:4]
+
+
+def b58encode_check(data):
+    """Encode bytes as base58, with a 4 byte double sha256 checksum."""
+    data = ensure_bytes(data)
+    return b58encode(data + _checksum(data))
+
+
+def b58decode_check(data):
+    """Decode and verify a base58check encoded str (or bytes).
+
+    Raises a ValueError if the checksum is wrong.
+    """
+    decoded = b58decode(data)
+    payload, checksum = decoded[:-4], decoded[-4:]
+    if len(decoded) < 4 or _checksum(payload) != checksum:
+        raise ValueError("Invalid checksum")
+    return payload
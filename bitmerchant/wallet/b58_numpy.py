@@ -0,0 +1,128 @@
+"""Vectorised base58check encoding of address payloads, with NumPy.
+
+Every address payload is 21 bytes, a version byte and a hash160, so with
+its 4 byte checksum it is a 200 bit number that is at most 35 base58 digits
+long. That fixed width lets every row be radix converted at once: each
+row is split into seven 32 bit limbs, and the limbs of all the rows are
+divided by 58^5 together, which produces five base58 digits of every row
+per pass.
+
+NumPy is optional. If it isn't installed, `numpy` is None here and
+`b58encode_check_rows` raises an ImportError; `encode_addresses` falls back
+to encoding one address at a time with bitmerchant.wallet.b58.
+"""
+from hashlib import sha256
+
+from .b58 import ALPHABET
+from .b58 import b58encode_check
+from .utils import ensure_str
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+PAYLOAD_SIZE = 21
+# The width of an encoded payload and checksum, in base58 digits
+ENCODED_SIZE = 35
+# Below this many payloads, the overhead of numpy isn't worth it
+MIN_BATCH_SIZE = 64
+
+_LIMBS = 7
+_PASS_DIGITS = 5
+_PASS_DIVISOR = 58 ** _PASS_DIGITS  # < 2 ** 30
+
+
+def _as_array(payloads):
+    """Get an (N, 21) uint8 array from an array or a sequence of bytes."""
+    if isinstance(payloads, numpy.ndarray):
+        array = payloads
+    else:
+        array = numpy.frombuffer(b"".join(payloads), dtype=numpy.uint8)
+    array = numpy.ascontiguousarray(array, dtype=numpy.uint8)
+    if array.size % PAYLOAD_SIZE or (
+            array.ndim == 2 and array.shape[1] != PAYLOAD_SIZE):
+        raise ValueError("Payloads must be %s bytes long" % PAYLOAD_SIZE)
+    return array.reshape(-1, PAYLOAD_SIZE)
+
+
+def _b58_digits(rows):
+    """Radix convert (N, 25) uint8 rows to (N, 35) base58 digit values."""
+    count = rows.shape[0]
+    # Left pad the 25 byte rows to 28 bytes, seven big-endian 32 bit limbs
+    padded = numpy.zeros((count, _LIMBS * 4), dtype=numpy.uint8)
+    padded[:, 3:] = rows
+    limbs = padded.view(">u4").astype(numpy.uint64)
+
+    digits = numpy.empty((count, ENCODED_SIZE), dtype=numpy.uint8)
+    shift = numpy.uint64(32)
+    divisor = numpy.uint64(_PASS_DIVISOR)
+    for p in range(ENCODED_SIZE // _PASS_DIGITS):
+        # Long division of every row by 58^5, most significant limb first.
+        # The remainder is < 2^30, so remainder * 2^32 + limb fits in 64 bits
+        remainder = numpy.zeros(count, dtype=numpy.uint64)
+        for i in range(_LIMBS):
+            current = (remainder << shift) | limbs[:, i]
+            limbs[:, i] = current // divisor
+            remainder = current % divisor
+        # remainder holds the next five least significant digits
+        end = ENCODED_SIZE - p * _PASS_DIGITS
+        for j in range(_PASS_DIGITS):
+            digits[:, end - 1 - j] = remainder % 58
+            remainder //= 58
+    return digits
+
+
+def b58encode_check_rows(payloads):
+    """Base58check encode many 21 byte address payloads at once.
+
+    :param payloads: The version byte and hash160 of each address.
+    :type payloads: An (N, 21) uint8 numpy array, or a sequence of 21 byte
+        strings
+
+    Returns a list of N address strs, the same as calling
+    `b58encode_check` on each payload.
+    """
+    if numpy is None:
+        raise ImportError("numpy is required for b58encode_check_rows")
+    payloads = _as_array(payloads)
+    count = payloads.shape[0]
+    if not count:
+        return []
+    data = payloads.tobytes()
+    checksums = b"".join(
+        sha256(sha256(data[i:i + PAYLOAD_SIZE]).digest()).digest()[:4]
+        for i in range(0, len(data), PAYLOAD_SIZE))
+    rows = numpy.empty((count, PAYLOAD_SIZE + 4), dtype=numpy.uint8)
+    rows[:, :PAYLOAD_SIZE] = payloads
+    rows[:, PAYLOAD_SIZE:] = numpy.frombuffer(
+        checksums, dtype=numpy.uint8).reshape(count, 4)
+
+    digits = _b58_digits(rows)
+    alphabet = numpy.frombuffer(ALPHABET.encode("ascii"), dtype=numpy.uint8)
+    encoded = alphabet[digits].tobytes()
+    # Each leading zero byte is encoded as a 1, and the number itself has no
+    # leading zero digits. There are always at least as many leading zero
+    # digits in the fixed width encoding as there are leading zero bytes,
+    # so each address is just a suffix of its fixed width encoding.
+    first_digit = numpy.argmax(digits != 0, axis=1)
+    zero_bytes = numpy.argmax(rows != 0, axis=1)
+    starts = (first_digit - zero_bytes).tolist()
+    return [
+        ensure_str(encoded[i * ENCODED_SIZE + start:(i + 1) * ENCODED_SIZE])
+        for i, start in enumerate(starts)]
+
+
+def encode_addresses(payloads):
+    """Base58check encode 21 byte address payloads, as fast as possible.
+
+    Uses `b58encode_check_rows` when numpy is installed and there are
+    enough payloads to make it worthwhile, otherwise `b58encode_check`.
+
+    :param payloads: The version byte and hash160 of each address
+    :type payloads: A list of 21 byte strings
+    """
+    if numpy is not None and len(payloads) >= MIN_BATCH_SIZE:
+        return b58encode_check_rows(payloads)
+    return [ensure_str(b58encode_check(payload)) for payload in payloads]
@@ -0,0 +1,295 @@
+"""Bech32 and bech32m encoding, and native segwit addresses.
+
+Bech32 is described in BIP173, and bech32m, which witness versions 1 and up
+use, in BIP350:
+https://github.com/bitcoin/bips/blob/master/bip-0173.mediawiki
+https://github.com/bitcoin/bips/blob/master/bip-0350.mediawiki
+
+    >>> encode_segwit_address("bc", 0, key_hash)
+    'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4'
+
+The checksum is a polymod over the 5 bit symbols of the string. This is
+tuned for the short strings of addresses:
+
+* The polymod steps two symbols at a time, looking up the feedback of the
+  checksum's top 10 bits in a precomputed table, instead of testing each
+  generator bit of each symbol.
+* The polymod of the human readable part is computed once per call, and
+  once per batch in `encode_segwit_addresses` and `decode_segwit_addresses`.
+* Witness programs are regrouped into 5 bit symbols with one big int, and
+  encoded two characters at a time. Decoding maps every character to its
+  value at once with bytes.translate.
+
+Invalid strings raise a ValueError, as in bitmerchant.wallet.b58, except
+with `decode_segwit_addresses`, which gives None for them.
+"""
+from .utils import bytes_to_long
+from .utils import ensure_str
+from .utils import long_to_bytes
+
+
+CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+# The final polymod of a valid string, which identifies its encoding
+BECH32 = 1
+BECH32M = 0x2bc830a3
+
+MAX_LENGTH = 90
+
+_GENERATOR = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+
+
+def _feedback_table(bits):
+    """Get the feedback of every value of the top `bits` bits of a checksum.
+
+    The polymod is linear, so stepping it over bits // 5 symbols is the same
+    as shifting the checksum left by bits, then xoring in the symbols and the
+    table entry for the bits that were shifted out.
+    """
+    table = []
+    for top in range(1 << bits):
+        chk = top << (30 - bits)
+        for _ in range(bits // 5):
+            shifted_out = chk >> 25
+            chk = (chk & 0x1ffffff) << 5
+            for i in range(5):
+                if (shifted_out >> i) & 1:
+                    chk ^= _GENERATOR[i]
+        table.append(chk)
+    return table
+
+
+_TABLE = _feedback_table(5)
+_PAIR_TABLE = _feedback_table(10)
+# _PAIRS[i] is the two character encoding of the symbols i >> 5 and i & 31
+_PAIRS = [a + b for a in CHARSET for b in CHARSET]
+# A bytes.translate table from (lowercase) characters to their values, with
+# 255 for characters outside of the charset
+_TRANSLATE = bytes(bytearray(CHARSET.find(chr(c)) & 0xff for c in range(256)))
+
+
+def _polymod(chk, values):
+    """Continue the polymod chk over a bytearray of 5 bit values."""
+    table = _PAIR_TABLE
+    start = len(values) & 1
+    if start:
+        chk = ((chk & 0x1ffffff) << 5) ^ values[0] ^ _TABLE[chk >> 25]
+    for i in range(start, len(values), 2):
+        chk = (((chk & 0xfffff) << 10) ^ (values[i] << 5) ^ values[i + 1] ^
+               table[chk >> 20])
+    return chk
+
+
+def _hrp_polymod(hrp):
+    """Get the polymod of a human readable part, for `_polymod` to continue.
+    """
+    try:
+        data = bytearray(hrp.encode("ascii"))
+    except UnicodeError:
+        raise ValueError("Invalid human readable part")
+    if not data or min(data) < 33 or max(data) > 126:
+        raise ValueError("Invalid human readable part")
+    return _polymod(1, bytearray(c >> 5 for c in data) + b"\0" +
+                    bytearray(c & 31 for c in data))
+
+
+def _encode(hrp, chk, value, count, spec):
+    """Encode count symbols, the big-endian 5 bit digits of value.
+
+    :param chk: The polymod of hrp
+    """
+    table = _PAIR_TABLE
+    pairs = _PAIRS
+    parts = [hrp, "1"]
+    if count & 1:
+        count -= 1
+        symbol = value >> (5 * count)
+        chk = ((chk & 0x1ffffff) << 5) ^ symbol ^ _TABLE[chk >> 25]
+        parts.append(CHARSET[symbol])
+    for shift in range(5 * count - 10, -10, -10):
+        pair = (value >> shift) & 1023
+        chk = ((chk & 0xfffff) << 10) ^ pair ^ table[chk >> 20]
+        parts.append(pairs[pair])
+    # The checksum is the polymod after six more zero symbols
+    for _ in range(3):
+        chk = ((chk & 0xfffff) << 10) ^ table[chk >> 20]
+    chk ^= spec
+    parts.append(pairs[chk >> 20])
+    parts.append(pairs[(chk >> 10) & 1023])
+    parts.append(pairs[chk & 1023])
+    return "".join(parts)
+
+
+def _split(bech):
+    """Split a bech32 string into its hrp and a bytearray of its values.
+
+    The values include the checksum, which isn't verified.
+    """
+    bech = ensure_str(bech)
+    if len(bech) > MAX_LENGTH:
+        raise ValueError("Too long")
+    lower = bech.lower()
+    if bech != lower and bech != bech.upper():
+        raise ValueError("Mixed case")
+    pos = lower.rfind("1")
+    if pos < 1 or pos + 7 > len(lower):
+        raise ValueError("Invalid separator position")
+    try:
+        values = bytearray(
+            lower[pos + 1:].encode("ascii").translate(_TRANSLATE))
+    except UnicodeError:
+        raise ValueError("Invalid character")
+    if 255 in values:
+        raise ValueError("Invalid character")
+    return lower[:pos], values
+
+
+def _verify(chk, values):
+    """Get the encoding of values, with the polymod chk of their hrp."""
+    chk = _polymod(chk, values)
+    if chk != BECH32 and chk != BECH32M:
+        raise ValueError("Invalid checksum")
+    return chk
+
+
+def bech32_encode(hrp, data, spec=BECH32):
+    """Encode 5 bit values as a bech32 str.
+
+    :param hrp: The human readable part
+    :type hrp: str
+    :param data: The values to encode, each less than 32
+    :type data: A sequence of ints
+    :param spec: BECH32 or BECH32M
+    """
+    hrp = hrp.lower()
+    value = 0
+    for symbol in data:
+        if not 0 <= symbol < 32:
+            raise ValueError("Invalid value %s" % symbol)
+        value = (value << 5) | symbol
+    if len(hrp) + len(data) + 7 > MAX_LENGTH:
+        raise ValueError("Too long")
+    return _encode(hrp, _hrp_polymod(hrp), value, len(data), spec)
+
+
+def bech32_decode(bech):
+    """Decode a bech32 or bech32m str.
+
+    Returns (hrp, data, spec), where hrp is lowercase, data is a bytearray
+    of the 5 bit values without the checksum and spec is BECH32 or BECH32M.
+    """
+    hrp, values = _split(bech)
+    spec = _verify(_hrp_polymod(hrp), values)
+    return hrp, values[:-6], spec
+
+
+def _check_program(witness_version, length):
+    if not 0 <= witness_version <= 16:
+        raise ValueError("Invalid witness version %s" % witness_version)
+    if not 2 <= length <= 40:
+        raise ValueError("Invalid witness program length %s" % length)
+    if witness_version == 0 and length not in (20, 32):
+        raise ValueError(
+            "Invalid version 0 witness program length %s" % length)
+
+
+def _encode_segwit(hrp, chk, witness_version, witness_program):
+    _check_program(witness_version, len(witness_program))
+    bits = len(witness_program) * 8
+    count = (bits + 4) // 5
+    # The program, padded with zero bits to whole symbols, after the version
+    value = ((witness_version << (5 * count)) |
+             (bytes_to_long(witness_program) << (5 * count - bits)))
+    spec = BECH32 if witness_version == 0 else BECH32M
+    return _encode(hrp, chk, value, count + 1, spec)
+
+
+def _decode_segwit(values, spec):
+    """Get the witness version and program of verified values."""
+    data = values[:-6]
+    if not data:
+        raise ValueError("No witness version")
+    witness_version = data[0]
+    if (witness_version == 0) != (spec == BECH32):
+        raise ValueError("Wrong checksum for witness version %s" %
+                         witness_version)
+    bits = 5 * (len(data) - 1)
+    padding = bits % 8
+    if padding > 4:
+        raise ValueError("Invalid padding")
+    _check_program(witness_version, bits // 8)
+    value = 0
+    for i in range(1, len(data)):
+        value = (value << 5) | data[i]
+    if value & ((1 << padding) - 1):
+        raise ValueError("Non-zero padding")
+    return witness_version, long_to_bytes(value >> padding, bits // 8)
+
+
+def encode_segwit_address(hrp, witness_version, witness_program):
+    """Encode a segwit output as a bech32 (or bech32m) address.
+
+    :param hrp: The human readable part of the network, like "bc"
+    :type hrp: str
+    :param witness_version: The witness version, 0 for P2WPKH and P2WSH
+    :type witness_version: int
+    :param witness_program: The witness program, like a 20 byte hash160
+    :type witness_program: bytes
+
+    Version 0 uses bech32 and later versions bech32m.
+    """
+    hrp = hrp.lower()
+    return _encode_segwit(
+        hrp, _hrp_polymod(hrp), witness_version, witness_program)
+
+
+def encode_segwit_addresses(hrp, witness_version, witness_programs):
+    """Encode many segwit outputs of one network and witness version.
+
+    This is the same as calling `encode_segwit_address` for each witness
+    program, but the human readable part is only processed once.
+    """
+    hrp = hrp.lower()
+    chk = _hrp_polymod(hrp)
+    return [_encode_segwit(hrp, chk, witness_version, witness_program)
+            for witness_program in witness_programs]
+
+
+def decode_segwit_address(hrp, address):
+    """Decode a segwit address.
+
+    :param hrp: The human readable part the address must have, like "bc"
+    :type hrp: str
+    :param address: The address
+    :type address: str
+
+    Returns (witness_version, witness_program). Raises a ValueError if the
+    address is invalid or belongs to another network.
+    """
+    address_hrp, values = _split(address)
+    if address_hrp != hrp.lower():
+        raise ValueError("Wrong human readable part %s" % address_hrp)
+    return _decode_segwit(values, _verify(_hrp_polymod(address_hrp), values))
+
+
+def decode_segwit_addresses(hrp, addresses):
+    """Decode many segwit addresses of one network.
+
+    This is the same as calling `decode_segwit_address` for each address,
+    but the human readable part is only processed once.
+
+    Returns a list with (witness_version, witness_program), or None for
+    invalid addresses, for every address, in order.
+    """
+    hrp = hrp.lower()
+    chk = _hrp_polymod(hrp)
+    results = []
+    for address in addresses:
+        try:
+            address_hrp, values = _split(address)
+            if address_hrp != hrp:
+                raise ValueError("Wrong human readable part")
+            results.append(_decode_segwit(values, _verify(chk, values)))
+        except (ValueError, TypeError):
+            results.append(None)
+    return results
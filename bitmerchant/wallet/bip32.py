@@ -1,30 +1,40 @@
 from binascii import hexlify
 from binascii import unhexlify
+from collections import deque
 from hashlib import sha256
 from hashlib import sha512
 import hmac
+import multiprocessing
 
-import base58
 from os import urandom
-from cachetools.func import lru_cache
-from ecdsa import SECP256k1
-from ecdsa.ecdsa import Public_key as _ECDSA_Public_key
-from ecdsa.ellipticcurve import INFINITY
 import six
 import time
+from timeit import default_timer
 
+from .. import hooks
 from ..network import BitcoinMainNet
+from . import secp256k1
+from .address import addresses_for_key_hashes
+from .address import P2PKH
+from .b58 import b58decode_check
+from .b58 import b58encode_check
+from .bech32 import encode_segwit_address
+from .cache import DerivationCache
+from .cache import PathCache
 from .keys import incompatible_network_exception_factory
 from .keys import PrivateKey
 from .keys import PublicKey
 from .keys import PublicPair
+from .utils import bytes_to_long
 from .utils import chr_py2
 from .utils import ensure_bytes
 from .utils import ensure_str
 from .utils import hash160
+from .utils import hash160_many
+from .utils import hmac_sha512
 from .utils import is_hex_string
 from .utils import long_or_int
-from .utils import long_to_hex
+from .utils import long_to_bytes
 
 
 class Wallet(object):
@@ -53,6 +63,23 @@ class Wallet(object):
     BIP32 Hierarchical Deterministic Wallets are described in this BIP:
     https://github.com/bitcoin/bips/blob/master/bip-0032.mediawiki
     """
+    # The cache of derived children, shared by every Wallet. Replace it with
+    # a differently configured DerivationCache (or anything with the same
+    # get and set methods) to tune it, or set it to None to disable caching.
+    derivation_cache = DerivationCache(maxsize=1024)
+    # The cache of intermediate nodes used by get_child_for_path, also
+    # shared by every Wallet. Set it to None to disable it.
+    path_cache = PathCache(maxsize=1024)
+    # The cache of deserialized Wallets, also shared by every Wallet. This
+    # is off by default; set it to a DeserializeCache to turn it on, after
+    # which `deserialize` returns shared, frozen Wallets.
+    deserialize_cache = None
+    # Counters and latency histograms, off by default. Set this to a
+    # bitmerchant.wallet.metrics.Metrics to turn them on.
+    metrics = None
+    # For frozen Wallets, the class they were frozen from; see _frozen_class
+    _unfrozen_class = None
+
     def __init__(self,
                  chain_code,
                  depth=0,
@@ -67,6 +94,10 @@ class Wallet(object):
 
         You probably don't want to use this init methd. Instead use one
         of the 'from_master_secret' or 'deserialize' cosntructors.
+
+        If only private key data is given, the public key is computed the
+        first time it is needed. If both private and public key data are
+        given, they are checked against each other.
         """
         if (not (private_exponent or private_key) and
                 not (public_pair or public_key)):
@@ -74,7 +105,8 @@ class Wallet(object):
                 "You must supply one of private_exponent or public_pair")
 
         self.private_key = None
-        self.public_key = None
+        self._public_key = None
+        self._identifier = None
         if private_key:
             if not isinstance(private_key, PrivateKey):
                 raise InvalidPrivateKeyError(
@@ -90,27 +122,29 @@ class Wallet(object):
                 raise InvalidPublicKeyError(
                     "public_key must be of type "
                     "bitmerchant.wallet.keys.PublicKey")
-            self.public_key = public_key
+            self._public_key = public_key
         elif public_pair:
-            self.public_key = PublicKey.from_public_pair(
+            self._public_key = PublicKey.from_public_pair(
                 public_pair, network=network)
-        else:
-            self.public_key = self.private_key.get_public_key()
 
-        if (self.private_key and self.private_key.get_public_key() !=
-                self.public_key):
+        if (self.private_key and self._public_key and
+                self.private_key.get_public_key() != self._public_key):
             raise KeyMismatchError(
                 "Provided private and public values do not match")
 
-        def h(val, hex_len):
+        def b(val, size):
+            """Get `size` raw bytes from a long, a hex string or raw bytes."""
             if isinstance(val, six.integer_types):
-                return long_to_hex(val, hex_len)
+                return long_to_bytes(val, size)
+            elif isinstance(val, six.binary_type) and len(val) == size:
+                # Already raw bytes
+                return val
             elif (isinstance(val, six.string_types) or
                     isinstance(val, six.binary_type)) and is_hex_string(val):
                 val = ensure_bytes(val)
-                if len(val) != hex_len:
+                if len(val) != size * 2:
                     raise ValueError("Invalid parameter length")
-                return val
+                return unhexlify(val)
             else:
                 raise ValueError("Invalid parameter type")
 
@@ -131,11 +165,68 @@ class Wallet(object):
         if (isinstance(parent_fingerprint, six.string_types) or
                 isinstance(parent_fingerprint, six.binary_type)):
             val = ensure_bytes(parent_fingerprint)
-            if val.startswith(b"0x"):
+            # Raw 4 byte fingerprints can start with b"0x" too; only strip
+            # the prefix of hex ones
+            if len(val) != 4 and val.startswith(b"0x"):
                 parent_fingerprint = val[2:]
-        self.parent_fingerprint = b"0x" + h(parent_fingerprint, 8)
+        # These are kept as raw bytes, and hex encoded by their properties
+        self._parent_fingerprint = b(parent_fingerprint, 4)
+        # A private parent whose public key wasn't needed yet, see get_child
+        self._parent_private_key = None
         self.child_number = l(child_number)
-        self.chain_code = h(chain_code, 64)
+        self._chain_code = b(chain_code, 32)
+
+    @property
+    def public_key(self):
+        """The PublicKey of this node.
+
+        For private nodes this is computed from the private key on first use.
+        """
+        if self._public_key is None and self.private_key:
+            self._count_public_key(self.private_key)
+            self._public_key = self.private_key.get_public_key()
+        return self._public_key
+
+    def _count_public_key(self, private_key):
+        """Count the scalar multiplication of a private key's public key,
+        for the metrics, if it is about to be computed.
+        """
+        if self.metrics is not None and private_key._public_pair is None:
+            self.metrics.ec_operation("scalar_multiply")
+
+    @public_key.setter
+    def public_key(self, public_key):
+        self._public_key = public_key
+        self._identifier = None
+
+    @property
+    def _node_class(self):
+        """The class of nodes made from this one, like its children.
+
+        This is the Wallet's own class, or for a frozen Wallet, the class it
+        was frozen from.
+        """
+        return self._unfrozen_class or self.__class__
+
+    @property
+    def chain_code(self):
+        """The hex-encoded chain code."""
+        return hexlify(self._chain_code)
+
+    @property
+    def parent_fingerprint(self):
+        """The hex-encoded fingerprint of the parent, with a leading 0x."""
+        return b"0x" + hexlify(self._get_parent_fingerprint_bytes())
+
+    def _get_parent_fingerprint_bytes(self):
+        if self._parent_private_key is not None:
+            # Computing the parent's public key was deferred until now
+            self._count_public_key(self._parent_private_key)
+            self._parent_fingerprint = hash160(
+                self._parent_private_key.get_public_key().get_key_bytes(
+                    compressed=True))[:4]
+            self._parent_private_key = None
+        return self._parent_fingerprint
 
     def get_private_key_hex(self):
         """
@@ -160,14 +251,19 @@ class Wallet(object):
         way (and wallet software is not required to accept payment to the chain
         key itself).
         """
-        key = self.get_public_key_hex()
-        return ensure_bytes(hexlify(hash160(unhexlify(ensure_bytes(key)))))
+        return hexlify(self._get_identifier_bytes())
+
+    def _get_identifier_bytes(self):
+        if self._identifier is None:
+            self._identifier = hash160(
+                self.public_key.get_key_bytes(compressed=True))
+        return self._identifier
 
     @property
     def fingerprint(self):
         """The first 32 bits of the identifier are called the fingerprint."""
         # 32 bits == 4 Bytes == 8 hex characters
-        return b'0x' + self.identifier[:8]
+        return b'0x' + hexlify(self._get_identifier_bytes()[:4])
 
     def create_new_address_for_user(self, user_id):
         """Create a new bitcoin address to accept payments for a User.
@@ -208,6 +304,76 @@ class Wallet(object):
             M/0/1
             m/0/1.pub
             M/0/1.pub
+
+        Intermediate nodes are kept in `Wallet.path_cache`, so resolving
+        many paths under a common prefix only derives that prefix once.
+        """
+        if hooks._hooks:
+            with hooks.traced("get_child_for_path", path=path) as operation:
+                return self._get_child_for_path(path, operation)
+        return self._get_child_for_path(path)
+
+    def _get_child_for_path(self, path, operation=None):
+        """Do get_child_for_path, reporting to a hooks Operation."""
+        as_private, components = self._parse_path(path)
+        if not components:
+            return self if as_private else self.public_copy()
+        return self._child_for_components(components, as_private, operation)
+
+    def _child_for_components(self, components, as_private=True,
+                              operation=None):
+        """Get the child for a parsed, non-empty path.
+
+        Only the leaf has its private key stripped if as_private is False;
+        the intermediate nodes in the path cache always keep theirs.
+        """
+        # Only ever hand out fresh leaves, never the cached nodes themselves
+        cache = self.path_cache
+        length, child = 0, None
+        if cache is not None:
+            root = self._path_root()
+            length, child = cache.longest_prefix(root, components[:-1])
+            if operation is not None and len(components) > 1:
+                operation.cache_hit = length == len(components) - 1
+        if child is None:
+            child = self
+        for i in range(length, len(components) - 1):
+            child = child.get_child(*components[i])
+            if cache is not None:
+                cache.set(root, components[:i + 1], child)
+        return child.get_child(*components[-1], as_private=as_private)
+
+    def pin_path(self, path):
+        """Keep the node for path in the path cache until it is unpinned.
+
+        Use this for hot prefixes, like the account of a busy wallet, that
+        must never be evicted from `Wallet.path_cache`. Any '.pub' or M in
+        the path is ignored.
+        """
+        components = self._parse_path(path)[1]
+        if self.path_cache is None or not components:
+            return
+        # The cached nodes are always private, like the ones that
+        # get_child_for_path caches, whatever the path says
+        node = self._child_for_components(components)
+        self.path_cache.pin(self._path_root(), components, node)
+
+    def unpin_path(self, path):
+        """Undo `pin_path`."""
+        components = self._parse_path(path)[1]
+        if self.path_cache is not None:
+            self.path_cache.unpin(self._path_root(), components)
+
+    def _path_root(self):
+        # Everything about this node that its descendants depend on
+        return (self._content_key(), self.depth, self.network)
+
+    @staticmethod
+    def _parse_path(path):
+        """Parse a derivation path.
+
+        Returns a tuple of as_private and a tuple of (child_number, is_prime)
+        tuples, one for each level of the path.
         """
         path = ensure_str(path)
 
@@ -226,24 +392,21 @@ class Wallet(object):
         if len(parts) == 0:
             raise InvalidPathError()
 
-        child = self
+        components = []
         for part in parts:
             if part.lower() == "m":
                 continue
             is_prime = None  # Let primeness be figured out by the child number
-            if part[-1] in "'p":
+            if part[-1:] in ("'", "p"):
                 is_prime = True
                 part = part.replace("'", "").replace("p", "")
             try:
                 child_number = long_or_int(part)
             except ValueError:
                 raise InvalidPathError("%s is not a valid path" % path)
-            child = child.get_child(child_number, is_prime)
-        if not as_private:
-            return child.public_copy()
-        return child
+            components.append((child_number, is_prime))
+        return as_private, tuple(components)
 
-    @lru_cache(maxsize=1024)
     def get_child(self, child_number, is_prime=None, as_private=True):
         """Derive a child key.
 
@@ -275,6 +438,14 @@ class Wallet(object):
         This derivation is fully described at
         https://github.com/bitcoin/bips/blob/master/bip-0032.mediawiki#child-key-derivation-functions  # nopep8
         """
+        if hooks._hooks:
+            with hooks.traced("get_child") as operation:
+                return self._get_child(
+                    child_number, is_prime, as_private, operation)
+        return self._get_child(child_number, is_prime, as_private)
+
+    def _get_child(self, child_number, is_prime, as_private, operation=None):
+        """Do get_child, reporting the details to a hooks Operation."""
         boundary = 0x80000000
 
         # Note: If this boundary check gets removed, then children above
@@ -306,28 +477,92 @@ class Wallet(object):
             # Even though we take child_number as an int < boundary, the
             # internal derivation needs it to be the larger number.
             child_number = child_number + boundary
-        child_number_hex = long_to_hex(child_number, 8)
 
+        # Children are cached by the content of the derivation, never by
+        # this Wallet object. The prime flag is part of the key so prime and
+        # non-prime children can't be mixed up.
+        cache = self.derivation_cache
+        derived = None
+        if cache is not None:
+            cache_key = self._content_key() + (child_number, is_prime)
+            derived = cache.get(cache_key)
+        if operation is not None:
+            operation.index = child_number
+            if cache is not None:
+                operation.cache_hit = derived is not None
+        if derived is None:
+            metrics = self.metrics
+            if metrics is None:
+                derived = self._derive_child(child_number, is_prime)
+            else:
+                start = default_timer()
+                derived = self._derive_child(child_number, is_prime)
+                metrics.derived(
+                    "private_prime" if is_prime else
+                    "private" if self.private_key else "public",
+                    default_timer() - start)
+            if cache is not None:
+                cache.set(cache_key, derived)
+        chain_code, private_exponent, public_pair = derived
+
+        # Hardened chains like m/44'/0'/0' never need the public keys of
+        # their intermediate nodes, so if this node's public key hasn't been
+        # computed yet, put off computing the child's parent fingerprint too.
+        defer_fingerprint = (
+            self._identifier is None and self._public_key is None)
+        child = self._node_class(
+            chain_code=chain_code,
+            depth=self.depth + 1,  # we have to go deeper...
+            parent_fingerprint=(
+                0 if defer_fingerprint else self._get_identifier_bytes()[:4]),
+            child_number=child_number,
+            private_exponent=private_exponent,
+            public_pair=public_pair,
+            network=self.network)
+        if defer_fingerprint:
+            child._parent_private_key = self.private_key
+        if not as_private:
+            return child.public_copy()
+        return child
+
+    def _content_key(self):
+        """Get a (chain code, key) tuple identifying this node's content.
+
+        The key is the private key prefixed with a 0 byte, or the compressed
+        public key for public nodes, so they can't collide.
+        """
+        if self.private_key:
+            key = b'\0' + self.private_key.get_key_bytes()
+        else:
+            key = self.public_key.get_key_bytes(compressed=True)
+        return (self._chain_code, key)
+
+    def _derive_child(self, child_number, is_prime):
+        """Do the math of get_child.
+
+        :param child_number: The full child number, including the prime bit
+        :type child_number: int
+
+        Returns a tuple of the child's chain code, as raw bytes, and either its
+        private exponent or its public pair (the other one is None).
+        """
         if is_prime:
             # Let data = concat(0x00, self.key, child_number)
-            data = b'00' + self.private_key.get_key()
+            data = b'\0' + self.private_key.get_key_bytes()
         else:
-            data = self.get_public_key_hex()
-        data += child_number_hex
+            data = self.public_key.get_key_bytes(compressed=True)
+        data += long_to_bytes(child_number, 4)
 
         # Compute a 64 Byte I that is the HMAC-SHA512, using self.chain_code
         # as the seed, and data as the message.
-        I = hmac.new(
-            unhexlify(ensure_bytes(self.chain_code)),
-            msg=unhexlify(ensure_bytes(data)),
-            digestmod=sha512).digest()
+        I = hmac_sha512(self._chain_code, data)
         # Split I into its 32 Byte components.
         I_L, I_R = I[:32], I[32:]
 
-        if long_or_int(hexlify(I_L), 16) >= SECP256k1.order:
+        I_L_long = bytes_to_long(I_L)
+        if I_L_long >= secp256k1.N:
             raise InvalidPrivateKeyError("The derived key is too large.")
 
-        c_i = hexlify(I_R)
         private_exponent = None
         public_pair = None
         if self.private_key:
@@ -335,39 +570,400 @@ class Wallet(object):
             # I_L is added to the current key's secret exponent (mod n), where
             # n is the order of the ECDSA curve in use.
             private_exponent = (
-                (long_or_int(hexlify(I_L), 16) +
-                 long_or_int(self.private_key.get_key(), 16))
-                % SECP256k1.order)
+                (I_L_long + self.private_key.secret_exponent) % secp256k1.N)
+            if private_exponent == 0:
+                # The child's public key would be the point at infinity
+                raise InfinityPointException(
+                    "The point at infinity is invalid.")
             # I_R is the child's chain code
         else:
             # Only use public information for this derivation
-            g = SECP256k1.generator
-            I_L_long = long_or_int(hexlify(I_L), 16)
-            point = (_ECDSA_Public_key(g, g * I_L_long).point +
-                     self.public_key.to_point())
+            # point = I_L * G + K_par
+            point = secp256k1.tweak_add(
+                self.public_key.to_public_pair(), I_L_long)
+            if point is None:
+                raise InfinityPointException(
+                    "The point at infinity is invalid.")
             # I_R is the child's chain code
-            public_pair = PublicPair(point.x(), point.y())
+            public_pair = PublicPair(*point)
+        return I_R, private_exponent, public_pair
 
-        child = self.__class__(
-            chain_code=c_i,
-            depth=self.depth + 1,  # we have to go deeper...
-            parent_fingerprint=self.fingerprint,
-            child_number=child_number_hex,
-            private_exponent=private_exponent,
-            public_pair=public_pair,
-            network=self.network)
-        if child.public_key.to_point() == INFINITY:
+    def derive_children(self, start, count, as_private=True, output="wallet"):
+        """Derive `count` consecutive non-prime children, starting at `start`.
+
+        This is a convenience wrapper around `get_children`; see it for the
+        meaning of the parameters.
+
+        >>> w = Wallet.new_random_wallet()
+        >>> addresses = w.derive_children(0, 100, output="address")
+        >>> assert addresses[10] == w.get_child(10).to_address()
+        """
+        if count < 0:
+            raise ValueError("count must not be negative")
+        return self.get_children(
+            six.moves.range(start, start + count), as_private=as_private,
+            output=output)
+
+    def get_children(self, child_numbers, as_private=True, output="wallet"):
+        """Derive many non-prime children of this node in one pass.
+
+        This gives the same results as calling `get_child` for every child
+        number, but it is much faster for large batches: the HMAC is keyed
+        with the chain code once, the parent's public key is serialized once,
+        and every child's public point is normalized with a single, shared
+        modular inversion.
+
+        :param child_numbers: The numbers of the children to derive. These
+            must all be non-prime, that is, between 0 and 2,147,483,647.
+        :type child_numbers: An iterable of ints
+        :param as_private: If False, strips the private key from the resulting
+            wallets. Ignored unless `output` is "wallet".
+        :type as_private: bool
+        :param output: What to return for each child: "wallet" for a Wallet
+            node, "public_key" for the hex-encoded compressed public key (as
+            in `get_public_key_hex`) or "address" for the address (as in
+            `to_address`). Skipping the Wallet objects is faster.
+        :type output: str
+
+        Returns a list with one entry per child number, in order.
+        """
+        if output not in ("wallet", "public_key", "address"):
+            raise ValueError("Invalid output type %s" % output)
+        child_numbers = self._check_child_numbers(child_numbers)
+        if hooks._hooks:
+            with hooks.traced("get_children", index=(
+                    child_numbers[0] if child_numbers else None),
+                    count=len(child_numbers)):
+                return self._get_children(child_numbers, as_private, output)
+        return self._get_children(child_numbers, as_private, output)
+
+    def _get_children(self, child_numbers, as_private, output):
+        """Do get_children for already validated child numbers."""
+        # Private children in wallet form don't need their public points
+        need_points = not (
+            self.private_key and output == "wallet" and as_private)
+        chain_codes, exponents, points = self._derive_batch(
+            child_numbers, need_points)
+
+        if output == "public_key":
+            return [hexlify(_compressed_key_bytes(point)) for point in points]
+        elif output == "address":
+            return self._points_to_addresses(points)
+
+        fingerprint = self._get_identifier_bytes()[:4]
+        children = []
+        for i, child_number in enumerate(child_numbers):
+            kwargs = {}
+            if points:
+                kwargs['public_pair'] = PublicPair(*points[i])
+            if exponents and as_private:
+                kwargs['private_exponent'] = exponents[i]
+            children.append(self._node_class(
+                chain_code=chain_codes[i],
+                depth=self.depth + 1,
+                parent_fingerprint=fingerprint,
+                child_number=child_number,
+                network=self.network,
+                **kwargs))
+        return children
+
+    def get_children_addresses(self, child_numbers, formats=(P2PKH,),
+                               networks=None):
+        """Get the addresses of many non-prime children in several formats.
+
+        Every child's public point is derived and hashed once, and then
+        encoded in every format for every network, so asking for more
+        formats or networks costs little more than asking for one.
+
+        :param child_numbers: The numbers of the children, as in
+            `get_children`.
+        :param formats: Which of the bitmerchant.wallet.address
+            ADDRESS_FORMATS to encode.
+        :param networks: The networks to encode for. Defaults to this
+            wallet's network.
+
+        Returns a list with a dict per child number, in order, as in
+        `addresses`.
+        """
+        if networks is None:
+            networks = [self.network]
+        child_numbers = self._check_child_numbers(child_numbers)
+        if hooks._hooks:
+            with hooks.traced("get_children_addresses", index=(
+                    child_numbers[0] if child_numbers else None),
+                    count=len(child_numbers)):
+                return self._get_children_addresses(
+                    child_numbers, formats, networks)
+        return self._get_children_addresses(child_numbers, formats, networks)
+
+    def _get_children_addresses(self, child_numbers, formats, networks):
+        _, _, points = self._derive_batch(child_numbers, need_points=True)
+        key_hashes = hash160_many(
+            [_compressed_key_bytes(point) for point in points])
+        return addresses_for_key_hashes(key_hashes, formats, networks)
+
+    @staticmethod
+    def _check_child_numbers(child_numbers):
+        """Get child_numbers as a list, checking they are all non-prime."""
+        boundary = 0x80000000
+        child_numbers = list(child_numbers)
+        for child_number in child_numbers:
+            if child_number < 0 or child_number >= boundary:
+                raise ValueError(
+                    "Invalid child number. Must be between 0 and %s" %
+                    boundary)
+        return child_numbers
+
+    def _derive_batch(self, child_numbers, need_points=True):
+        """Do the math of get_children for already validated child numbers.
+
+        Returns lists of the children's chain codes, their private exponents
+        (empty for a public parent) and their affine public points (empty if
+        need_points is False and this is a private parent).
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            start = default_timer()
+        # Every child shares the HMAC key and the start of the message
+        mac = hmac.new(self._chain_code, digestmod=sha512)
+        public_key_bytes = self.public_key.get_key_bytes(compressed=True)
+        parent_pair = self.public_key.to_public_pair()
+        parent_exponent = None
+        if self.private_key:
+            parent_exponent = self.private_key.secret_exponent
+
+        chain_codes = []
+        exponents = []
+        points = []
+        for child_number in child_numbers:
+            child_mac = mac.copy()
+            child_mac.update(public_key_bytes)
+            child_mac.update(long_to_bytes(child_number, 4))
+            I = child_mac.digest()
+            I_L, I_R = I[:32], I[32:]
+            I_L_long = bytes_to_long(I_L)
+            if I_L_long >= secp256k1.N:
+                raise InvalidPrivateKeyError("The derived key is too large.")
+            chain_codes.append(I_R)
+            if parent_exponent:
+                exponent = (I_L_long + parent_exponent) % secp256k1.N
+                if exponent == 0:
+                    raise InfinityPointException(
+                        "The point at infinity is invalid.")
+                exponents.append(exponent)
+                if need_points:
+                    points.append(
+                        secp256k1.jacobian_multiply_generator(exponent))
+            else:
+                points.append(secp256k1.jacobian_add_affine(
+                    secp256k1.jacobian_multiply_generator(I_L_long),
+                    parent_pair))
+        points = secp256k1.batch_to_affine(points)
+        if None in points:
             raise InfinityPointException("The point at infinity is invalid.")
-        if not as_private:
-            return child.public_copy()
-        return child
+        if metrics is not None and child_numbers:
+            seconds = default_timer() - start
+            if parent_exponent:
+                metrics.derived("private", seconds, len(child_numbers))
+                if need_points:
+                    metrics.ec_operation(
+                        "scalar_multiply", len(child_numbers))
+            else:
+                metrics.derived("public", seconds, len(child_numbers))
+        return chain_codes, exponents, points
+
+    def _points_to_addresses(self, points):
+        """Get the addresses of a list of children's affine public points.
+
+        The base58check encoding is vectorised with numpy, if it's installed.
+        """
+        # Imported here so that importing bitmerchant.wallet doesn't import
+        # numpy
+        from .b58_numpy import encode_addresses
+        version = chr_py2(self.network.PUBKEY_ADDRESS)
+        return encode_addresses([
+            version + key_hash for key_hash in hash160_many(
+                [_compressed_key_bytes(point) for point in points])])
+
+    def iter_addresses(self, start=0, stop=None, chunk=256,
+                       public_keys=False):
+        """Lazily generate the addresses of consecutive non-prime children.
+
+        :param start: The number of the first child
+        :type start: int
+        :param stop: The number of the child after the last one, like the
+            stop of `range`. If None, continue until the last non-prime child.
+        :type stop: int
+        :param chunk: How many children to derive in each batch. Memory use
+            is proportional to chunk, no matter how long the range is.
+        :type chunk: int
+        :param public_keys: If True, also yield each child's hex-encoded
+            compressed public key.
+        :type public_keys: bool
+
+        Yields (child_number, address) tuples, or (child_number, public_key,
+        address) tuples if public_keys is True. The addresses are the same as
+        `self.get_child(child_number, as_private=False).to_address()`.
+
+        >>> w = Wallet.new_random_wallet()
+        >>> for child_number, address in w.iter_addresses(0, 10 ** 6):
+        ...     pass
+        """
+        boundary = 0x80000000
+        if stop is None:
+            stop = boundary
+        if start < 0 or stop > boundary:
+            raise ValueError(
+                "Invalid child numbers. Must be between 0 and %s" % boundary)
+        if chunk < 1:
+            raise ValueError("chunk must be positive")
+        for chunk_start in six.moves.range(start, stop, chunk):
+            child_numbers = six.moves.range(
+                chunk_start, min(chunk_start + chunk, stop))
+            if hooks._hooks:
+                with hooks.traced("iter_addresses", index=chunk_start,
+                                  count=len(child_numbers)):
+                    points = self._derive_batch(child_numbers)[2]
+                    addresses = self._points_to_addresses(points)
+            else:
+                points = self._derive_batch(child_numbers)[2]
+                addresses = self._points_to_addresses(points)
+            for child_number, point, address in zip(
+                    child_numbers, points, addresses):
+                if public_keys:
+                    yield (child_number,
+                           hexlify(_compressed_key_bytes(point)), address)
+                else:
+                    yield child_number, address
+
+    def generate_addresses(self, start, count, workers=None, chunk_size=500,
+                           progress=None, cancel=None):
+        """Generate the addresses of many non-prime children in parallel.
+
+        The range of children is split into chunks that are derived by a pool
+        of worker processes, so throughput scales with the number of cores.
+        Only the 78 byte public serialization of this node is sent to the
+        workers; private keys never leave this process.
+
+        :param start: The number of the first child
+        :type start: int
+        :param count: The number of children
+        :type count: int
+        :param workers: The number of worker processes. Defaults to the
+            number of CPUs. With 1 worker, or a single chunk, everything is
+            done in this process.
+        :type workers: int
+        :param chunk_size: The number of children in each unit of work.
+        :type chunk_size: int
+        :param progress: If given, called as progress(done, count) after each
+            chunk.
+        :type progress: callable
+        :param cancel: If given, an object like threading.Event. Once
+            `cancel.is_set()` returns True, the workers are stopped and a
+            GenerationCancelledError is raised.
+
+        Returns a list of addresses, in the order of the child numbers, that
+        is the same as `self.derive_children(start, count, output="address")`.
+
+        >>> w = Wallet.new_random_wallet()
+        >>> addresses = w.generate_addresses(0, 10000, workers=4)
+        >>> assert addresses[10] == w.get_child(10).to_address()
+        """
+        if hooks._hooks:
+            with hooks.traced("generate_addresses", index=start, count=count):
+                return self._generate_addresses(
+                    start, count, workers, chunk_size, progress, cancel)
+        return self._generate_addresses(
+            start, count, workers, chunk_size, progress, cancel)
+
+    def _generate_addresses(self, start, count, workers, chunk_size,
+                            progress, cancel):
+        addresses = []
+        chunks = self.iter_address_chunks(start, count, workers, chunk_size)
+        try:
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    raise GenerationCancelledError(addresses)
+                addresses.extend(address for _, address in chunk)
+                if progress is not None:
+                    progress(len(addresses), count)
+        finally:
+            # Stop any work that's still in flight
+            chunks.close()
+        return addresses
+
+    def iter_address_chunks(self, start, count, workers=None,
+                            chunk_size=500, public_keys=False):
+        """Generate the addresses of many non-prime children in parallel,
+        one chunk at a time.
+
+        This is `generate_addresses` for ranges too long to hold in memory.
+        At most two chunks per worker are in flight, so memory use stays
+        bounded even when the consumer is slower than the workers. Closing
+        the generator stops the workers.
+
+        :param start: The number of the first child
+        :type start: int
+        :param count: The number of children
+        :type count: int
+        :param workers: The number of worker processes. Defaults to the
+            number of CPUs. With 1 worker, or a single chunk, everything is
+            done in this process.
+        :type workers: int
+        :param chunk_size: The number of children in each chunk.
+        :type chunk_size: int
+        :param public_keys: If True, also give each child's hex-encoded
+            compressed public key.
+        :type public_keys: bool
+
+        Yields lists of the tuples `iter_addresses` yields, in the order of
+        the child numbers.
+
+        >>> w = Wallet.new_random_wallet()
+        >>> for chunk in w.iter_address_chunks(0, 10 ** 6, workers=4):
+        ...     for child_number, address in chunk:
+        ...         pass
+        """
+        if count < 0:
+            raise ValueError("count must not be negative")
+        if start < 0 or start + count > 0x80000000:
+            raise ValueError(
+                "Invalid child numbers. Must be between 0 and %s" %
+                0x80000000)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        key = self._serialize_bytes(private=False)
+        tasks = [
+            (self._node_class, key, self.network, chunk_start,
+             min(chunk_size, start + count - chunk_start), public_keys)
+            for chunk_start in six.moves.range(
+                start, start + count, chunk_size)]
+
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield _derive_addresses(task)
+            return
+        pool = multiprocessing.Pool(min(workers, len(tasks)))
+        try:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(_derive_addresses, (task,)))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
 
     def public_copy(self):
         """Clone this wallet and strip it of its private information."""
-        return self.__class__(
-            chain_code=self.chain_code,
+        return self._node_class(
+            chain_code=self._chain_code,
             depth=self.depth,
-            parent_fingerprint=self.parent_fingerprint,
+            parent_fingerprint=self._get_parent_fingerprint_bytes(),
             child_number=self.child_number,
             public_pair=self.public_key.to_public_pair(),
             network=self.network)
@@ -402,23 +998,19 @@ class Wallet(object):
                 "Cannot crack private keys from private derivation")
 
         # Duplicate the public child derivation
-        child_number_hex = long_to_hex(child_private_key.child_number, 8)
-        data = self.get_public_key_hex() + child_number_hex
-        I = hmac.new(
-            unhexlify(ensure_bytes(self.chain_code)),
-            msg=unhexlify(ensure_bytes(data)),
-            digestmod=sha512).digest()
-        I_L, I_R = I[:32], I[32:]
+        data = (self.public_key.get_key_bytes(compressed=True) +
+                long_to_bytes(child_private_key.child_number, 4))
+        I = hmac_sha512(self._chain_code, data)
+        I_L = I[:32]
         # Public derivation is the same as private derivation plus some offset
         # knowing the child's private key allows us to find this offset just
         # by subtracting the child's private key from the parent I_L data
-        privkey = PrivateKey(long_or_int(hexlify(I_L), 16),
-                             network=self.network)
+        privkey = PrivateKey(bytes_to_long(I_L), network=self.network)
         parent_private_key = child_private_key.private_key - privkey
-        return self.__class__(
-            chain_code=self.chain_code,
+        return self._node_class(
+            chain_code=self._chain_code,
             depth=self.depth,
-            parent_fingerprint=self.parent_fingerprint,
+            parent_fingerprint=self._get_parent_fingerprint_bytes(),
             child_number=self.child_number,
             private_key=parent_private_key,
             network=self.network)
@@ -430,11 +1022,11 @@ class Wallet(object):
         description.
         """
         # Add the network byte, creating the "extended key"
-        extended_key_hex = self.private_key.get_extended_key()
         # BIP32 wallets have a trailing \01 byte
-        extended_key_bytes = unhexlify(ensure_bytes(extended_key_hex)) + b'\01'
+        extended_key_bytes = (
+            self.private_key._get_extended_key_bytes() + b'\01')
         # And return the base58-encoded result with a checksum
-        return base58.b58encode_check(extended_key_bytes)
+        return b58encode_check(extended_key_bytes)
 
     def serialize(self, private=True):
         """Serialize this key.
@@ -449,33 +1041,37 @@ class Wallet(object):
 
         See the spec in `deserialize` for more details.
         """
+        return hexlify(self._serialize_bytes(private))
+
+    def _serialize_bytes(self, private=True):
+        """Serialize this key to its raw 78 bytes."""
         if private and not self.private_key:
             raise ValueError("Cannot serialize a public key as private")
 
         if private:
-            network_version = long_to_hex(
-                self.network.EXT_SECRET_KEY, 8)
+            network_version = self.network.EXT_SECRET_KEY
         else:
-            network_version = long_to_hex(
-                self.network.EXT_PUBLIC_KEY, 8)
-        depth = long_to_hex(self.depth, 2)
-        parent_fingerprint = self.parent_fingerprint[2:]  # strip leading 0x
-        child_number = long_to_hex(self.child_number, 8)
-        chain_code = self.chain_code
-        ret = (network_version + depth + parent_fingerprint + child_number +
-               chain_code)
+            network_version = self.network.EXT_PUBLIC_KEY
+        ret = (long_to_bytes(network_version, 4) +
+               chr_py2(self.depth) +
+               self._get_parent_fingerprint_bytes() +
+               long_to_bytes(self.child_number, 4) +
+               self._chain_code)
         # Private and public serializations are slightly different
         if private:
-            ret += b'00' + self.private_key.get_key()
+            ret += b'\0' + self.private_key.get_key_bytes()
         else:
-            ret += self.get_public_key_hex(compressed=True)
-        return ensure_bytes(ret.lower())
+            ret += self.public_key.get_key_bytes(compressed=True)
+        return ret
 
     def serialize_b58(self, private=True):
         """Encode the serialized node in base58."""
+        if hooks._hooks:
+            with hooks.traced("serialize_b58"):
+                return ensure_str(
+                    b58encode_check(self._serialize_bytes(private)))
         return ensure_str(
-            base58.b58encode_check(
-                unhexlify(ensure_bytes(self.serialize(private)))))
+            b58encode_check(self._serialize_bytes(private)))
 
     def to_address(self):
         """Create a public address from this Wallet.
@@ -484,19 +1080,61 @@ class Wallet(object):
 
         https://en.bitcoin.it/wiki/Technical_background_of_Bitcoin_addresses
         """
-        key = unhexlify(ensure_bytes(self.get_public_key_hex()))
         # First get the hash160 of the key
-        hash160_bytes = hash160(key)
+        hash160_bytes = self._get_identifier_bytes()
         # Prepend the network address byte
         network_hash160_bytes = \
             chr_py2(self.network.PUBKEY_ADDRESS) + hash160_bytes
         # Return a base58 encoded address with a checksum
-        return ensure_str(base58.b58encode_check(network_hash160_bytes))
+        return ensure_str(b58encode_check(network_hash160_bytes))
+
+    def to_segwit_address(self):
+        """Create a native segwit (P2WPKH) address from this Wallet.
+
+        This is the bech32 encoding of the same hash160 as `to_address`, for
+        networks with a BECH32_HRP.
+
+        https://github.com/bitcoin/bips/blob/master/bip-0173.mediawiki
+        """
+        hrp = getattr(self.network, "BECH32_HRP", None)
+        if hrp is None:
+            raise ValueError(
+                "%s has no segwit addresses" % self.network.NAME)
+        return encode_segwit_address(hrp, 0, self._get_identifier_bytes())
+
+    def addresses(self, formats=(P2PKH,), networks=None):
+        """Get this node's addresses in several formats and networks at once.
+
+        The public key is serialized and hashed once for all of them.
+
+        :param formats: Which of the bitmerchant.wallet.address
+            ADDRESS_FORMATS to encode: "p2pkh" (as in `to_address`),
+            "p2sh-p2wpkh" or "p2wpkh".
+        :param networks: The networks to encode for. Defaults to this
+            wallet's network.
+        :type networks: A sequence of the classes in bitmerchant.network
+
+        Returns a dict mapping (network, format) tuples to addresses. The
+        address is None if the network doesn't support the format.
+
+        >>> w = Wallet.new_random_wallet()
+        >>> addresses = w.addresses(formats=["p2pkh", "p2wpkh"])
+        >>> assert addresses[(w.network, "p2pkh")] == w.to_address()
+        """
+        if networks is None:
+            networks = [self.network]
+        return addresses_for_key_hashes(
+            [self._get_identifier_bytes()], formats, networks)[0]
 
     @classmethod
     def deserialize(cls, key, network=BitcoinMainNet):
         """Load the ExtendedBip32Key from a hex key.
 
+        If `deserialize_cache` is set, the Wallet for each key and network
+        is only loaded once, and every later call with the same key returns
+        that same, frozen Wallet. Its attributes can't be set, though its
+        children and `public_copy` are ordinary Wallets.
+
         The key consists of
 
             * 4 byte version bytes (network key)
@@ -513,7 +1151,76 @@ class Wallet(object):
               (Note that this also supports 0x04 + X + Y uncompressed points,
               but this is totally non-standard and this library won't even
               generate such data.)
+
+        The raw 78 bytes may also be given as a bytearray or a memoryview,
+        like a record of a bitmerchant.wallet.nodefile.NodeFile. These are
+        never cached.
+
+        A compressed public key is only checked to be on the curve when its
+        point is first needed, which is the expensive part of deserializing.
+        Until then, methods that only need the compressed encoding, like
+        `fingerprint`, `to_address` and `serialize_b58`, succeed even for an
+        invalid key, while deriving a child, or anything else that needs the
+        point, raises a KeyParseError. To validate a key from an untrusted
+        source up front, call `wallet.public_key.to_public_pair()`.
         """
+        cls = cls._unfrozen_class or cls
+        if hooks._hooks:
+            with hooks.traced("deserialize") as operation:
+                return cls._deserialize_measured(key, network, operation)
+        if cls.metrics is None:
+            return cls._deserialize_cached(key, network)
+        return cls._deserialize_measured(key, network)
+
+    @classmethod
+    def _deserialize_measured(cls, key, network, operation=None):
+        """Deserialize, recording the call in the `metrics`, if they're on.
+        """
+        metrics = cls.metrics
+        if metrics is None:
+            return cls._deserialize_cached(key, network, operation)
+        start = default_timer()
+        wallet = cls._deserialize_cached(key, network, operation)
+        metrics.deserialized(default_timer() - start)
+        return wallet
+
+    @classmethod
+    def _deserialize_cached(cls, key, network, operation=None):
+        """Deserialize through the `deserialize_cache`, if it's set.
+
+        If given, the cache_hit of the hooks Operation is set.
+        """
+        cache = cls.deserialize_cache
+        if cache is None or not isinstance(
+                key, (six.binary_type, six.text_type)):
+            return cls._deserialize(key, network)
+        cache_key = (cls, key, network)
+        wallet = cache.get(cache_key)
+        if operation is not None:
+            operation.cache_hit = wallet is not None
+        if wallet is None:
+            wallet = cls._deserialize(key, network)
+            wallet.__class__ = _frozen_class(cls)
+            cache.set(cache_key, wallet)
+        return wallet
+
+    @classmethod
+    def invalidate_deserialized(cls, key, network=BitcoinMainNet):
+        """Remove the Wallet for a key from the `deserialize_cache`.
+
+        Returns True if it was cached.
+        """
+        cls = cls._unfrozen_class or cls
+        if cls.deserialize_cache is None:
+            return False
+        return cls.deserialize_cache.discard((cls, key, network))
+
+    @classmethod
+    def _deserialize(cls, key, network):
+        if isinstance(key, memoryview):
+            key = key.tobytes()
+        elif isinstance(key, bytearray):
+            key = bytes(key)
         if len(key) in [78, (78 + 32)]:
             # we have a byte array, so pass
             pass
@@ -524,13 +1231,13 @@ class Wallet(object):
                 key = unhexlify(key)
             elif len(key) == 111:
                 # We have a base58 encoded string
-                key = base58.b58decode_check(key)
+                key = b58decode_check(key)
         # Now that we double checkd the values, convert back to bytes because
         # they're easier to slice
         version, depth, parent_fingerprint, child, chain_code, key_data = (
             key[:4], key[4], key[5:9], key[9:13], key[13:45], key[45:])
 
-        version_long = long_or_int(hexlify(version), 16)
+        version_long = bytes_to_long(version)
         exponent = None
         pubkey = None
         point_type = key_data[0]
@@ -556,18 +1263,16 @@ class Wallet(object):
         else:
             raise ValueError("Invalid key_data prefix, got %s" % point_type)
 
-        def l(byte_seq):
-            if byte_seq is None:
-                return byte_seq
-            elif isinstance(byte_seq, six.integer_types):
-                return byte_seq
-            return long_or_int(hexlify(byte_seq), 16)
-
-        return cls(depth=l(depth),
-                   parent_fingerprint=l(parent_fingerprint),
-                   child_number=l(child),
-                   chain_code=l(chain_code),
-                   private_exponent=l(exponent),
+        if exponent is not None:
+            exponent = bytes_to_long(exponent)
+        if not isinstance(depth, six.integer_types):
+            depth = ord(depth)
+
+        return cls(depth=depth,
+                   parent_fingerprint=parent_fingerprint,
+                   child_number=bytes_to_long(child),
+                   chain_code=chain_code,
+                   private_exponent=exponent,
                    public_key=pubkey,
                    network=network)
 
@@ -585,12 +1290,12 @@ class Wallet(object):
         seed = ensure_bytes(seed)
         # Given a seed S of at least 128 bits, but 256 is advised
         # Calculate I = HMAC-SHA512(key="Bitcoin seed", msg=S)
-        I = hmac.new(b"Bitcoin seed", msg=seed, digestmod=sha512).digest()
+        I = hmac_sha512(b"Bitcoin seed", seed)
         # Split I into two 32-byte sequences, IL and IR.
         I_L, I_R = I[:32], I[32:]
         # Use IL as master secret key, and IR as master chain code.
-        return cls(private_exponent=long_or_int(hexlify(I_L), 16),
-                   chain_code=long_or_int(hexlify(I_R), 16),
+        return cls(private_exponent=bytes_to_long(I_L),
+                   chain_code=I_R,
                    network=network)
 
     @classmethod
@@ -611,16 +1316,18 @@ class Wallet(object):
 
     def __eq__(self, other):
         attrs = [
-            'chain_code',
+            '_chain_code',
             'depth',
-            'parent_fingerprint',
             'child_number',
             'private_key',
-            'public_key',
             'network',
         ]
-        return other and all(
-            getattr(self, attr) == getattr(other, attr) for attr in attrs)
+        return bool(other and all(
+            getattr(self, attr) == getattr(other, attr) for attr in attrs) and
+            (self._get_parent_fingerprint_bytes() ==
+             other._get_parent_fingerprint_bytes()) and
+            # Equal private keys imply equal public keys
+            (self.private_key or self.public_key == other.public_key))
 
     def __ne__(self, other):
         return not self == other
@@ -673,5 +1380,63 @@ class KeyMismatchError(ValueError):
     pass
 
 
+class FrozenWalletError(AttributeError):
+    pass
+
+
 class InfinityPointException(Exception):
     pass
+
+
+class GenerationCancelledError(Exception):
+    """Raised when `Wallet.generate_addresses` is cancelled.
+
+    The addresses generated before it was cancelled, in order, are in
+    `addresses`.
+    """
+    def __init__(self, addresses):
+        super(GenerationCancelledError, self).__init__(
+            "Cancelled after %s addresses" % len(addresses))
+        self.addresses = addresses
+
+
+def _derive_addresses(task):
+    """Derive one chunk of `Wallet.iter_address_chunks` in a worker."""
+    cls, key, network, start, count, public_keys = task
+    wallet = cls.deserialize(key, network=network)
+    return list(wallet.iter_addresses(
+        start, start + count, chunk=count, public_keys=public_keys))
+
+
+def _compressed_key_bytes(point):
+    """Get the SEC1 compressed form of an affine point."""
+    x, y = point
+    return chr_py2(2 + (y & 1)) + long_to_bytes(x, 32)
+
+
+_FROZEN_CLASSES = {}
+
+
+def _frozen_setattr(self, name, value):
+    if not name.startswith("_"):
+        raise FrozenWalletError("Cannot set %s of a frozen Wallet" % name)
+    object.__setattr__(self, name, value)
+
+
+def _frozen_class(cls):
+    """Get the frozen version of a Wallet class.
+
+    Frozen Wallets don't allow setting their public attributes. The lazily
+    computed private ones, like the public key of a private node, can still
+    be filled in. Freezing is done by changing an existing Wallet's class,
+    so unfrozen Wallets don't pay for checking every attribute they set.
+    """
+    frozen = _FROZEN_CLASSES.get(cls)
+    if frozen is None:
+        frozen = type(cls.__name__, (cls,), {
+            "__setattr__": _frozen_setattr,
+            "__module__": cls.__module__,
+            "_unfrozen_class": cls,
+        })
+        frozen = _FROZEN_CLASSES.setdefault(cls, frozen)
+    return frozen
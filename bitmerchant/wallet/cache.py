@@ -0,0 +1,250 @@
+from collections import namedtuple
+import threading
+import time
+
+from cachetools import LRUCache
+from cachetools import TTLCache
+
+
+class CacheStats(namedtuple(
+        "CacheStats", ["hits", "misses", "evictions", "size", "maxsize"])):
+    """A snapshot of a cache's counters."""
+    __slots__ = ()
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups that were hits, or 0.0 if there were none.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
+
+
+class _CountingLRUCache(LRUCache):
+    """An LRUCache that reports every eviction."""
+    def __init__(self, maxsize, on_evict):
+        super(_CountingLRUCache, self).__init__(maxsize)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super(_CountingLRUCache, self).popitem()
+        self._on_evict(1)
+        return item
+
+
+class _CountingTTLCache(TTLCache):
+    """A TTLCache that reports every eviction, including expirations."""
+    def __init__(self, maxsize, ttl, timer, on_evict):
+        super(_CountingTTLCache, self).__init__(maxsize, ttl, timer=timer)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super(_CountingTTLCache, self).popitem()
+        self._on_evict(1)
+        return item
+
+    def expire(self, *args, **kwargs):
+        expired = super(_CountingTTLCache, self).expire(*args, **kwargs)
+        # Older versions of cachetools don't return the expired items
+        if expired:
+            self._on_evict(len(expired))
+        return expired
+
+
+class DerivationCache(object):
+    """A thread-safe cache of derived BIP32 child keys.
+
+    Entries are keyed by the content of the derivation, that is, the
+    parent's chain code, the parent's key, the child number and whether the
+    child is prime, rather than by the parent Wallet object. Two Wallets
+    loaded from the same serialized key share entries, the cache never keeps
+    a parent Wallet alive, and prime and non-prime children of the same
+    number can never be confused for each other (see BUG_NOTICE.rst).
+
+    :param maxsize: The maximum number of entries to keep. When the cache
+        is full, the least recently used entry is evicted.
+    :type maxsize: int
+    :param ttl: If given, entries expire this many seconds after they were
+        stored.
+    :type ttl: float
+    :param timer: The clock used for ttl, defaults to time.time.
+    :type timer: callable
+
+    Any object with the same `get` and `set` methods can be used as a
+    Wallet's derivation cache; see `Wallet.derivation_cache`.
+    """
+    def __init__(self, maxsize=1024, ttl=None, timer=time.time):
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if ttl is None:
+            self._cache = _CountingLRUCache(maxsize, self._evicted)
+        else:
+            self._cache = _CountingTTLCache(
+                maxsize, ttl, timer, self._evicted)
+
+    def _evicted(self, count):
+        # Always called with self._lock held
+        self.evictions += count
+
+    def get(self, key):
+        """Get the cached value for key, or None if there isn't one."""
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value for key."""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def discard(self, key):
+        """Remove the entry for key, if there is one.
+
+        Returns True if there was an entry. This doesn't count as an
+        eviction.
+        """
+        with self._lock:
+            return self._cache.pop(key, None) is not None
+
+    def clear(self):
+        """Remove every entry. This does not reset the stats."""
+        with self._lock:
+            self._cache.clear()
+
+    def reset_stats(self):
+        """Reset the hit, miss and eviction counters to zero."""
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Get a snapshot of the cache's counters, as a CacheStats."""
+        with self._lock:
+            return CacheStats(hits=self.hits, misses=self.misses,
+                              evictions=self.evictions,
+                              size=len(self._cache), maxsize=self.maxsize)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+
+class DeserializeCache(DerivationCache):
+    """A thread-safe cache of deserialized Wallets.
+
+    Entries are keyed by the Wallet class, the serialized key, exactly as it
+    was passed to `Wallet.deserialize`, and the network. The cached Wallets
+    are frozen, so one can safely be shared by every caller, like the
+    request handlers of a web app.
+
+    This takes the same parameters as DerivationCache. Caching is opt-in;
+    see `Wallet.deserialize_cache`.
+    """
+    def __init__(self, maxsize=128, ttl=None, timer=time.time):
+        super(DeserializeCache, self).__init__(
+            maxsize=maxsize, ttl=ttl, timer=timer)
+
+
+class PathCache(object):
+    """A thread-safe cache of the intermediate nodes of derivation paths.
+
+    Paths that share a prefix, like m/44'/0'/0'/0/17 and m/44'/0'/0'/0/18,
+    share their intermediate nodes, so resolving many leaves under one
+    account only derives the account once. Conceptually this is a trie of
+    nodes; it is stored flat, keyed by (root, prefix), where root identifies
+    the content of the Wallet the path was resolved from and prefix is a
+    tuple of path components.
+
+    :param maxsize: The maximum number of intermediate nodes to keep. When
+        the cache is full, the least recently used node is evicted.
+    :type maxsize: int
+
+    Nodes added with `pin` don't count toward maxsize and are never
+    evicted. See `Wallet.get_child_for_path` and `Wallet.path_cache`.
+    """
+    def __init__(self, maxsize=1024):
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+        self._pinned = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = _CountingLRUCache(maxsize, self._evicted)
+
+    def _evicted(self, count):
+        # Always called with self._lock held
+        self.evictions += count
+
+    def longest_prefix(self, root, prefix):
+        """Find the cached node for the longest prefix of prefix.
+
+        Returns a (length, node) tuple, or (0, None) if no prefix is cached.
+        """
+        with self._lock:
+            for length in range(len(prefix), 0, -1):
+                key = (root, prefix[:length])
+                node = self._pinned.get(key)
+                if node is None:
+                    node = self._cache.get(key)
+                if node is not None:
+                    self.hits += 1
+                    return length, node
+            self.misses += 1
+            return 0, None
+
+    def set(self, root, prefix, node):
+        """Store the node for prefix."""
+        if not self.maxsize:
+            return
+        with self._lock:
+            if (root, prefix) not in self._pinned:
+                self._cache[(root, prefix)] = node
+
+    def pin(self, root, prefix, node):
+        """Store the node for prefix so that it is never evicted."""
+        with self._lock:
+            self._cache.pop((root, prefix), None)
+            self._pinned[(root, prefix)] = node
+
+    def unpin(self, root, prefix):
+        """Stop pinning the node for prefix, and remove it."""
+        with self._lock:
+            self._pinned.pop((root, prefix), None)
+
+    def clear(self):
+        """Remove every node, including pinned ones. The stats are kept."""
+        with self._lock:
+            self._cache.clear()
+            self._pinned.clear()
+
+    def reset_stats(self):
+        """Reset the hit, miss and eviction counters to zero."""
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Get a snapshot of the cache's counters, as a CacheStats.
+
+        size includes pinned nodes.
+        """
+        with self._lock:
+            return CacheStats(hits=self.hits, misses=self.misses,
+                              evictions=self.evictions,
+                              size=len(self._cache) + len(self._pinned),
+                              maxsize=self.maxsize)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache) + len(self._pinned)
@@ -0,0 +1,172 @@
+"""Discovery of the used addresses of BIP44 accounts.
+
+A BIP44 wallet has accounts at m/44'/coin_type'/account', each with a
+receive chain (0) and a change chain (1) of non-prime children. To restore
+a wallet, each chain is scanned until `gap_limit` consecutive addresses in
+a row are unused, and accounts are scanned until one has no used addresses
+at all. See the account discovery section of
+https://github.com/bitcoin/bips/blob/master/bip-0044.mediawiki
+
+Whether an address is used is decided by an oracle, which is either a
+callable that takes an address and returns a bool, or a container of used
+addresses, like a set. `load_used_addresses` builds such a set from a file.
+
+    >>> master = Wallet.from_master_secret(b"my secret seed")
+    >>> used = set([
+    ...     master.get_child_for_path("m/44'/0'/0'/0/1").to_address(),
+    ...     master.get_child_for_path("m/44'/0'/0'/1/0").to_address()])
+    >>> discover_accounts(master, used)
+    {0: {0: [1], 1: [0]}}
+"""
+import threading
+
+import six
+
+from ..network import BitcoinMainNet
+from .bip32 import Wallet
+
+
+GAP_LIMIT = 20
+RECEIVE_CHAIN = 0
+CHANGE_CHAIN = 1
+
+
+def load_used_addresses(path):
+    """Load a set of used addresses from a file with one address per line.
+
+    Blank lines and lines starting with # are ignored.
+    """
+    used = set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                used.add(line)
+    return used
+
+
+def _as_wallet(key, network):
+    if isinstance(key, Wallet):
+        return key
+    return Wallet.deserialize(key, network=network)
+
+
+def _as_callable(oracle):
+    if callable(oracle):
+        return oracle
+    return oracle.__contains__
+
+
+def scan_chain(chain, is_used, gap_limit=GAP_LIMIT, window=None,
+               network=BitcoinMainNet):
+    """Find the used children of a chain, stopping at the gap limit.
+
+    :param chain: The chain node, like m/44'/0'/0'/0, as a Wallet or a
+        serialized key.
+    :param is_used: The oracle, a callable or a container of addresses
+    :param gap_limit: Stop after this many unused addresses in a row.
+    :type gap_limit: int
+    :param window: How many addresses to derive per batch. Defaults to
+        gap_limit.
+    :type window: int
+    :param network: The network of chain, if it is a serialized key.
+
+    Returns the sorted child numbers of the used addresses.
+    """
+    if gap_limit < 1:
+        raise ValueError("gap_limit must be positive")
+    window = window or gap_limit
+    if window < 1:
+        raise ValueError("window must be positive")
+    chain = _as_wallet(chain, network)
+    is_used = _as_callable(is_used)
+
+    used = []
+    start = 0
+    # Scanning ends at the gap_limit'th child after the last used one
+    end = gap_limit
+    while start < end:
+        stop = min(start + window, end, 0x80000000)
+        if stop <= start:
+            break
+        addresses = chain.derive_children(
+            start, stop - start, output="address")
+        for child_number, address in enumerate(addresses, start):
+            if is_used(address):
+                used.append(child_number)
+                end = child_number + 1 + gap_limit
+        start = stop
+    return used
+
+
+def discover_account(account, is_used, gap_limit=GAP_LIMIT, window=None,
+                     chains=(RECEIVE_CHAIN, CHANGE_CHAIN), concurrent=True,
+                     network=BitcoinMainNet):
+    """Scan the chains of an account.
+
+    :param account: The account node, like m/44'/0'/0', as a Wallet or a
+        serialized key. This can be an account's public key.
+    :param chains: The numbers of the chains to scan.
+    :param concurrent: If True, scan every chain in its own thread. This
+        helps when the oracle waits on I/O, like a block explorer.
+    :type concurrent: bool
+
+    See `scan_chain` for the other parameters. Returns a dict of the used
+    child numbers of each chain.
+    """
+    account = _as_wallet(account, network)
+
+    def scan(chain_number):
+        return scan_chain(account.get_child(chain_number, is_prime=False),
+                          is_used, gap_limit=gap_limit, window=window)
+
+    if not concurrent or len(chains) < 2:
+        return dict((chain, scan(chain)) for chain in chains)
+
+    results = {}
+    errors = []
+
+    def run(chain_number):
+        try:
+            results[chain_number] = scan(chain_number)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(chain,))
+               for chain in chains]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def discover_accounts(master, is_used, coin_type=0, gap_limit=GAP_LIMIT,
+                      window=None, concurrent=True, network=BitcoinMainNet):
+    """Discover every used BIP44 account of a master private key.
+
+    :param master: The master node, as a Wallet or a serialized key. The
+        account nodes are prime children, so this needs the private key.
+    :param coin_type: The BIP44 coin type, 0 for bitcoin, 1 for testnets.
+    :type coin_type: int
+
+    Accounts are scanned in order until one has no used addresses. See
+    `discover_account` for the other parameters. Returns a dict of the
+    results of `discover_account` for each used account.
+    """
+    master = _as_wallet(master, network)
+    if not master.private_key:
+        raise ValueError("Account discovery needs a private master key")
+    accounts = {}
+    for account_number in six.moves.range(0x80000000):
+        account = master.get_child_for_path(
+            "m/44'/%d'/%d'" % (coin_type, account_number))
+        chains = discover_account(
+            account, is_used, gap_limit=gap_limit, window=window,
+            concurrent=concurrent)
+        if not any(chains.values()):
+            break
+        accounts[account_number] = chains
+    return accounts
@@ -0,0 +1,247 @@
+"""A persistent reverse index from addresses to child numbers.
+
+When a payment arrives at an address generated with
+`Wallet.create_new_address_for_user`, the index tells you which child (and
+so which user) it belongs to, without deriving the whole range again:
+
+    >>> wallet = Wallet.from_master_secret(b"my secret seed")
+    >>> index = AddressIndex.build("addresses.idx", wallet, 0, 10 ** 6)
+    >>> index.lookup(wallet.get_child(12345).to_address())
+    12345
+    >>> index.extend(2 * 10 ** 6)  # Later, as more users sign up
+
+An index file is a fixed size header followed by 24 byte records, each the
+20 byte hash160 of a child's compressed public key and the 4 byte big-endian
+child number, sorted by hash160. Lookups binary search a memory map of the
+file, so they take O(log n) time and never read the whole file.
+"""
+from binascii import unhexlify
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+
+import six
+
+from ..network import BitcoinMainNet
+from .address import PUBKEY_ADDRESS
+from .address import validate_address
+from .bip32 import Wallet
+from .utils import bytes_to_long
+from .utils import hash160_many
+from .utils import long_to_bytes
+from .utils import replace_file
+
+
+MAGIC = b"BMAI"
+FORMAT_VERSION = 1
+# magic, format version, start, stop, then the node's 78 byte public
+# serialization
+_HEADER = struct.Struct(">4sBxxxII78s2x")
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = 24
+
+# How many records to read from a file at a time while merging
+_READ_RECORDS = 4096
+
+
+class AddressIndex(object):
+    """A sorted, memory-mapped index of (hash160, child number) records.
+
+    :param path: The path of an existing index file, see `build`.
+    :type path: str
+    :param network: The network of the indexed key, used to decode
+        addresses. It must match the version bytes of the key in the header,
+        or InvalidIndexFileError is raised.
+    :type network: One of the objects in bitmerchant.network
+
+    The index covers the non-prime children `start` up to, but not
+    including, `stop` of the node stored in its header.
+    """
+    def __init__(self, path, network=BitcoinMainNet):
+        self.path = path
+        self.network = network
+        self._file = None
+        self._mmap = None
+        self._open()
+
+    @classmethod
+    def build(cls, path, wallet, start=0, stop=0, run_size=100000):
+        """Create an index of the children start to stop of wallet.
+
+        :param path: Where to write the index. An existing file is replaced.
+        :type path: str
+        :param wallet: The node whose children are indexed. Only its public
+            key is stored.
+        :type wallet: Wallet
+        :param run_size: How many records to sort in memory at once.
+        :type run_size: int
+        """
+        if not 0 <= start <= stop <= 0x80000000:
+            raise ValueError("Invalid range of non-prime children")
+        key = unhexlify(wallet.serialize(private=False))
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, start, start, key))
+        index = cls(path, network=wallet.network)
+        index.extend(stop, run_size=run_size)
+        return index
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise InvalidIndexFileError("%s is too short" % self.path)
+        magic, version, self.start, self.stop, key = _HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise InvalidIndexFileError(
+                "%s is not an address index" % self.path)
+        if bytes_to_long(key[:4]) != self.network.EXT_PUBLIC_KEY:
+            raise InvalidIndexFileError(
+                "%s doesn't index a key of %s" % (
+                    self.path, self.network.NAME))
+        self.wallet = Wallet.deserialize(key, network=self.network)
+        size = os.fstat(self._file.fileno()).st_size
+        if (size - HEADER_SIZE) != (self.stop - self.start) * RECORD_SIZE:
+            raise InvalidIndexFileError(
+                "%s has the wrong number of records" % self.path)
+        self._mmap = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __contains__(self, address):
+        return self.lookup(address) is not None
+
+    def _to_hash160(self, address):
+        """Get the hash160 of an address, or pass a hash160 through."""
+        if isinstance(address, six.binary_type) and len(address) == 20:
+            return address
+        info = validate_address(address, networks=[self.network])
+        if info is None or info.address_type != PUBKEY_ADDRESS:
+            raise ValueError("%s is not a %s address" % (
+                address, self.network.NAME))
+        return info.hash160
+
+    def lookup(self, address):
+        """Find the child number of an address.
+
+        :param address: A base58check address, or the raw 20 byte hash160 of
+            a compressed public key.
+
+        Returns the child number, or None if the address isn't indexed.
+        """
+        target = self._to_hash160(address)
+        mm = self._mmap
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER_SIZE + mid * RECORD_SIZE
+            if mm[offset:offset + 20] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        offset = HEADER_SIZE + lo * RECORD_SIZE
+        if lo < len(self) and mm[offset:offset + 20] == target:
+            return bytes_to_long(mm[offset + 20:offset + RECORD_SIZE])
+        return None
+
+    def extend(self, stop, run_size=100000):
+        """Add the children from the current stop up to the new stop.
+
+        The new records are derived and sorted in runs of run_size, then
+        merged with the existing records into a new file that replaces the
+        old one, so memory use doesn't grow with the size of the index.
+        """
+        if stop > 0x80000000:
+            raise ValueError("Invalid range of non-prime children")
+        if stop <= self.stop:
+            return
+        if run_size < 1:
+            raise ValueError("run_size must be positive")
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        runs = []
+        new_path = None
+        try:
+            for run_start in six.moves.range(self.stop, stop, run_size):
+                run = tempfile.TemporaryFile(dir=directory)
+                runs.append(run)
+                run.write(b"".join(sorted(self._derive_records(
+                    run_start, min(run_start + run_size, stop)))))
+                run.seek(0)
+            fd, new_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(
+                    MAGIC, FORMAT_VERSION, self.start, stop,
+                    unhexlify(self.wallet.serialize(private=False))))
+                self._file.seek(HEADER_SIZE)
+                merged = heapq.merge(
+                    _iter_records(self._file),
+                    *[_iter_records(run) for run in runs])
+                for records in _grouper(merged, _READ_RECORDS):
+                    out.write(b"".join(records))
+            self.close()
+            replace_file(new_path, self.path)
+        except Exception:
+            if new_path is not None and os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+        finally:
+            for run in runs:
+                run.close()
+            if self._file is None:
+                self._open()
+
+    def _derive_records(self, start, stop):
+        """Generate the unsorted records for the children start to stop."""
+        chunk = 1000
+        for chunk_start in six.moves.range(start, stop, chunk):
+            count = min(chunk, stop - chunk_start)
+            public_keys = self.wallet.derive_children(
+                chunk_start, count, output="public_key")
+            key_hashes = hash160_many(
+                [unhexlify(public_key) for public_key in public_keys])
+            for i, key_hash in enumerate(key_hashes):
+                yield key_hash + long_to_bytes(chunk_start + i, 4)
+
+
+class InvalidIndexFileError(ValueError):
+    pass
+
+
+def _iter_records(f):
+    """Generate the records of a file, from its current position."""
+    while True:
+        data = f.read(RECORD_SIZE * _READ_RECORDS)
+        if not data:
+            return
+        for offset in six.moves.range(0, len(data), RECORD_SIZE):
+            yield data[offset:offset + RECORD_SIZE]
+
+
+def _grouper(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    group = []
+    for item in iterable:
+        group.append(item)
+        if len(group) == size:
+            yield group
+            group = []
+    if group:
+        yield group
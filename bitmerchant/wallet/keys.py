@@ -4,22 +4,24 @@ from binascii import unhexlify
 from collections import namedtuple
 from hashlib import sha256
 
-import base58
 from ecdsa import SigningKey
 from ecdsa import VerifyingKey
 from ecdsa import SECP256k1
 from ecdsa.ellipticcurve import Point as _ECDSA_Point
-from ecdsa.numbertheory import square_root_mod_prime
 import six
 
 from ..network import BitcoinMainNet
+from . import secp256k1
+from .b58 import b58decode_check
+from .b58 import b58encode_check
+from .utils import bytes_to_long
 from .utils import chr_py2
 from .utils import ensure_bytes
 from .utils import ensure_str
 from .utils import hash160
 from .utils import is_hex_string
 from .utils import long_or_int
-from .utils import long_to_hex
+from .utils import long_to_bytes
 
 
 PublicPair = namedtuple("PublicPair", ["x", "y"])
@@ -51,19 +53,41 @@ class PrivateKey(Key):
                  *args, **kwargs):
         if not isinstance(secret_exponent, six.integer_types):
             raise ValueError("secret_exponent must be a long")
+        if not 0 < secret_exponent < secp256k1.N:
+            raise ValueError("secret_exponent is out of range")
         super(PrivateKey, self).__init__(network=network, *args, **kwargs)
-        self._private_key = SigningKey.from_secret_exponent(
-            secret_exponent, curve=SECP256k1)
+        self._secret_exponent = secret_exponent
+        self._signing_key = None
+        self._public_pair = None
+
+    @property
+    def _private_key(self):
+        """The ECDSA SigningKey for this key, built on first use."""
+        if self._signing_key is None:
+            self._signing_key = SigningKey.from_secret_exponent(
+                self._secret_exponent, curve=SECP256k1)
+        return self._signing_key
+
+    @property
+    def secret_exponent(self):
+        """The private exponent, as a long."""
+        return self._secret_exponent
 
     def get_key(self):
         """Get the key - a hex formatted private exponent for the curve."""
-        return ensure_bytes(hexlify(self._private_key.to_string()))
+        return hexlify(self.get_key_bytes())
+
+    def get_key_bytes(self):
+        """Get the key - the 32 byte big-endian private exponent."""
+        return long_to_bytes(self._secret_exponent, 32)
 
     def get_public_key(self):
         """Get the PublicKey for this PrivateKey."""
-        return PublicKey.from_verifying_key(
-            self._private_key.get_verifying_key(),
-            network=self.network, compressed=self.compressed)
+        if self._public_pair is None:
+            self._public_pair = PublicPair(
+                *secp256k1.multiply_generator(self._secret_exponent))
+        return PublicKey(public_pair=self._public_pair,
+                         network=self.network, compressed=self.compressed)
 
     def get_extended_key(self):
         """Get the extended key.
@@ -71,9 +95,10 @@ class PrivateKey(Key):
         Extended keys contain the network bytes and the public or private
         key.
         """
-        network_hex_chars = hexlify(
-            chr_py2(self.network.SECRET_KEY))
-        return ensure_bytes(network_hex_chars + self.get_key())
+        return hexlify(self._get_extended_key_bytes())
+
+    def _get_extended_key_bytes(self):
+        return chr_py2(self.network.SECRET_KEY) + self.get_key_bytes()
 
     def export_to_wif(self, compressed=None):
         """Export a key to WIF.
@@ -87,14 +112,13 @@ class PrivateKey(Key):
         description.
         """
         # Add the network byte, creating the "extended key"
-        extended_key_hex = self.get_extended_key()
-        extended_key_bytes = unhexlify(ensure_bytes(extended_key_hex))
+        extended_key_bytes = self._get_extended_key_bytes()
         if compressed is None:
             compressed = self.compressed
         if compressed:
             extended_key_bytes += b'\01'
         # And return the base58-encoded result with a checksum
-        return ensure_str(base58.b58encode_check(extended_key_bytes))
+        return ensure_str(b58encode_check(extended_key_bytes))
 
     def _public_child(child_number):
         raise NotImplementedError()
@@ -114,7 +138,7 @@ class PrivateKey(Key):
         # Decode the base58 string and ensure the checksum is valid
         wif = ensure_str(wif)
         try:
-            extended_key_bytes = base58.b58decode_check(wif)
+            extended_key_bytes = b58decode_check(wif)
         except ValueError as e:
             # Invalid checksum!
             raise ChecksumException(e)
@@ -142,7 +166,7 @@ class PrivateKey(Key):
             compressed = True
 
         # And we should finally have a valid key
-        return cls(long_or_int(hexlify(extended_key_bytes), 16), network,
+        return cls(bytes_to_long(extended_key_bytes), network,
                    compressed=compressed)
 
     @classmethod
@@ -173,25 +197,22 @@ class PrivateKey(Key):
     __hash__ = Key.__hash__
 
     def __eq__(self, other):
+        # Equal secret exponents imply equal public keys
         return (super(PrivateKey, self).__eq__(other) and
-                self._private_key.curve == other._private_key.curve and
-                (self._private_key.to_string() ==
-                 other._private_key.to_string()) and
-                (self._private_key.privkey.secret_multiplier ==
-                 other._private_key.privkey.secret_multiplier) and
-                self.get_public_key() == other.get_public_key())
+                self._secret_exponent == other._secret_exponent)
 
     def __sub__(self, other):
         assert isinstance(other, self.__class__)
         assert self.network == other.network
-        k1 = self._private_key.privkey.secret_multiplier
-        k2 = other._private_key.privkey.secret_multiplier
-        result = (k1 - k2) % SECP256k1.order
+        k1 = self._secret_exponent
+        k2 = other._secret_exponent
+        result = (k1 - k2) % secp256k1.N
         return self.__class__(result, network=self.network)
 
 
 class PublicKey(Key):
-    def __init__(self, verifying_key, network=BitcoinMainNet, *args, **kwargs):
+    def __init__(self, verifying_key=None, network=BitcoinMainNet,
+                 *args, **kwargs):
         """Create a public key.
 
         :param verifying_key: The ECDSA VerifyingKey corresponding to this
@@ -200,11 +221,56 @@ class PublicKey(Key):
         :param network: The network you want (Networks just define certain
             constants, like byte-prefixes on public addresses).
         :type network: See `bitmerchant.wallet.network`
+        :param public_pair: The coordinates of the public point. This may be
+            given instead of verifying_key, in which case the VerifyingKey is
+            only built if something asks for it. The pair is trusted to be
+            on the curve; use `from_public_pair` for untrusted input.
+        :type public_pair: PublicPair
+        :param compressed_key: The 33 byte compressed encoding of the key.
+            This may be given instead of the others, in which case y is
+            only recovered when something asks for it. Use `from_hex_key`
+            for untrusted input.
+        :type compressed_key: bytes
         """
+        public_pair = kwargs.pop('public_pair', None)
+        compressed_key = kwargs.pop('compressed_key', None)
         super(PublicKey, self).__init__(network=network, *args, **kwargs)
-        self._verifying_key = verifying_key
-        self.x = verifying_key.pubkey.point.x()
-        self.y = verifying_key.pubkey.point.y()
+        if verifying_key is not None:
+            point = verifying_key.pubkey.point
+            public_pair = PublicPair(int(point.x()), int(point.y()))
+        elif public_pair is None and compressed_key is None:
+            raise ValueError(
+                "You must supply one of verifying_key, public_pair or "
+                "compressed_key")
+        self._ecdsa_key = verifying_key
+        self._compressed_key = compressed_key
+        if public_pair is not None:
+            self.x, self._y = public_pair
+        else:
+            self.x = bytes_to_long(compressed_key[1:])
+            self._y = None
+
+    @property
+    def y(self):
+        """The y coordinate, recovered from the compressed key on first use.
+
+        Raises a KeyParseError if the compressed key isn't on the curve.
+        """
+        if self._y is None:
+            y_odd = bool(bytearray(self._compressed_key[:1])[0] & 1)
+            try:
+                self._y = secp256k1.y_from_x(self.x, y_odd)
+            except ValueError as e:
+                raise KeyParseError(e)
+        return self._y
+
+    @property
+    def _verifying_key(self):
+        """The ECDSA VerifyingKey for this key, built on first use."""
+        if self._ecdsa_key is None:
+            self._ecdsa_key = VerifyingKey.from_public_point(
+                self.to_point(), curve=SECP256k1)
+        return self._ecdsa_key
 
     def get_key(self, compressed=None):
         """Get the hex-encoded key.
@@ -231,24 +297,34 @@ class PublicKey(Key):
         will do the right thing in all cases. The tests pass, and this does
         exactly what pycoin does, but I'm not positive pycoin works either!
         """
+        return hexlify(self.get_key_bytes(compressed))
+
+    def get_key_bytes(self, compressed=None):
+        """Get the key as raw bytes. See `get_key` for the format."""
         if compressed is None:
             compressed = self.compressed
         if compressed:
-            parity = 2 + (self.y & 1)  # 0x02 even, 0x03 odd
-            return ensure_bytes(
-                long_to_hex(parity, 2) +
-                long_to_hex(self.x, 64))
+            # The compressed key is hashed for fingerprints, addresses and
+            # public child derivation, so keep it around.
+            if self._compressed_key is None:
+                parity = 2 + (self.y & 1)  # 0x02 even, 0x03 odd
+                self._compressed_key = (
+                    chr_py2(parity) + long_to_bytes(self.x, 32))
+            return self._compressed_key
         else:
-            return ensure_bytes(
-                b'04' +
-                long_to_hex(self.x, 64) +
-                long_to_hex(self.y, 64))
+            return (b'\04' +
+                    long_to_bytes(self.x, 32) +
+                    long_to_bytes(self.y, 32))
 
     @classmethod
     def from_hex_key(cls, key, network=BitcoinMainNet):
         """Load the PublicKey from a compressed or uncompressed hex key.
 
         This format is defined in PublicKey.get_key()
+
+        An uncompressed key is checked to be on the curve right away. A
+        compressed key is only checked when its y coordinate is first
+        needed, so call `to_public_pair` to validate one up front.
         """
         if len(key) == 130 or len(key) == 66:
             # It might be a hexlified byte array
@@ -268,30 +344,21 @@ class PublicKey(Key):
             if len(key) != 65:
                 raise KeyParseError("Invalid key length")
             public_pair = PublicPair(
-                long_or_int(hexlify(key[1:33]), 16),
-                long_or_int(hexlify(key[33:]), 16))
+                bytes_to_long(key[1:33]), bytes_to_long(key[33:]))
         elif id_byte in [2, 3]:
             # Compressed public point!
             compressed = True
             if len(key) != 33:
                 raise KeyParseError("Invalid key length")
-            y_odd = bool(id_byte & 0x01)  # 0 even, 1 odd
-            x = long_or_int(hexlify(key[1:]), 16)
-            # The following x-to-pair algorithm was lifted from pycoin
-            # I still need to sit down an understand it. It is also described
-            # in http://www.secg.org/collateral/sec1_final.pdf
-            curve = SECP256k1.curve
-            p = curve.p()
-            # For SECP256k1, curve.a() is 0 and curve.b() is 7, so this is
-            # effectively (x ** 3 + 7) % p, but the full equation is kept
-            # for just-in-case-the-curve-is-broken future-proofing
-            alpha = (pow(x, 3, p) + curve.a() * x + curve.b()) % p
-            beta = square_root_mod_prime(alpha, p)
-            y_even = not y_odd
-            if y_even == bool(beta & 1):
-                public_pair = PublicPair(x, p - beta)
-            else:
-                public_pair = PublicPair(x, beta)
+            if bytes_to_long(key[1:]) >= secp256k1.P:
+                raise KeyParseError("x coordinate is out of range")
+            # Recovering y (section 2.3.4 of
+            # http://www.secg.org/collateral/sec1_final.pdf) costs a modular
+            # exponentiation, and many uses of a public key, like hashing it
+            # or serializing it, don't need it. So it's recovered lazily, and
+            # a key whose x isn't on the curve raises a KeyParseError then.
+            return cls(compressed_key=key, network=network,
+                       compressed=compressed)
         else:
             raise KeyParseError("The given key is not in a known format.")
         return cls.from_public_pair(public_pair, network=network,
@@ -311,7 +378,7 @@ class PublicKey(Key):
         return _ECDSA_Point(SECP256k1.curve, x, y)
 
     def to_point(self):
-        return self._verifying_key.pubkey.point
+        return _ECDSA_Point(SECP256k1.curve, self.x, self.y, SECP256k1.order)
 
     @classmethod
     def from_point(cls, point, network=BitcoinMainNet, **kwargs):
@@ -320,8 +387,8 @@ class PublicKey(Key):
         :param point: A point on the SECP256k1 curve.
         :type point: SECP256k1.point
         """
-        verifying_key = VerifyingKey.from_public_point(point, curve=SECP256k1)
-        return cls.from_verifying_key(verifying_key, network=network, **kwargs)
+        return cls.from_public_pair(
+            PublicPair(point.x(), point.y()), network=network, **kwargs)
 
     @classmethod
     def from_verifying_key(
@@ -339,27 +406,33 @@ class PublicKey(Key):
 
         https://en.bitcoin.it/wiki/Technical_background_of_Bitcoin_addresses
         """
-        key = unhexlify(ensure_bytes(self.get_key(compressed)))
+        key = self.get_key_bytes(compressed)
         # First get the hash160 of the key
         hash160_bytes = hash160(key)
         # Prepend the network address byte
         network_hash160_bytes = \
             chr_py2(self.network.PUBKEY_ADDRESS) + hash160_bytes
         # Return a base58 encoded address with a checksum
-        return ensure_str(base58.b58encode_check(network_hash160_bytes))
+        return ensure_str(b58encode_check(network_hash160_bytes))
 
     def to_public_pair(self):
         return PublicPair(self.x, self.y)
 
     @classmethod
     def from_public_pair(cls, pair, network=BitcoinMainNet, **kwargs):
-        point = _ECDSA_Point(SECP256k1.curve, pair.x, pair.y)
-        return cls.from_point(point, network=network, **kwargs)
+        x, y = pair
+        if (not isinstance(x, six.integer_types) or
+                not isinstance(y, six.integer_types) or
+                not secp256k1.is_on_curve(x, y)):
+            raise KeyParseError("The given point is not on the curve.")
+        return cls(public_pair=PublicPair(int(x), int(y)), network=network,
+                   **kwargs)
 
     def __eq__(self, other):
+        # Comparing the compressed keys doesn't need y, if it isn't known
         return (super(PublicKey, self).__eq__(other) and
-                self.x == other.x and
-                self.y == other.y)
+                self.get_key_bytes(compressed=True) ==
+                other.get_key_bytes(compressed=True))
 
     __hash__ = Key.__hash__
 
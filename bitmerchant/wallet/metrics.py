@@ -0,0 +1,263 @@
+"""Counters and latency histograms for dashboards.
+
+Metrics are off by default. To turn them on, give `Wallet` a Metrics:
+
+    >>> from bitmerchant.wallet import Wallet
+    >>> from bitmerchant.wallet.metrics import Metrics
+    >>> metrics = Wallet.metrics = Metrics()
+    >>> wallet = Wallet.from_master_secret(b"my secret seed")
+    >>> address = wallet.get_child(0).to_address()
+    >>> metrics.snapshot()["derivations"]
+    {'private': 1, 'private_prime': 0, 'public': 0}
+    >>> Wallet.metrics = None
+
+and serve `render_prometheus()` from a metrics endpoint, in the Prometheus
+text format. Only the standard library is needed. `Wallet.metrics` is a
+class attribute, so it counts the operations of every Wallet in the
+process, and setting it back to None turns metrics off again.
+
+A Metrics counts
+
+* derivations, by kind: "private", "private_prime" or "public". Children
+  served from `Wallet.derivation_cache` aren't derivations.
+* elliptic curve operations, by operation: "scalar_multiply" and
+  "point_add". These are the expensive part of public derivation and of
+  computing the public key of a private node.
+* deserialize calls, including ones served by `Wallet.deserialize_cache`.
+* the latency of derivations and deserialize calls, in histograms.
+
+and reads the hits, misses, evictions and size of Wallet's caches when a
+snapshot is taken, so the caches aren't slowed down. A batch derivation, as
+in `get_children`, is counted as that many derivations of its mean time.
+
+Metrics belong to one process. Under a pre-forking server like gunicorn,
+each worker has its own, so give each worker's output a distinguishing
+label, like `render_prometheus(labels={"worker": str(os.getpid())})`.
+"""
+from bisect import bisect_left
+import threading
+
+from .bip32 import Wallet
+
+
+KINDS = ("private", "private_prime", "public")
+SCALAR_MULTIPLY = "scalar_multiply"
+POINT_ADD = "point_add"
+EC_OPERATIONS = (SCALAR_MULTIPLY, POINT_ADD)
+# The upper bounds, in seconds, of the latency histograms' buckets. A
+# private derivation takes tens of microseconds, a public one hundreds.
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025)
+# Wallet's cache attributes, by the name they're reported under
+CACHES = (
+    ("derivation", "derivation_cache"),
+    ("path", "path_cache"),
+    ("deserialize", "deserialize_cache"),
+)
+
+
+class Histogram(object):
+    """Observations counted in buckets by their upper bounds.
+
+    :param buckets: The upper bounds of the buckets, in increasing order.
+        There is an implicit last bucket for everything larger.
+    :type buckets: A sequence of floats
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value, count=1):
+        """Add count observations of value."""
+        self.counts[bisect_left(self.buckets, value)] += count
+        self.count += count
+        self.sum += value * count
+
+    def cumulative_counts(self):
+        """Get (upper bound, count of observations <= it) for each bucket.
+
+        The last upper bound is float("inf").
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Metrics(object):
+    """The counters and histograms of one process.
+
+    :param buckets: The upper bounds, in seconds, of the latency buckets.
+    :type buckets: A sequence of floats
+    :param wallet_class: The class whose caches are reported.
+    :type wallet_class: Wallet or a subclass
+
+    Every method may be called from any thread.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, wallet_class=Wallet):
+        self.buckets = tuple(sorted(buckets))
+        self.wallet_class = wallet_class
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter and histogram."""
+        with self._lock:
+            self._derivations = dict((kind, 0) for kind in KINDS)
+            self._ec_operations = dict((op, 0) for op in EC_OPERATIONS)
+            self._deserialize_calls = 0
+            self._latency = {}
+
+    def _observe(self, operation, seconds, count=1):
+        histogram = self._latency.get(operation)
+        if histogram is None:
+            histogram = self._latency[operation] = Histogram(self.buckets)
+        histogram.observe(seconds, count)
+
+    def derived(self, kind, seconds, count=1):
+        """Record count derivations of a kind, which took seconds in all.
+
+        A public derivation is also a scalar multiplication and a point
+        addition each.
+        """
+        with self._lock:
+            self._derivations[kind] += count
+            if kind == "public":
+                self._ec_operations[SCALAR_MULTIPLY] += count
+                self._ec_operations[POINT_ADD] += count
+            self._observe("derive_" + kind, seconds / count, count)
+
+    def ec_operation(self, operation, count=1):
+        """Record count elliptic curve operations done outside derivation.
+        """
+        with self._lock:
+            self._ec_operations[operation] += count
+
+    def deserialized(self, seconds):
+        """Record a deserialize call, which took seconds."""
+        with self._lock:
+            self._deserialize_calls += 1
+            self._observe("deserialize", seconds)
+
+    def _cache_stats(self):
+        stats = {}
+        for name, attribute in CACHES:
+            cache = getattr(self.wallet_class, attribute, None)
+            if hasattr(cache, "stats"):
+                stats[name] = cache.stats()
+        return stats
+
+    def snapshot(self):
+        """Get every metric as a dict of plain values.
+
+        The dict has "derivations" and "ec_operations", mapping kinds and
+        operations to counts, "deserialize_calls", "caches", mapping the
+        names of the enabled caches to dicts of their CacheStats fields, and
+        "latency", mapping operations to dicts with the histogram's
+        cumulative "buckets" as (upper bound, count) pairs, "count" and
+        "sum".
+        """
+        with self._lock:
+            snapshot = {
+                "derivations": dict(self._derivations),
+                "ec_operations": dict(self._ec_operations),
+                "deserialize_calls": self._deserialize_calls,
+                "latency": dict(
+                    (operation, {
+                        "buckets": histogram.cumulative_counts(),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                    }) for operation, histogram in self._latency.items()),
+            }
+        snapshot["caches"] = dict(
+            (name, dict(stats._asdict()))
+            for name, stats in self._cache_stats().items())
+        return snapshot
+
+    def render_prometheus(self, labels=None):
+        """Render every metric in the Prometheus text exposition format.
+
+        :param labels: Labels to add to every sample, like the worker.
+        :type labels: A dict of str to str
+        """
+        snapshot = self.snapshot()
+        base = sorted((labels or {}).items())
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s %s" % (name, metric_type))
+
+        def sample(name, value, extra=()):
+            lines.append("%s%s %s" % (name, _format_labels(list(extra) + base),
+                                      _format_value(value)))
+
+        family("bitmerchant_derivations_total", "counter",
+               "Child key derivations, by kind.")
+        for kind in KINDS:
+            sample("bitmerchant_derivations_total",
+                   snapshot["derivations"][kind], [("kind", kind)])
+
+        family("bitmerchant_ec_operations_total", "counter",
+               "Elliptic curve operations, by operation.")
+        for operation in EC_OPERATIONS:
+            sample("bitmerchant_ec_operations_total",
+                   snapshot["ec_operations"][operation],
+                   [("operation", operation)])
+
+        family("bitmerchant_deserialize_total", "counter",
+               "Calls to Wallet.deserialize.")
+        sample("bitmerchant_deserialize_total",
+               snapshot["deserialize_calls"])
+
+        caches = sorted(snapshot["caches"].items())
+        for field, metric_type, help_text in [
+                ("hits", "counter", "Cache hits."),
+                ("misses", "counter", "Cache misses."),
+                ("evictions", "counter", "Cache evictions."),
+                ("size", "gauge", "Entries in the cache."),
+                ("maxsize", "gauge", "The cache's capacity.")]:
+            if not caches:
+                break
+            name = "bitmerchant_cache_%s%s" % (
+                field, "_total" if metric_type == "counter" else "")
+            family(name, metric_type, help_text)
+            for cache, stats in caches:
+                sample(name, stats[field], [("cache", cache)])
+
+        name = "bitmerchant_operation_duration_seconds"
+        family(name, "histogram",
+               "Latency of derivations and deserialize calls.")
+        for operation, histogram in sorted(snapshot["latency"].items()):
+            extra = [("operation", operation)]
+            for bound, count in histogram["buckets"]:
+                sample(name + "_bucket", count,
+                       extra + [("le", _format_value(bound))])
+            sample(name + "_sum", histogram["sum"], extra)
+            sample(name + "_count", histogram["count"], extra)
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, _escape(value)) for name, value in labels)
+
+
+def _escape(value):
+    return (str(value).replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float):
+        return repr(value)
+    # str, not repr, so python 2 longs don't get an L
+    return str(value)
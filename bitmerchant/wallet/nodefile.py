@@ -0,0 +1,192 @@
+"""Compact binary files of wallet nodes.
+
+Storing nodes as `serialize_b58` strings means every load pays for base58
+decoding, a checksum and hex round trips. A node file stores them in their
+raw form instead, and is memory mapped, so opening even a file of millions
+of nodes doesn't read it:
+
+    >>> wallet = Wallet.from_master_secret(b"my secret seed")
+    >>> NodeFile.write("nodes.bin", wallet.derive_children(0, 10 ** 6),
+    ...                private=False)
+    >>> with NodeFile("nodes.bin") as nodes:
+    ...     address = nodes[123456].to_address()
+
+A node file is a fixed size header followed by fixed width records. Each
+record is a node's raw 78 byte BIP32 serialization (the bytes of
+`Wallet.serialize`), optionally followed by a 4 byte big-endian index for
+the caller's own use, like a user id. A node's Wallet is only created when
+it is accessed, and `raw` gives its serialization as a slice of a
+memoryview of the map, without copying it.
+"""
+import mmap
+import os
+import struct
+import tempfile
+
+import six
+
+from ..network import BitcoinMainNet
+from .bip32 import Wallet
+from .utils import bytes_to_long
+from .utils import long_to_bytes
+from .utils import replace_file
+
+
+MAGIC = b"BMNF"
+FORMAT_VERSION = 1
+# magic, format version, flags
+_HEADER = struct.Struct(">4sBB2x")
+HEADER_SIZE = _HEADER.size
+NODE_SIZE = 78
+INDEX_SIZE = 4
+# Set in the header's flags if every record has an index
+FLAG_INDEXES = 0x01
+
+
+class NodeFile(object):
+    """A memory-mapped file of wallet nodes.
+
+    :param path: The path of an existing node file, see `write`.
+    :type path: str
+    :param network: The network of the stored nodes.
+    :type network: One of the objects in bitmerchant.network
+
+    Nodes are accessed by their position in the file, like a list, and the
+    Wallets are created on demand. The memoryviews returned by `raw` must be
+    released, or dropped, before the file is closed.
+    """
+    def __init__(self, path, network=BitcoinMainNet):
+        self.path = path
+        self.network = network
+        self._file = open(path, "rb")
+        self._mmap = None
+        self._view = None
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def write(cls, path, wallets, private=False, indexes=None):
+        """Write wallet nodes to a new node file.
+
+        :param path: Where to write the file. An existing file is replaced,
+            once the new one is complete.
+        :type path: str
+        :param wallets: The nodes to store, which should all belong to the
+            same network.
+        :type wallets: An iterable of Wallets
+        :param private: If True, store the private keys, which every node
+            must have.
+        :type private: bool
+        :param indexes: An index to store with each node, or None.
+        :type indexes: An iterable of ints, one per wallet, each less than
+            2 ** 32
+
+        Returns the NodeFile, opened for reading.
+        """
+        flags = FLAG_INDEXES if indexes is not None else 0
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, new_path = tempfile.mkstemp(dir=directory)
+        network = BitcoinMainNet
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags))
+                if indexes is None:
+                    records = ((wallet, None) for wallet in wallets)
+                else:
+                    records = six.moves.zip_longest(wallets, indexes)
+                for wallet, index in records:
+                    if wallet is None or (flags and index is None):
+                        raise ValueError(
+                            "There must be one index for every wallet")
+                    network = wallet.network
+                    out.write(wallet._serialize_bytes(private=private))
+                    if flags:
+                        out.write(long_to_bytes(index, INDEX_SIZE))
+            replace_file(new_path, path)
+        except Exception:
+            if os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+        return cls(path, network=network)
+
+    def _open(self):
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise InvalidNodeFileError("%s is too short" % self.path)
+        magic, version, flags = _HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise InvalidNodeFileError("%s is not a node file" % self.path)
+        self.has_indexes = bool(flags & FLAG_INDEXES)
+        self.record_size = NODE_SIZE + (INDEX_SIZE if self.has_indexes else 0)
+        size = os.fstat(self._file.fileno()).st_size
+        count, remainder = divmod(size - HEADER_SIZE, self.record_size)
+        if remainder:
+            raise InvalidNodeFileError(
+                "%s has a truncated record" % self.path)
+        self._count = count
+        self._mmap = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if six.PY2:
+            # python 2's mmap can't back a memoryview, so `raw` slices, and
+            # so copies, the map itself
+            self._view = self._mmap
+        else:
+            self._view = memoryview(self._mmap)
+
+    def close(self):
+        if self._view is not None:
+            if not six.PY2:
+                self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("node index out of range")
+        return HEADER_SIZE + i * self.record_size
+
+    def raw(self, i):
+        """Get the 78 byte serialization of the i'th node, as a memoryview.
+
+        On python 2, it's a copy of the bytes instead.
+        """
+        offset = self._offset(i)
+        return self._view[offset:offset + NODE_SIZE]
+
+    def get_index(self, i):
+        """Get the index stored with the i'th node."""
+        if not self.has_indexes:
+            raise ValueError("%s has no indexes" % self.path)
+        offset = self._offset(i) + NODE_SIZE
+        return bytes_to_long(self._mmap[offset:offset + INDEX_SIZE])
+
+    def __getitem__(self, i):
+        """Load the i'th node as a Wallet."""
+        return Wallet.deserialize(self.raw(i), network=self.network)
+
+    def __iter__(self):
+        for i in six.moves.range(self._count):
+            yield self[i]
+
+
+class InvalidNodeFileError(ValueError):
+    pass
@@ -0,0 +1,135 @@
+"""A pure python implementation of RIPEMD-160.
+
+hashlib only provides RIPEMD-160 when the underlying OpenSSL does, and
+OpenSSL 3 only does with its legacy provider loaded. This is the fallback
+for those hosts; see `bitmerchant.wallet.utils.hash160`.
+
+RIPEMD-160 is described at
+https://homes.esat.kuleuven.be/~bosselae/ripemd160.html
+Each of the five rounds is its own function, with its boolean function
+inlined, looping over precomputed (word, shift) steps. ~x is written as
+x ^ 0xffffffff to stay within 32 bits, and the selection functions use the
+cheaper forms d ^ (b & (c ^ d)) and c ^ (d & (b ^ c)).
+"""
+import struct
+
+
+_MASK = 0xffffffff
+
+# Word selection, shift amounts and constants of each round of the left and
+# right lines
+_R_LEFT = [
+    0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
+    7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+    3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+    1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+    4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13]
+_R_RIGHT = [
+    5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+    6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+    15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+    8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+    12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11]
+_S_LEFT = [
+    11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+    7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+    11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+    11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+    9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6]
+_S_RIGHT = [
+    8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+    9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+    9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+    15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+    8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11]
+_K_LEFT = [0x00000000, 0x5a827999, 0x6ed9eba1, 0x8f1bbcdc, 0xa953fd4e]
+_K_RIGHT = [0x50a28be6, 0x5c4dd124, 0x6d703ef3, 0x7a6d76e9, 0x00000000]
+
+
+def _steps(words, shifts):
+    """Group the (word, shift, 32 - shift) steps of a line by round."""
+    steps = [(r, s, 32 - s) for r, s in zip(words, shifts)]
+    return [steps[i:i + 16] for i in range(0, 80, 16)]
+
+
+_ROUNDS_LEFT = _steps(_R_LEFT, _S_LEFT)
+_ROUNDS_RIGHT = _steps(_R_RIGHT, _S_RIGHT)
+
+_INITIAL_STATE = (
+    0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476, 0xc3d2e1f0)
+
+_BLOCK = struct.Struct("<16I")
+
+
+def _f0(x, steps, k, a, b, c, d, e, m=_MASK):
+    for r, s, u in steps:
+        t = (a + (b ^ c ^ d) + x[r] + k) & m
+        t = (((t << s) | (t >> u)) + e) & m
+        a, e, d, c, b = e, d, ((c << 10) | (c >> 22)) & m, b, t
+    return a, b, c, d, e
+
+
+def _f1(x, steps, k, a, b, c, d, e, m=_MASK):
+    for r, s, u in steps:
+        t = (a + (d ^ (b & (c ^ d))) + x[r] + k) & m
+        t = (((t << s) | (t >> u)) + e) & m
+        a, e, d, c, b = e, d, ((c << 10) | (c >> 22)) & m, b, t
+    return a, b, c, d, e
+
+
+def _f2(x, steps, k, a, b, c, d, e, m=_MASK):
+    for r, s, u in steps:
+        t = (a + ((b | (c ^ m)) ^ d) + x[r] + k) & m
+        t = (((t << s) | (t >> u)) + e) & m
+        a, e, d, c, b = e, d, ((c << 10) | (c >> 22)) & m, b, t
+    return a, b, c, d, e
+
+
+def _f3(x, steps, k, a, b, c, d, e, m=_MASK):
+    for r, s, u in steps:
+        t = (a + (c ^ (d & (b ^ c))) + x[r] + k) & m
+        t = (((t << s) | (t >> u)) + e) & m
+        a, e, d, c, b = e, d, ((c << 10) | (c >> 22)) & m, b, t
+    return a, b, c, d, e
+
+
+def _f4(x, steps, k, a, b, c, d, e, m=_MASK):
+    for r, s, u in steps:
+        t = (a + (b ^ (c | (d ^ m))) + x[r] + k) & m
+        t = (((t << s) | (t >> u)) + e) & m
+        a, e, d, c, b = e, d, ((c << 10) | (c >> 22)) & m, b, t
+    return a, b, c, d, e
+
+
+# The rounds of each line, as (function, steps, constant)
+_LEFT = list(zip((_f0, _f1, _f2, _f3, _f4), _ROUNDS_LEFT, _K_LEFT))
+_RIGHT = list(zip((_f4, _f3, _f2, _f1, _f0), _ROUNDS_RIGHT, _K_RIGHT))
+
+
+def _compress(state, block):
+    x = _BLOCK.unpack(block)
+    left = right = state
+    for f, steps, k in _LEFT:
+        left = f(x, steps, k, *left)
+    for f, steps, k in _RIGHT:
+        right = f(x, steps, k, *right)
+    al, bl, cl, dl, el = left
+    ar, br, cr, dr, er = right
+    h0, h1, h2, h3, h4 = state
+    return ((h1 + cl + dr) & _MASK,
+            (h2 + dl + er) & _MASK,
+            (h3 + el + ar) & _MASK,
+            (h4 + al + br) & _MASK,
+            (h0 + bl + cr) & _MASK)
+
+
+def ripemd160(data):
+    """Get the 20 byte RIPEMD-160 digest of data."""
+    length = len(data)
+    # Pad with a 1 bit, zeros, then the length in bits, to 64 byte blocks
+    data = (data + b"\x80" + b"\0" * ((55 - length) % 64) +
+            struct.pack("<Q", (length * 8) & 0xffffffffffffffff))
+    state = _INITIAL_STATE
+    for offset in range(0, len(data), 64):
+        state = _compress(state, data[offset:offset + 64])
+    return struct.pack("<5I", *state)
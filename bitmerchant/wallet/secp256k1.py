@@ -0,0 +1,344 @@
+"""Integer arithmetic on the secp256k1 curve.
+
+The `ecdsa` package represents points as affine `Point` objects, so every
+addition and doubling pays for a modular inversion. The functions in this
+module work on plain python ints instead. Affine points are `(x, y)` tuples
+and the point at infinity is `None`. Internally, points are kept in
+Jacobian coordinates `(X, Y, Z)` where x = X / Z^2 and y = Y / Z^3, so an
+inversion is only needed once, when a result is converted back to affine
+coordinates.
+
+Multiples of the generator are computed from a table of precomputed points
+(see `jacobian_multiply_generator`), which is built once per process, the
+first time it is needed.
+
+secp256k1 is the curve y^2 = x^3 + 7 over the prime field P. See
+http://www.secg.org/sec2-v2.pdf section 2.4.1 for the domain parameters.
+"""
+import threading
+
+# The prime of the underlying field
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+# The order of the generator point
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+# Curve coefficients, y^2 = x^3 + A*x + B
+A = 0
+B = 7
+# The generator point
+GX = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+GY = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+G = (GX, GY)
+
+# Any Jacobian triple with Z == 0 is the point at infinity
+JACOBIAN_INFINITY = (1, 1, 0)
+
+# Width, in bits, of the window used by `jacobian_multiply`
+_WINDOW_BITS = 4
+
+# Width, in bits, of the windows of the generator table. See
+# `set_generator_window`.
+_generator_window_bits = 6
+_generator_table = None
+_generator_table_lock = threading.Lock()
+
+
+try:
+    pow(2, -1, 3)
+except (ValueError, TypeError):
+    # python < 3.8 has no native modular inverse (python 2 raises a
+    # TypeError for the negative exponent, python 3 a ValueError). Both P and N are prime,
+    # so Fermat's little theorem gives us one.
+    def inverse_mod(a, m=P):
+        """Return the inverse of a modulo the prime m."""
+        return pow(a, m - 2, m)
+else:
+    def inverse_mod(a, m=P):
+        """Return the inverse of a modulo the prime m."""
+        return pow(a, -1, m)
+
+
+def is_on_curve(x, y):
+    """Check that the affine coordinates (x, y) are a point on the curve."""
+    return (0 <= x < P and 0 <= y < P and
+            (y * y - x * x * x - B) % P == 0)
+
+
+def y_from_x(x, y_odd):
+    """Recover the y coordinate of a point from its x coordinate.
+
+    :param x: The x coordinate of the point
+    :type x: long
+    :param y_odd: True if y should be odd, False if it should be even
+    :type y_odd: bool
+
+    Since P % 4 == 3, the square root of alpha is alpha ^ ((P + 1) / 4), so
+    we don't need a general square root algorithm like Tonelli-Shanks.
+
+    Raises a ValueError if there is no point on the curve with this x.
+    """
+    if not 0 <= x < P:
+        raise ValueError("x coordinate is out of range")
+    alpha = (pow(x, 3, P) + B) % P
+    beta = pow(alpha, (P + 1) // 4, P)
+    if beta * beta % P != alpha:
+        raise ValueError("x coordinate is not on the curve")
+    if bool(beta & 1) != bool(y_odd):
+        beta = P - beta
+    return beta
+
+
+def to_jacobian(point):
+    """Convert an affine point to Jacobian coordinates."""
+    if point is None:
+        return JACOBIAN_INFINITY
+    return (point[0], point[1], 1)
+
+
+def to_affine(point):
+    """Convert a Jacobian point to affine coordinates.
+
+    This is the only place where an inversion is needed.
+    """
+    X, Y, Z = point
+    if not Z:
+        return None
+    z_inv = inverse_mod(Z)
+    z_inv_2 = z_inv * z_inv % P
+    return (X * z_inv_2 % P, Y * z_inv_2 * z_inv % P)
+
+
+def batch_to_affine(points):
+    """Convert a list of Jacobian points to affine coordinates.
+
+    This uses Montgomery's trick to share a single inversion across all of
+    the points: invert the product of every Z, then peel each individual
+    inverse off of it with two multiplications.
+    """
+    # products[i] is the product of the non-zero Zs of points[:i + 1]
+    products = []
+    product = 1
+    for point in points:
+        if point[2]:
+            product = product * point[2] % P
+        products.append(product)
+    inverse = inverse_mod(product)
+    result = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        X, Y, Z = points[i]
+        if not Z:
+            continue
+        # inverse is currently 1 / products[i]
+        z_inv = inverse * products[i - 1] % P if i else inverse
+        inverse = inverse * Z % P
+        z_inv_2 = z_inv * z_inv % P
+        result[i] = (X * z_inv_2 % P, Y * z_inv_2 * z_inv % P)
+    return result
+
+
+def jacobian_double(point):
+    """Double a Jacobian point."""
+    X, Y, Z = point
+    if not Y or not Z:
+        return JACOBIAN_INFINITY
+    Y_2 = Y * Y % P
+    S = 4 * X * Y_2 % P
+    M = 3 * X * X % P  # A == 0, so the A * Z^4 term drops out
+    X_3 = (M * M - 2 * S) % P
+    Y_3 = (M * (S - X_3) - 8 * Y_2 * Y_2) % P
+    Z_3 = 2 * Y * Z % P
+    return (X_3, Y_3, Z_3)
+
+
+def jacobian_add(p, q):
+    """Add two Jacobian points."""
+    X_1, Y_1, Z_1 = p
+    X_2, Y_2, Z_2 = q
+    if not Z_1:
+        return q
+    if not Z_2:
+        return p
+    Z_1_2 = Z_1 * Z_1 % P
+    Z_2_2 = Z_2 * Z_2 % P
+    U_1 = X_1 * Z_2_2 % P
+    U_2 = X_2 * Z_1_2 % P
+    S_1 = Y_1 * Z_2 * Z_2_2 % P
+    S_2 = Y_2 * Z_1 * Z_1_2 % P
+    if U_1 == U_2:
+        if S_1 != S_2:
+            # p == -q
+            return JACOBIAN_INFINITY
+        return jacobian_double(p)
+    H = U_2 - U_1
+    R = S_2 - S_1
+    H_2 = H * H % P
+    H_3 = H * H_2 % P
+    U_1_H_2 = U_1 * H_2 % P
+    X_3 = (R * R - H_3 - 2 * U_1_H_2) % P
+    Y_3 = (R * (U_1_H_2 - X_3) - S_1 * H_3) % P
+    Z_3 = H * Z_1 * Z_2 % P
+    return (X_3, Y_3, Z_3)
+
+
+def jacobian_add_affine(p, q):
+    """Add the Jacobian point p to the affine point q.
+
+    Mixed addition is cheaper than `jacobian_add` because q's Z is 1.
+    """
+    if q is None:
+        return p
+    X_1, Y_1, Z_1 = p
+    if not Z_1:
+        return (q[0], q[1], 1)
+    x_2, y_2 = q
+    Z_1_2 = Z_1 * Z_1 % P
+    U_2 = x_2 * Z_1_2 % P
+    S_2 = y_2 * Z_1 * Z_1_2 % P
+    if X_1 == U_2:
+        if Y_1 != S_2:
+            return JACOBIAN_INFINITY
+        return jacobian_double(p)
+    H = U_2 - X_1
+    R = S_2 - Y_1
+    H_2 = H * H % P
+    H_3 = H * H_2 % P
+    U_1_H_2 = X_1 * H_2 % P
+    X_3 = (R * R - H_3 - 2 * U_1_H_2) % P
+    Y_3 = (R * (U_1_H_2 - X_3) - Y_1 * H_3) % P
+    Z_3 = H * Z_1 % P
+    return (X_3, Y_3, Z_3)
+
+
+def jacobian_multiply(point, k):
+    """Multiply the affine point by the scalar k, returning a Jacobian point.
+
+    This uses a fixed window of `_WINDOW_BITS` bits, so it needs one mixed
+    addition per window rather than one per set bit.
+    """
+    k = k % N
+    if point is None or not k:
+        return JACOBIAN_INFINITY
+    window_size = 1 << _WINDOW_BITS
+    mask = window_size - 1
+    # table[i] = i * point, in Jacobian coordinates
+    table = [JACOBIAN_INFINITY, to_jacobian(point)]
+    for i in range(2, window_size):
+        table.append(jacobian_add_affine(table[-1], point))
+
+    result = JACOBIAN_INFINITY
+    shift = (k.bit_length() // _WINDOW_BITS) * _WINDOW_BITS
+    while shift >= 0:
+        for _ in range(_WINDOW_BITS):
+            result = jacobian_double(result)
+        digit = (k >> shift) & mask
+        if digit:
+            result = jacobian_add(result, table[digit])
+        shift -= _WINDOW_BITS
+    return result
+
+
+def point_add(p, q):
+    """Add two affine points."""
+    return to_affine(jacobian_add_affine(to_jacobian(p), q))
+
+
+def point_multiply(point, k):
+    """Multiply the affine point by the scalar k."""
+    return to_affine(jacobian_multiply(point, k))
+
+
+def set_generator_window(bits):
+    """Set the window size of the generator table.
+
+    :param bits: The width of each window, in bits. The table holds
+        ceil(256 / bits) * (2^bits - 1) points, and multiplying the generator
+        takes one addition per window. The default of 6 bits needs 43
+        additions and about 2,700 points (a few hundred KB). 8 bits needs
+        32 additions but 8,160 points.
+    :type bits: int
+
+    The table is rebuilt the next time it is needed.
+    """
+    global _generator_window_bits, _generator_table
+    if not isinstance(bits, int) or not 1 <= bits <= 16:
+        raise ValueError("bits must be an int between 1 and 16")
+    with _generator_table_lock:
+        _generator_window_bits = bits
+        _generator_table = None
+
+
+def get_generator_window():
+    """Get the window size of the generator table, in bits."""
+    return _generator_window_bits
+
+
+def _build_generator_table(bits):
+    """Build the table of multiples of the generator.
+
+    Row i holds j * 2^(bits * i) * G for j in 1 .. 2^bits - 1, in affine
+    coordinates, so that k * G is the sum of one entry per row.
+    """
+    rows = []
+    base = G
+    for _ in range((256 + bits - 1) // bits):
+        row = [to_jacobian(base)]
+        for _ in range((1 << bits) - 2):
+            row.append(jacobian_add_affine(row[-1], base))
+        rows.append(row)
+        # The next row starts at 2^bits * base
+        base = to_affine(jacobian_add_affine(row[-1], base))
+    # Normalize every row with a single inversion
+    points = batch_to_affine([point for row in rows for point in row])
+    width = (1 << bits) - 1
+    return [points[i:i + width] for i in range(0, len(points), width)]
+
+
+def _get_generator_table():
+    """Get the (bits, rows) generator table, building it if needed."""
+    global _generator_table
+    table = _generator_table
+    if table is None:
+        with _generator_table_lock:
+            if _generator_table is None:
+                _generator_table = (
+                    _generator_window_bits,
+                    _build_generator_table(_generator_window_bits))
+            table = _generator_table
+    return table
+
+
+def jacobian_multiply_generator(k):
+    """Multiply the generator point by the scalar k, using the table.
+
+    This needs no doublings and at most one mixed addition per window.
+    """
+    k = k % N
+    bits, table = _get_generator_table()
+    mask = (1 << bits) - 1
+    result = JACOBIAN_INFINITY
+    for row in table:
+        if not k:
+            break
+        digit = k & mask
+        if digit:
+            result = jacobian_add_affine(result, row[digit - 1])
+        k >>= bits
+    return result
+
+
+def multiply_generator(k):
+    """Multiply the generator point by the scalar k."""
+    return to_affine(jacobian_multiply_generator(k))
+
+
+def tweak_add(point, k):
+    """Return the affine point k*G + point.
+
+    This is the core of BIP32 public child derivation. The sum is done in
+    Jacobian coordinates so only one inversion is needed.
+    """
+    return add_to_affine(jacobian_multiply_generator(k), point)
+
+
+def add_to_affine(p, q):
+    """Return the affine point p + q, for a Jacobian p and an affine q."""
+    return to_affine(jacobian_add_affine(p, q))
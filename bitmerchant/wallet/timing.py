@@ -0,0 +1,175 @@
+"""Opt-in timing of the stages of key derivation and encoding.
+
+Timing is off by default, and costs nothing then. Turn it on around the
+code to profile, then read the counters:
+
+    >>> from bitmerchant.wallet import timing
+    >>> from bitmerchant.wallet import Wallet
+    >>> wallet = Wallet.from_master_secret(b"my secret seed")
+    >>> with timing.instrument():
+    ...     address = wallet.get_child(0).to_address()
+    >>> timing.snapshot()["hmac_sha512"]
+    StageStats(count=1, total_ns=4512)
+
+or with `enable` and `disable`, to leave it on in a running process. Every
+stage counts its calls and the total nanoseconds spent in them, across all
+threads, until `reset`.
+
+There are two kinds of stages. The operations are the public methods in
+OPERATIONS, like "Wallet.get_child". The primitives in PRIMITIVES are the
+expensive steps inside them: HMAC-SHA512, multiplying the generator by a
+scalar, the point addition of public derivation, checking that a point is
+on the curve, recovering y from a compressed key, hash160 and base58check.
+Times are inclusive, so the time of "Wallet.get_child" includes its
+"hmac_sha512", and a primitive is counted every time it runs, whichever
+operation it's part of.
+
+Timing works by replacing the functions and methods with timed wrappers
+while it's on, and putting the originals back when it's turned off. So
+turn it on and off while no derivation is in progress, and don't hold on
+to references to the instrumented functions across the switch.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import functools
+import threading
+import time
+import timeit
+
+from . import bip32
+from . import keys
+from . import secp256k1
+from .bip32 import Wallet
+from .keys import PublicKey
+
+
+# (stage, owner, attribute) of the methods that are timed
+OPERATIONS = (
+    ("Wallet.__init__", Wallet, "__init__"),
+    ("Wallet.get_child", Wallet, "get_child"),
+    ("Wallet.to_address", Wallet, "to_address"),
+    ("Wallet.serialize_b58", Wallet, "serialize_b58"),
+    ("PublicKey.from_hex_key", PublicKey, "from_hex_key"),
+    ("PublicKey.to_address", PublicKey, "to_address"),
+)
+# (stage, module, attribute) of the primitives that are timed. A function
+# imported by name is replaced in every module that calls it.
+PRIMITIVES = (
+    ("hmac_sha512", bip32, "hmac_sha512"),
+    ("scalar_multiply", secp256k1, "jacobian_multiply_generator"),
+    ("point_add", secp256k1, "add_to_affine"),
+    ("curve_check", secp256k1, "is_on_curve"),
+    ("decompress", secp256k1, "y_from_x"),
+    ("hash160", bip32, "hash160"),
+    ("hash160", keys, "hash160"),
+    ("base58_encode", bip32, "b58encode_check"),
+    ("base58_encode", keys, "b58encode_check"),
+    ("base58_decode", bip32, "b58decode_check"),
+    ("base58_decode", keys, "b58decode_check"),
+)
+
+try:
+    _clock_ns = time.perf_counter_ns
+except AttributeError:  # python < 3.7
+    def _clock_ns():
+        return int(timeit.default_timer() * 1e9)
+
+_lock = threading.Lock()
+# stage -> [count, total_ns]
+_stats = {}
+# (owner, attribute, original) of everything replaced while enabled
+_originals = []
+
+
+class StageStats(namedtuple("StageStats", ["count", "total_ns"])):
+    """A snapshot of a stage's counters."""
+    __slots__ = ()
+
+    @property
+    def mean_ns(self):
+        """The mean nanoseconds per call, or 0.0 if there were none."""
+        return self.total_ns / float(self.count) if self.count else 0.0
+
+
+def _record(stage, elapsed):
+    with _lock:
+        counters = _stats.get(stage)
+        if counters is None:
+            _stats[stage] = [1, elapsed]
+        else:
+            counters[0] += 1
+            counters[1] += elapsed
+
+
+def _timed(stage, func):
+    """Wrap func so that every call is recorded as stage."""
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = _clock_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record(stage, _clock_ns() - start)
+    return timed
+
+
+def _wrap(stage, original):
+    if isinstance(original, classmethod):
+        return classmethod(_timed(stage, original.__func__))
+    if isinstance(original, staticmethod):
+        return staticmethod(_timed(stage, original.__func__))
+    return _timed(stage, original)
+
+
+def is_enabled():
+    """Whether timing is on."""
+    return bool(_originals)
+
+
+def enable():
+    """Turn timing on. It does nothing if timing is already on."""
+    with _lock:
+        if _originals:
+            return
+        for stage, owner, attribute in OPERATIONS + PRIMITIVES:
+            # Take the attribute from the owner's own dict, so that
+            # classmethods are wrapped and restored as classmethods
+            original = vars(owner)[attribute]
+            _originals.append((owner, attribute, original))
+            setattr(owner, attribute, _wrap(stage, original))
+
+
+def disable():
+    """Turn timing off, keeping the counters."""
+    with _lock:
+        while _originals:
+            owner, attribute, original = _originals.pop()
+            setattr(owner, attribute, original)
+
+
+@contextmanager
+def instrument():
+    """Turn timing on for the body of a with statement.
+
+    Timing is turned off again afterwards, unless it was already on.
+    """
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot():
+    """Get a dict mapping every stage that has run to its StageStats."""
+    with _lock:
+        return dict((stage, StageStats(*counters))
+                    for stage, counters in _stats.items())
+
+
+def reset():
+    """Zero every stage's counters."""
+    with _lock:
+        _stats.clear()
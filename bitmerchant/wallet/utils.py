@@ -1,5 +1,10 @@
+from binascii import hexlify
+from binascii import unhexlify
 import hashlib
+import hmac
 from hashlib import sha256
+import importlib
+import os
 import re
 
 import six
@@ -29,10 +34,68 @@ def chr_py2(num):
     return chr(num)
 
 
+def _select_ripemd160():
+    """Find the fastest available RIPEMD-160 implementation.
+
+    In order of preference:
+
+        * hashlib, when its OpenSSL provides ripemd160. OpenSSL 3 only does
+          when the legacy provider is loaded.
+        * pycryptodome(x), if it is installed
+        * the pure python bitmerchant.wallet.ripemd160
+
+    Returns a tuple of the implementation's name and a function that takes
+    bytes and returns the 20 byte digest.
+    """
+    try:
+        template = hashlib.new('ripemd160')
+    except ValueError:
+        pass
+    else:
+        # Copying an existing hash object skips hashlib.new's name lookup
+        def ripemd160(data, copy=template.copy):
+            h = copy()
+            h.update(data)
+            return h.digest()
+        return "hashlib", ripemd160
+
+    for module_name in ["Cryptodome.Hash.RIPEMD160", "Crypto.Hash.RIPEMD160"]:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+
+        def ripemd160(data, new=module.new):
+            return new(data).digest()
+        return "pycryptodome", ripemd160
+
+    from .ripemd160 import ripemd160
+    return "python", ripemd160
+
+
+# The name of the implementation ripemd160 uses, see _select_ripemd160
+RIPEMD160_IMPLEMENTATION, ripemd160 = _select_ripemd160()
+
+
 def hash160(data):
     """Return ripemd160(sha256(data))"""
-    rh = hashlib.new('ripemd160', sha256(data).digest())
-    return rh.digest()
+    return ripemd160(sha256(data).digest())
+
+
+def hash160_many(datas):
+    """Return the hash160 of every item of datas, as a list.
+
+    This is the same as `[hash160(data) for data in datas]`, without the
+    overhead of a function call and global lookups per item.
+    """
+    _ripemd160 = ripemd160
+    _sha256 = sha256
+    return [_ripemd160(_sha256(data).digest()) for data in datas]
+
+
+def hmac_sha512(key, msg):
+    """Return the HMAC-SHA512 of msg with key."""
+    return hmac.new(key, msg=msg, digestmod=hashlib.sha512).digest()
 
 
 def is_hex_string(string):
@@ -43,14 +106,42 @@ def is_hex_string(string):
     return pattern.match(string) is not None
 
 
-def long_to_hex(l, size):
+def long_to_hex(num, size):
     """Encode a long value as a hex string, 0-padding to size.
 
     Note that size is the size of the resulting hex string. So, for a 32Byte
     long size should be 64 (two hex characters per byte"."""
     f_str = "{0:0%sx}" % size
-    return ensure_bytes(f_str.format(l).lower())
+    return ensure_bytes(f_str.format(num).lower())
 
 
 def long_or_int(val, *args):
     return long(val, *args)
+
+
+if six.PY3:
+    def long_to_bytes(num, size):
+        """Encode a long value as a big-endian byte string of `size` bytes."""
+        return num.to_bytes(size, 'big')
+
+    def bytes_to_long(data):
+        """Decode a big-endian byte string as a long."""
+        return int.from_bytes(data, 'big')
+else:
+    def long_to_bytes(num, size):
+        """Encode a long value as a big-endian byte string of `size` bytes."""
+        return unhexlify(long_to_hex(num, size * 2))
+
+    def bytes_to_long(data):
+        """Decode a big-endian byte string as a long."""
+        return long(hexlify(data), 16)
+
+
+if hasattr(os, "replace"):
+    replace_file = os.replace
+else:  # python 2
+    def replace_file(src, dst):
+        """Rename src to dst, replacing dst if it exists."""
+        if os.name == "nt" and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
@@ -77,10 +77,18 @@ setup(
         'pycoin>=0.26',
     ],
     test_suite="tests",
+    entry_points={
+        'console_scripts': [
+            'bitmerchant = bitmerchant.cli:main',
+        ],
+    },
     install_requires=[
-        'base58>=0.2.1',
         'ecdsa>=0.10',
         'six>=1.5.2',
         'cachetools>=1.1.1',
-    ]
+    ],
+    extras_require={
+        # Vectorised base58check encoding for bulk address generation
+        'numpy': ['numpy'],
+    },
 )
@@ -0,0 +1,141 @@
+from binascii import unhexlify
+from unittest import TestCase
+
+from bitmerchant.network import BitcoinMainNet
+from bitmerchant.network import BitcoinTestNet
+from bitmerchant.network import DogecoinMainNet
+from bitmerchant.network import LitecoinMainNet
+from bitmerchant.network import LitecoinTestNet
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.address import ADDRESS_FORMATS
+from bitmerchant.wallet.address import addresses_for_key_hashes
+from bitmerchant.wallet.address import P2PKH
+from bitmerchant.wallet.address import P2SH_P2WPKH
+from bitmerchant.wallet.address import P2WPKH
+from bitmerchant.wallet.address import PUBKEY_ADDRESS
+from bitmerchant.wallet.address import SCRIPT_ADDRESS
+from bitmerchant.wallet.address import validate_address
+from bitmerchant.wallet.address import validate_addresses
+from bitmerchant.wallet.b58 import b58encode_check
+from bitmerchant.wallet.utils import chr_py2
+from bitmerchant.wallet.utils import hash160
+
+
+class TestValidateAddress(TestCase):
+    def _address(self, network, address_type=PUBKEY_ADDRESS):
+        w = Wallet.from_master_secret(b'address test seed', network=network)
+        key_hash = hash160(w.public_key.get_key_bytes(compressed=True))
+        return key_hash, b58encode_check(
+            chr_py2(getattr(network, address_type)) + key_hash)
+
+    def test_pubkey_address(self):
+        key_hash, address = self._address(BitcoinMainNet)
+        self.assertEqual(
+            address,
+            Wallet.from_master_secret(b'address test seed').to_address())
+        info = validate_address(address)
+        self.assertEqual(info.address, address)
+        self.assertEqual(info.hash160, key_hash)
+        self.assertEqual(info.network, BitcoinMainNet)
+        self.assertEqual(info.address_type, PUBKEY_ADDRESS)
+
+    def test_script_address(self):
+        key_hash, address = self._address(DogecoinMainNet, SCRIPT_ADDRESS)
+        info = validate_address(address)
+        self.assertEqual(info.network, DogecoinMainNet)
+        self.assertEqual(info.address_type, SCRIPT_ADDRESS)
+        self.assertEqual(info.hash160, key_hash)
+
+    def test_network_preference(self):
+        # Bitcoin and litecoin testnets share their version bytes
+        address = self._address(LitecoinTestNet)[1]
+        self.assertEqual(validate_address(address).network, BitcoinTestNet)
+        self.assertEqual(
+            validate_address(address, networks=[LitecoinTestNet]).network,
+            LitecoinTestNet)
+
+    def test_wrong_network(self):
+        address = self._address(LitecoinMainNet)[1]
+        self.assertEqual(
+            validate_address(address, networks=[BitcoinMainNet]), None)
+
+    def test_invalid(self):
+        address = self._address(BitcoinMainNet)[1]
+        for invalid in [
+                "", "0", address[:-1], address[:-1] + "z", address + "1",
+                # A valid checksum on a payload of the wrong length
+                b58encode_check(b"\0" * 20),
+                # An unknown version byte
+                b58encode_check(b"\x99" + b"\0" * 20)]:
+            self.assertEqual(validate_address(invalid), None)
+
+    def test_batch(self):
+        addresses = Wallet.from_master_secret(
+            b'address test seed').derive_children(0, 5, output="address")
+        results = validate_addresses(addresses + ["invalid"])
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[-1], None)
+        for address, info in zip(addresses, results):
+            self.assertEqual(info, validate_address(address))
+            self.assertEqual(info.network, BitcoinMainNet)
+
+
+class TestAddressesForKeyHashes(TestCase):
+    # The generator point's compressed public key
+    key_hash = hash160(unhexlify(
+        "0279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798"))
+
+    def test_vectors(self):
+        addresses = addresses_for_key_hashes(
+            [self.key_hash], ADDRESS_FORMATS, [BitcoinMainNet])[0]
+        self.assertEqual(addresses, {
+            (BitcoinMainNet, P2PKH): "1BgGZ9tcN4rm9KBzDn7KprQz87SZ26SAMH",
+            (BitcoinMainNet, P2SH_P2WPKH):
+                "3JvL6Ymt8MVWiCNHC7oWU6nLeHNJKLZGLN",
+            # From BIP173
+            (BitcoinMainNet, P2WPKH):
+                "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4",
+        })
+
+    def test_bip49_vector(self):
+        key_hash = hash160(unhexlify(
+            "03a1af804ac108a8a51782198c2d034b28bf90c8803f5a53f76276fa69a4eae77f"))  # nopep8
+        self.assertEqual(
+            addresses_for_key_hashes(
+                [key_hash], [P2SH_P2WPKH], [BitcoinTestNet]),
+            [{(BitcoinTestNet, P2SH_P2WPKH):
+              "2Mww8dCYPUpKHofjgcXcBCEGmniw9CoaiD2"}])
+
+    def test_networks(self):
+        addresses = addresses_for_key_hashes(
+            [self.key_hash], ADDRESS_FORMATS,
+            [BitcoinTestNet, LitecoinMainNet, DogecoinMainNet])[0]
+        self.assertEqual(len(addresses), 9)
+        self.assertEqual(
+            addresses[(LitecoinMainNet, P2PKH)],
+            b58encode_check(b"\x30" + self.key_hash))
+        self.assertTrue(
+            addresses[(BitcoinTestNet, P2WPKH)].startswith("tb1q"))
+        self.assertTrue(
+            addresses[(LitecoinMainNet, P2WPKH)].startswith("ltc1q"))
+        # Dogecoin has no segwit
+        self.assertEqual(addresses[(DogecoinMainNet, P2WPKH)], None)
+        self.assertEqual(addresses[(DogecoinMainNet, P2SH_P2WPKH)], None)
+        self.assertEqual(
+            validate_address(addresses[(DogecoinMainNet, P2PKH)]).network,
+            DogecoinMainNet)
+
+    def test_batch(self):
+        key_hashes = [hash160(bytes(bytearray([i]))) for i in range(100)]
+        addresses = addresses_for_key_hashes(
+            key_hashes, ADDRESS_FORMATS, [BitcoinMainNet])
+        self.assertEqual(len(addresses), 100)
+        for key_hash, result in zip(key_hashes, addresses):
+            self.assertEqual(
+                result,
+                addresses_for_key_hashes(
+                    [key_hash], ADDRESS_FORMATS, [BitcoinMainNet])[0])
+
+    def test_invalid_format(self):
+        self.assertRaises(
+            ValueError, addresses_for_key_hashes, [self.key_hash], ["p2tr"])
@@ -0,0 +1,58 @@
+from binascii import unhexlify
+from unittest import TestCase
+
+from bitmerchant.wallet.b58 import b58decode
+from bitmerchant.wallet.b58 import b58decode_check
+from bitmerchant.wallet.b58 import b58encode
+from bitmerchant.wallet.b58 import b58encode_check
+
+
+class TestBase58(TestCase):
+    # (hex, base58) pairs from bitcoin core's base58_encode_decode.json
+    vectors = [
+        ("", ""),
+        ("61", "2g"),
+        ("626262", "a3gV"),
+        ("636363", "aPEr"),
+        ("73696d706c792061206c6f6e6720737472696e67",
+         "2cFupjhnEsSn59qHXstmK2ffpLv2"),
+        ("00eb15231dfceb60925886b67d065299925915aeb172c06647",
+         "1NS17iag9jJgTHD1VXjvLCEnZuQ3rJDE9L"),
+        ("516b6fcd0f", "ABnLTmg"),
+        ("bf4f89001e670274dd", "3SEo3LWLoPntC"),
+        ("572e4794", "3EFU7m"),
+        ("ecac89cad93923c02321", "EJDM8drfXA6uyA"),
+        ("10c8511e", "Rt5zm"),
+        ("00000000000000000000", "1111111111"),
+    ]
+
+    def test_vectors(self):
+        for data, encoded in self.vectors:
+            data = unhexlify(data)
+            self.assertEqual(b58encode(data), encoded)
+            self.assertEqual(b58decode(encoded), data)
+            self.assertEqual(b58decode(encoded.encode('ascii')), data)
+
+    def test_invalid_characters(self):
+        for encoded in ["0", "1O", "abcI", "abl", "ab c", u"ab\xe9"]:
+            self.assertRaises(ValueError, b58decode, encoded)
+
+    def test_check(self):
+        address = "1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"
+        payload = b58decode_check(address)
+        self.assertEqual(len(payload), 21)
+        self.assertEqual(b58encode_check(payload), address)
+
+    def test_bad_checksum(self):
+        self.assertRaises(
+            ValueError, b58decode_check, "1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN3")
+        self.assertRaises(ValueError, b58decode_check, "")
+        self.assertRaises(ValueError, b58decode_check, "1")
+
+    def test_round_trip(self):
+        for length in range(40):
+            for data in [b"\0" * length, b"\xff" * length,
+                         b"\0\0" + b"\x01" * length]:
+                self.assertEqual(b58decode(b58encode(data)), data)
+                self.assertEqual(
+                    b58decode_check(b58encode_check(data)), data)
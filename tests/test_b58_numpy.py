@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from unittest import skipIf
+from unittest import TestCase
+
+from mock import patch
+
+from bitmerchant.wallet import b58_numpy
+from bitmerchant.wallet.b58 import b58encode_check
+from bitmerchant.wallet.b58_numpy import b58encode_check_rows
+from bitmerchant.wallet.b58_numpy import encode_addresses
+
+numpy = b58_numpy.numpy
+
+
+def _payloads():
+    payloads = [b"\0" * 21, b"\xff" * 21, b"\0" * 20 + b"\x01"]
+    for version in [b"\0", b"\x05", b"\x6f", b"\xff"]:
+        for zeros in range(4):
+            payloads.append(
+                version + (b"\0" * zeros + os.urandom(20))[:20])
+    return payloads * 5
+
+
+@skipIf(numpy is None, "numpy is not installed")
+class TestB58EncodeCheckRows(TestCase):
+    def test_matches_b58encode_check(self):
+        payloads = _payloads()
+        self.assertEqual(
+            b58encode_check_rows(payloads),
+            [b58encode_check(payload) for payload in payloads])
+
+    def test_array(self):
+        payloads = _payloads()
+        array = numpy.frombuffer(
+            b"".join(payloads), dtype=numpy.uint8).reshape(-1, 21)
+        self.assertEqual(
+            b58encode_check_rows(array),
+            [b58encode_check(payload) for payload in payloads])
+
+    def test_empty(self):
+        self.assertEqual(b58encode_check_rows([]), [])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, b58encode_check_rows, [b"\0" * 20])
+        self.assertRaises(
+            ValueError, b58encode_check_rows,
+            numpy.zeros((3, 7), dtype=numpy.uint8))
+
+
+class TestEncodeAddresses(TestCase):
+    def test_encode_addresses(self):
+        payloads = _payloads()
+        expected = [b58encode_check(payload) for payload in payloads]
+        self.assertEqual(encode_addresses(payloads), expected)
+        self.assertEqual(encode_addresses(payloads[:3]), expected[:3])
+
+    def test_without_numpy(self):
+        payloads = _payloads()
+        with patch.object(b58_numpy, 'numpy', None):
+            self.assertEqual(
+                encode_addresses(payloads),
+                [b58encode_check(payload) for payload in payloads])
+            self.assertRaises(ImportError, b58encode_check_rows, payloads)
+
+    def test_lazy_import(self):
+        # Importing the wallet package mustn't import numpy
+        code = ("import sys; import bitmerchant.wallet; "
+                "assert 'numpy' not in sys.modules")
+        self.assertEqual(subprocess.call([sys.executable, "-c", code]), 0)
@@ -0,0 +1,159 @@
+from binascii import unhexlify
+import os
+from unittest import TestCase
+
+from bitmerchant.wallet.bech32 import BECH32
+from bitmerchant.wallet.bech32 import BECH32M
+from bitmerchant.wallet.bech32 import bech32_decode
+from bitmerchant.wallet.bech32 import bech32_encode
+from bitmerchant.wallet.bech32 import decode_segwit_address
+from bitmerchant.wallet.bech32 import decode_segwit_addresses
+from bitmerchant.wallet.bech32 import encode_segwit_address
+from bitmerchant.wallet.bech32 import encode_segwit_addresses
+
+
+class TestBech32(TestCase):
+    # Valid checksums from BIP173 and BIP350
+    bech32_vectors = [
+        "A12UEL5L",
+        "a12uel5l",
+        "an83characterlonghumanreadablepartthatcontainsthenumber1andtheexcludedcharactersbio1tt5tgs",  # nopep8
+        "abcdef1qpzry9x8gf2tvdw0s3jn54khce6mua7lmqqqxw",
+        "11" + "q" * 82 + "c8247j",
+        "split1checkupstagehandshakeupstreamerranterredcaperred2y9e3w",
+        "?1ezyfcl",
+    ]
+    bech32m_vectors = [
+        "A1LQFN3A",
+        "a1lqfn3a",
+        "an83characterlonghumanreadablepartthatcontainsthetheexcludedcharactersbioandnumber11sg7hg6",  # nopep8
+        "abcdef1l7aum6echk45nj3s0wdvt2fg8x9yrzpqzd3ryx",
+        "split1checkupstagehandshakeupstreamerranterredcaperredlc445v",
+        "?1v759aa",
+    ]
+
+    def test_vectors(self):
+        for vectors, spec in [(self.bech32_vectors, BECH32),
+                              (self.bech32m_vectors, BECH32M)]:
+            for vector in vectors:
+                hrp, data, decoded_spec = bech32_decode(vector)
+                self.assertEqual(decoded_spec, spec)
+                self.assertEqual(
+                    bech32_encode(hrp, list(data), spec), vector.lower())
+
+    def test_invalid(self):
+        for invalid in [
+                "pzry9x0s0muk",  # No separator
+                "1pzry9x0s0muk",  # Empty hrp
+                "x1b4n0q5v",  # Invalid character
+                "li1dgmt3",  # Too short checksum
+                "A1G7SGD8",  # Checksum calculated with uppercase hrp
+                "a12UEL5L",  # Mixed case
+                "a12uel5m",  # Invalid checksum
+                "an84characterslonghumanreadablepartthatcontainsthenumber1andtheexcludedcharactersbio1569pvx",  # nopep8
+                u"\xe91qqqqqqqqqqqq",  # Non-ascii hrp
+                ]:
+            self.assertRaises(ValueError, bech32_decode, invalid)
+
+    def test_encode_invalid(self):
+        self.assertRaises(ValueError, bech32_encode, "a", [32])
+        self.assertRaises(ValueError, bech32_encode, "a", [0] * 83)
+        self.assertRaises(ValueError, bech32_encode, "", [0])
+
+
+class TestSegwitAddress(TestCase):
+    # (address, scriptPubKey) pairs from BIP350
+    vectors = [
+        ("BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4",
+         "0014751e76e8199196d454941c45d1b3a323f1433bd6"),
+        ("tb1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3q0sl5k7",
+         "00201863143c14c5166804bd19203356da136c985678cd4d27a1b8c6329604903262"),  # nopep8
+        ("bc1pw508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7kt5nd6y",  # nopep8
+         "5128751e76e8199196d454941c45d1b3a323f1433bd6751e76e8199196d454941c45d1b3a323f1433bd6"),  # nopep8
+        ("BC1SW50QGDZ25J", "6002751e"),
+        ("bc1zw508d6qejxtdg4y5r3zarvaryvaxxpcs",
+         "5210751e76e8199196d454941c45d1b3a323"),
+        ("tb1qqqqqp399et2xygdj5xreqhjjvcmzhxw4aywxecjdzew6hylgvsesrxh6hy",
+         "0020000000c4a5cad46221b2a187905e5266362b99d5e91c6ce24d165dab93e86433"),  # nopep8
+        ("tb1pqqqqp399et2xygdj5xreqhjjvcmzhxw4aywxecjdzew6hylgvsesf3hn0c",
+         "5120000000c4a5cad46221b2a187905e5266362b99d5e91c6ce24d165dab93e86433"),  # nopep8
+        ("bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0",
+         "512079be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798"),  # nopep8
+    ]
+
+    # (address, hrp) pairs of invalid addresses from BIP350
+    invalid = [
+        # Invalid hrp
+        ("tc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vq5zuyut",
+         "bc"),
+        # Bech32 instead of bech32m
+        ("bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqh2y7hd",
+         "bc"),
+        ("BC1S0XLXVLHEMJA6C4DQV22UAPCTQUPFHLXM9H8Z3K2E72Q4K9HCZ7VQ54WELL",
+         "bc"),
+        # Bech32m instead of bech32
+        ("bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kemeawh", "bc"),
+        # Invalid character
+        ("bc1p38j9r5y49hruaue7wxjce0updqjuyyx0kh56v8s25huc6995vvpql3jow4",
+         "bc"),
+        # Invalid witness version
+        ("BC130XLXVLHEMJA6C4DQV22UAPCTQUPFHLXM9H8Z3K2E72Q4K9HCZ7VQ7ZWS8R",
+         "bc"),
+        # Invalid program lengths
+        ("bc1pw5dgrnzv", "bc"),
+        ("bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7v8n0nx0muaewav253zgeav",  # nopep8
+         "bc"),
+        ("BC1QR508D6QEJXTDG4Y5R3ZARVARYV98GJ9P", "bc"),
+        # Mixed case
+        ("tb1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vq47Zagq",
+         "tb"),
+        # Padding of more than 4 bits, and non-zero padding
+        ("bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7v07qwwzcrf",
+         "bc"),
+        ("tb1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vpggkg4j",
+         "tb"),
+        # Empty data
+        ("bc1gmk9yu", "bc"),
+    ]
+
+    def _script(self, witness_version, witness_program):
+        op = 0 if witness_version == 0 else 0x50 + witness_version
+        return bytes(bytearray([op, len(witness_program)])) + witness_program
+
+    def test_vectors(self):
+        for address, script in self.vectors:
+            hrp = address[:2].lower()
+            witness_version, witness_program = decode_segwit_address(
+                hrp, address)
+            self.assertEqual(
+                self._script(witness_version, witness_program),
+                unhexlify(script))
+            self.assertEqual(
+                encode_segwit_address(hrp, witness_version, witness_program),
+                address.lower())
+
+    def test_invalid(self):
+        for address, hrp in self.invalid:
+            self.assertRaises(ValueError, decode_segwit_address, hrp, address)
+
+    def test_encode_invalid(self):
+        for witness_version, witness_program in [
+                (17, b"\0" * 20),
+                (0, b"\0" * 16),
+                (1, b"\0"),
+                (1, b"\0" * 41)]:
+            self.assertRaises(ValueError, encode_segwit_address, "bc",
+                              witness_version, witness_program)
+
+    def test_batch(self):
+        programs = [os.urandom(20) for _ in range(50)]
+        addresses = encode_segwit_addresses("bc", 0, programs)
+        self.assertEqual(
+            addresses,
+            [encode_segwit_address("bc", 0, program) for program in programs])
+        self.assertEqual(
+            decode_segwit_addresses("bc", addresses + ["bc1gmk9yu", None]),
+            [(0, program) for program in programs] + [None, None])
+        # Addresses of other networks are invalid
+        self.assertEqual(decode_segwit_addresses("tb", addresses[:2]),
+                         [None, None])
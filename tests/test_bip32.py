@@ -1,24 +1,31 @@
 import binascii
 from mock import patch
 import six
+import threading
 import time
 from unittest import TestCase
 
 from ecdsa import SECP256k1
-from ecdsa.ellipticcurve import INFINITY
 
 from bitmerchant.network import BitcoinMainNet
 from bitmerchant.network import BitcoinTestNet
 from bitmerchant.network import DogecoinMainNet
 from bitmerchant.network import LitecoinMainNet
+from bitmerchant.wallet import secp256k1
 from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.bip32 import FrozenWalletError
+from bitmerchant.wallet.bip32 import GenerationCancelledError
 from bitmerchant.wallet.bip32 import InfinityPointException
 from bitmerchant.wallet.bip32 import InsufficientKeyDataError
 from bitmerchant.wallet.bip32 import InvalidPathError
 from bitmerchant.wallet.bip32 import InvalidPrivateKeyError
 from bitmerchant.wallet.bip32 import InvalidPublicKeyError
 from bitmerchant.wallet.bip32 import KeyMismatchError
+from bitmerchant.wallet.cache import DerivationCache
+from bitmerchant.wallet.cache import DeserializeCache
+from bitmerchant.wallet.cache import PathCache
 from bitmerchant.wallet.keys import IncompatibleNetworkException
+from bitmerchant.wallet.keys import KeyParseError
 from bitmerchant.wallet.utils import ensure_bytes
 from bitmerchant.wallet.utils import long_to_hex
 
@@ -128,6 +135,21 @@ class TestWallet(TestCase):
         w2 = Wallet.new_random_wallet()
         self.assertNotEqual(w.get_private_key_hex(), w2.get_private_key_hex())
 
+    def test_raw_parent_fingerprint_starting_with_0x(self):
+        # This node's fingerprint is 0x307859e1, which is b"0x" + 2 bytes
+        node = Wallet.from_master_secret(b'fp').public_copy().get_child(
+            178447)
+        self.assertEqual(node.fingerprint, b"0x307859e1")
+        child = node.get_child(0)
+        self.assertEqual(child.parent_fingerprint, b"0x307859e1")
+        self.assertEqual(
+            Wallet.deserialize(child.serialize_b58(private=False)), child)
+        node.create_new_address_for_user(1)
+        # Hex fingerprints may still have the prefix
+        w = Wallet(chain_code=b'\0' * 32, private_exponent=1,
+                   parent_fingerprint=b"0x307859e1")
+        self.assertEqual(w.parent_fingerprint, b"0x307859e1")
+
     def test_random_wallet_with_entropy(self):
         """Ensure that the user_entropy value actually adds entropy."""
         test_time = time.time()
@@ -189,6 +211,301 @@ class TestWallet(TestCase):
             private_key=self.master_key.private_key,
             public_key=w.public_key)
 
+    def test_addresses(self):
+        addresses = self.master_key.addresses()
+        self.assertEqual(
+            addresses,
+            {(BitcoinMainNet, "p2pkh"): self.master_key.to_address()})
+        addresses = self.master_key.addresses(
+            formats=["p2pkh", "p2wpkh"],
+            networks=[BitcoinMainNet, LitecoinMainNet, DogecoinMainNet])
+        self.assertEqual(len(addresses), 6)
+        self.assertTrue(
+            addresses[(LitecoinMainNet, "p2wpkh")].startswith("ltc1q"))
+        self.assertEqual(addresses[(DogecoinMainNet, "p2wpkh")], None)
+        self.assertRaises(ValueError, self.master_key.addresses, ["foo"])
+
+    def test_to_segwit_address(self):
+        address = self.master_key.to_segwit_address()
+        self.assertTrue(address.startswith("bc1q"))
+        self.assertEqual(
+            address,
+            self.master_key.addresses(["p2wpkh"])[(BitcoinMainNet, "p2wpkh")])
+        dogecoin = Wallet.from_master_secret(
+            b'segwit seed', network=DogecoinMainNet)
+        self.assertRaises(ValueError, dogecoin.to_segwit_address)
+
+
+class TestLazyPublicKey(TestCase):
+    def setUp(self):
+        self.w = Wallet.from_master_secret(b'lazy public key test seed')
+
+    def _count_multiplications(self):
+        return patch(
+            'bitmerchant.wallet.secp256k1.jacobian_multiply_generator',
+            wraps=secp256k1.jacobian_multiply_generator)
+
+    def test_hardened_path(self):
+        """A hardened path needs at most one scalar multiplication."""
+        with self._count_multiplications() as multiply:
+            child = self.w.get_child_for_path("m/44'/0'/0'")
+            self.assertEqual(multiply.call_count, 0)
+            serialized = child.serialize_b58()
+            # The parent's public key, for the parent fingerprint
+            self.assertEqual(multiply.call_count, 1)
+        fresh = Wallet.deserialize(self.w.serialize())
+        # Computing the public key up front takes the eager path
+        fresh.public_key
+        expected = fresh.get_child(44, True).get_child(0, True).get_child(
+            0, True)
+        self.assertFalse(expected is child)
+        self.assertEqual(serialized, expected.serialize_b58())
+        self.assertEqual(child, expected)
+
+    def test_public_key_on_demand(self):
+        with self._count_multiplications() as multiply:
+            w = Wallet(chain_code=self.w.chain_code,
+                       private_key=self.w.private_key)
+            self.assertEqual(multiply.call_count, 0)
+            self.assertEqual(w.public_key, self.w.public_key)
+            self.assertEqual(w.public_key, self.w.public_key)
+            self.assertTrue(multiply.call_count <= 1)
+
+    def test_lazy_decompression(self):
+        """Deserializing a public key doesn't recover y until needed."""
+        xpub = self.w.serialize_b58(private=False)
+        with patch('bitmerchant.wallet.secp256k1.y_from_x',
+                   wraps=secp256k1.y_from_x) as y_from_x:
+            pub = Wallet.deserialize(xpub)
+            self.assertEqual(pub.serialize_b58(private=False), xpub)
+            self.assertEqual(pub.fingerprint, self.w.fingerprint)
+            self.assertEqual(pub.to_address(), self.w.to_address())
+            self.assertEqual(pub, self.w.public_copy())
+            self.assertEqual(y_from_x.call_count, 0)
+            # Public child derivation needs the point
+            self.assertEqual(
+                pub.get_child(1), self.w.get_child(1, as_private=False))
+            self.assertEqual(y_from_x.call_count, 1)
+
+    def test_deferred_validation(self):
+        # There is no point on the curve with x = 5
+        key = binascii.unhexlify(self.w.serialize(private=False))
+        pub = Wallet.deserialize(key[:45] + b"\x02" + b"\0" * 31 + b"\x05")
+        pub.to_address()
+        self.assertRaises(KeyParseError, pub.public_key.to_public_pair)
+        self.assertRaises(KeyParseError, pub.get_child, 0)
+        self.assertRaises(
+            KeyParseError, pub.derive_children, 0, 2, output="address")
+
+    def test_deferred_fingerprint(self):
+        child = self.w.get_child(3, is_prime=True)
+        self.assertEqual(child.parent_fingerprint, self.w.fingerprint)
+        grandchild = child.get_child(4, is_prime=True)
+        self.assertEqual(grandchild.parent_fingerprint, child.fingerprint)
+
+
+class TestDerivationCache(TestCase):
+    def setUp(self):
+        self.cache = DerivationCache(maxsize=100)
+        self.patcher = patch.object(Wallet, 'derivation_cache', self.cache)
+        self.patcher.start()
+        self.w = Wallet.from_master_secret(b'derivation cache test seed')
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_shared_by_content(self):
+        """Wallets loaded from the same key share cache entries."""
+        pub = self.w.serialize_b58(private=False)
+        child = Wallet.deserialize(pub).get_child(5)
+        self.assertEqual(self.cache.stats().hits, 0)
+        again = Wallet.deserialize(pub).get_child(5)
+        self.assertEqual(self.cache.stats().hits, 1)
+        self.assertFalse(child is again)
+        self.assertEqual(child, again)
+
+    def test_prime_is_part_of_the_key(self):
+        child = self.w.get_child(1, is_prime=False)
+        prime_child = self.w.get_child(1, is_prime=True)
+        self.assertNotEqual(child, prime_child)
+        self.assertEqual(self.cache.stats().hits, 0)
+        self.assertEqual(prime_child, self.w.get_child(-1))
+        self.assertEqual(self.cache.stats().hits, 1)
+
+    def test_private_and_public_parents(self):
+        """Private and public parents have separate entries."""
+        child = self.w.get_child(2, as_private=False)
+        pub_child = self.w.public_copy().get_child(2)
+        self.assertEqual(self.cache.stats().hits, 0)
+        self.assertEqual(child, pub_child)
+
+    def test_disabled(self):
+        with patch.object(Wallet, 'derivation_cache', None):
+            self.assertEqual(self.w.get_child(3), self.w.get_child(3))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_errors_are_not_cached(self):
+        order = binascii.unhexlify(long_to_hex(SECP256k1.order, 64))
+        with patch('hmac.HMAC.digest', return_value=order + order):
+            self.assertRaises(InvalidPrivateKeyError, self.w.get_child, 1)
+        self.assertEqual(len(self.cache), 0)
+        self.w.get_child(1)
+
+
+class TestDeserializeCache(TestCase):
+    def setUp(self):
+        self.cache = DeserializeCache(maxsize=10)
+        self.patcher = patch.object(Wallet, 'deserialize_cache', self.cache)
+        self.patcher.start()
+        self.w = Wallet.from_master_secret(b'deserialize cache test seed')
+        self.pub = self.w.serialize_b58(private=False)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_shared(self):
+        wallet = Wallet.deserialize(self.pub)
+        self.assertTrue(Wallet.deserialize(self.pub) is wallet)
+        self.assertEqual(wallet, self.w.public_copy())
+        self.assertTrue(isinstance(wallet, Wallet))
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_keyed_by_network(self):
+        wallet = Wallet.deserialize(self.w.serialize_b58(private=False))
+        testnet = Wallet.from_master_secret(
+            b'deserialize cache test seed', network=BitcoinTestNet)
+        key = testnet.serialize(private=False)
+        self.assertRaises(Exception, Wallet.deserialize, key)
+        other = Wallet.deserialize(key, network=BitcoinTestNet)
+        self.assertFalse(other is wallet)
+        self.assertEqual(other.network, BitcoinTestNet)
+
+    def test_frozen(self):
+        wallet = Wallet.deserialize(self.w.serialize_b58(private=True))
+        self.assertRaises(FrozenWalletError, setattr, wallet, 'depth', 3)
+        with self.assertRaises(FrozenWalletError):
+            wallet.public_key = None
+        self.assertRaises(
+            FrozenWalletError, setattr, wallet, 'private_key', None)
+        # Lazily computed values can still be filled in
+        self.assertEqual(wallet.public_key, self.w.public_key)
+        self.assertEqual(wallet.fingerprint, self.w.fingerprint)
+        # Nodes made from a frozen Wallet aren't frozen
+        for node in [wallet.get_child(1), wallet.get_children([2])[0],
+                     wallet.public_copy()]:
+            self.assertTrue(type(node) is Wallet)
+            node.depth = 3
+        self.assertEqual(wallet.generate_addresses(0, 3, workers=1),
+                         self.w.derive_children(0, 3, output="address"))
+
+    def test_invalidate(self):
+        wallet = Wallet.deserialize(self.pub)
+        self.assertTrue(Wallet.invalidate_deserialized(self.pub))
+        self.assertFalse(Wallet.invalidate_deserialized(self.pub))
+        again = Wallet.deserialize(self.pub)
+        self.assertFalse(again is wallet)
+        self.assertEqual(again, wallet)
+        self.cache.clear()
+        self.assertFalse(Wallet.deserialize(self.pub) is again)
+
+    def test_keyed_by_input(self):
+        """The same key in different encodings is cached separately."""
+        hex_key = self.w.serialize(private=False)
+        wallet = Wallet.deserialize(self.pub)
+        self.assertFalse(Wallet.deserialize(hex_key) is wallet)
+        self.assertEqual(Wallet.deserialize(hex_key), wallet)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_disabled(self):
+        with patch.object(Wallet, 'deserialize_cache', None):
+            self.assertFalse(
+                Wallet.deserialize(self.pub) is Wallet.deserialize(self.pub))
+            Wallet.deserialize(self.pub).depth = 1
+            self.assertFalse(Wallet.invalidate_deserialized(self.pub))
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestPathCache(TestCase):
+    def setUp(self):
+        self.cache = PathCache(maxsize=100)
+        self.patchers = [
+            patch.object(Wallet, 'path_cache', self.cache),
+            # Count every real derivation
+            patch.object(Wallet, 'derivation_cache', None),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.w = Wallet.from_master_secret(b'path cache test seed')
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _count_derivations(self):
+        return patch.object(
+            Wallet, '_derive_child', autospec=True,
+            side_effect=Wallet._derive_child)
+
+    def test_shared_prefix(self):
+        with self._count_derivations() as derive:
+            leaves = [self.w.get_child_for_path("m/44'/0'/0'/0/%d" % i)
+                      for i in range(10)]
+            # One account derivation, then one derivation per leaf
+            self.assertEqual(derive.call_count, 4 + 10)
+        with patch.object(Wallet, 'path_cache', None):
+            for i, leaf in enumerate(leaves):
+                self.assertEqual(
+                    leaf, self.w.get_child_for_path("m/44'/0'/0'/0/%d" % i))
+
+    def test_public(self):
+        self.assertEqual(
+            self.w.get_child_for_path("m/0'/1.pub"),
+            self.w.get_child(0, True).get_child(1, as_private=False))
+        child = self.w.get_child_for_path("M/0'/2")
+        self.assertEqual(child.private_key, None)
+        self.assertEqual(
+            child, self.w.get_child(0, True).get_child(2, as_private=False))
+
+    def test_leaves_are_not_shared(self):
+        self.w.get_child_for_path("m/1/2")
+        self.assertFalse(self.w.get_child_for_path("m/1") is
+                         self.w.get_child_for_path("m/1"))
+
+    def test_roots_are_separate(self):
+        other = Wallet.from_master_secret(b'another path cache test seed')
+        self.assertEqual(self.w.get_child_for_path("m/3/4"),
+                         self.w.get_child(3).get_child(4))
+        self.assertEqual(other.get_child_for_path("m/3/4"),
+                         other.get_child(3).get_child(4))
+        self.assertEqual(self.w.public_copy().get_child_for_path("m/3/4"),
+                         self.w.get_child(3).get_child(4, as_private=False))
+
+    def test_pin(self):
+        self.w.pin_path("m/44'/0'/0'")
+        # Push every unpinned node out of the cache
+        for i in range(100):
+            self.w.get_child_for_path("m/%d/0" % i)
+        with self._count_derivations() as derive:
+            self.w.get_child_for_path("m/44'/0'/0'/0")
+            self.assertEqual(derive.call_count, 1)
+        self.w.unpin_path("m/44'/0'/0'")
+        with self._count_derivations() as derive:
+            self.w.get_child_for_path("m/44'/0'/0'/0")
+            self.assertEqual(derive.call_count, 4)
+        # A public path pins the same, private node
+        self.w.pin_path("M/44'/0'/0'")
+        child = self.w.get_child_for_path("m/44'/0'/0'/0/1")
+        self.assertNotEqual(child.private_key, None)
+        with patch.object(Wallet, 'path_cache', None):
+            self.assertEqual(
+                child, self.w.get_child_for_path("m/44'/0'/0'/0/1"))
+        self.w.unpin_path("m/44'/0'/0'.pub")
+        self.w.pin_path("m/44'/0'/0'.pub")
+        self.assertNotEqual(
+            self.w.get_child_for_path("m/44'/0'/0'/0").private_key, None)
+
 
 class TestInvalidChildren(TestCase):
     def test_key_too_large(self):
@@ -203,12 +520,21 @@ class TestInvalidChildren(TestCase):
 
     def test_infinity_point(self):
         w = Wallet.new_random_wallet()
-        with patch('bitmerchant.wallet.keys.PublicKey.to_point',
-                   return_value=INFINITY):
+        w_pub = w.public_copy()
+        # I_L = n - k makes the child key k + I_L = 0 (mod n), which is the
+        # point at infinity for both private and public derivation.
+        secret = w.private_key._private_key.privkey.secret_multiplier
+        I_L = binascii.unhexlify(long_to_hex(SECP256k1.order - secret, 64))
+        return_value = I_L + b'\0' * 32
+        with patch('hmac.HMAC.digest', return_value=return_value):
             self.assertRaises(
                 InfinityPointException,
                 w.get_child,
                 1)
+            self.assertRaises(
+                InfinityPointException,
+                w_pub.get_child,
+                1)
 
 
 class TestNewAddressForUser(TestCase):
@@ -231,6 +557,184 @@ class TestNewAddressForUser(TestCase):
             self.w.get_child(10, as_private=False), child)
 
 
+class TestGetChildren(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.new_random_wallet()
+        cls.pub = cls.w.public_copy()
+
+    def test_private_parent(self):
+        children = self.w.derive_children(0, 5)
+        self.assertEqual(len(children), 5)
+        for i, child in enumerate(children):
+            self.assertEqual(child, self.w.get_child(i))
+            self.assertTrue(child.private_key)
+
+    def test_public_parent(self):
+        children = self.pub.derive_children(10, 5)
+        for i, child in enumerate(children):
+            self.assertEqual(child, self.pub.get_child(10 + i))
+            self.assertEqual(child.private_key, None)
+
+    def test_as_public(self):
+        for child, i in zip(self.w.get_children([7, 3], as_private=False),
+                            [7, 3]):
+            self.assertEqual(child, self.w.get_child(i, as_private=False))
+
+    def test_public_keys(self):
+        for parent in [self.w, self.pub]:
+            self.assertEqual(
+                parent.derive_children(0, 4, output="public_key"),
+                [parent.get_child(i).get_public_key_hex()
+                 for i in range(4)])
+
+    def test_addresses(self):
+        for parent in [self.w, self.pub]:
+            self.assertEqual(
+                parent.get_children([1, 100, 0x7fffffff], output="address"),
+                [parent.get_child(i).to_address()
+                 for i in [1, 100, 0x7fffffff]])
+
+    def test_multi_format_addresses(self):
+        networks = [BitcoinMainNet, BitcoinTestNet]
+        formats = ["p2pkh", "p2sh-p2wpkh", "p2wpkh"]
+        for parent in [self.w, self.pub]:
+            results = parent.get_children_addresses(
+                [0, 5], formats=formats, networks=networks)
+            for i, addresses in zip([0, 5], results):
+                self.assertEqual(
+                    addresses,
+                    parent.get_child(i).addresses(formats, networks))
+        self.assertEqual(
+            self.w.get_children_addresses([3])[0],
+            {(BitcoinMainNet, "p2pkh"): self.w.get_child(3).to_address()})
+        self.assertRaises(
+            ValueError, self.w.get_children_addresses, [0x80000000])
+
+    def test_empty(self):
+        self.assertEqual(self.pub.derive_children(0, 0), [])
+        self.assertEqual(self.w.get_children([], output="address"), [])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.w.derive_children, 0, -1)
+        self.assertRaises(ValueError, self.w.get_children, [-1])
+        self.assertRaises(ValueError, self.w.get_children, [0x80000000])
+        self.assertRaises(
+            ValueError, self.w.derive_children, 0, 1, output="foo")
+
+    def test_infinity_point(self):
+        secret = self.w.private_key._private_key.privkey.secret_multiplier
+        I_L = binascii.unhexlify(long_to_hex(SECP256k1.order - secret, 64))
+        with patch('hmac.HMAC.digest', return_value=I_L + b'\0' * 32):
+            self.assertRaises(
+                InfinityPointException, self.w.derive_children, 0, 2)
+            self.assertRaises(
+                InfinityPointException, self.pub.derive_children, 0, 2)
+
+
+class TestIterAddresses(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.from_master_secret(b'iter addresses test seed')
+
+    def test_matches_get_child(self):
+        for parent in [self.w, self.w.public_copy()]:
+            result = list(parent.iter_addresses(3, 12, chunk=4))
+            self.assertEqual([i for i, _ in result], list(range(3, 12)))
+            for i, address in result:
+                self.assertEqual(
+                    address,
+                    parent.get_child(i, as_private=False).to_address())
+
+    def test_public_keys(self):
+        for i, public_key, address in self.w.iter_addresses(
+                0, 3, public_keys=True):
+            child = self.w.get_child(i, as_private=False)
+            self.assertEqual(public_key, child.get_public_key_hex())
+            self.assertEqual(address, child.to_address())
+
+    def test_lazy(self):
+        with patch.object(Wallet, '_derive_batch', autospec=True,
+                          side_effect=Wallet._derive_batch) as derive:
+            addresses = self.w.iter_addresses(chunk=5)
+            self.assertEqual(derive.call_count, 0)
+            first = [next(addresses) for _ in range(6)]
+            self.assertEqual(derive.call_count, 2)
+        self.assertEqual(
+            [address for _, address in first],
+            self.w.derive_children(0, 6, output="address"))
+
+    def test_end_of_range(self):
+        self.assertEqual(
+            [i for i, _ in self.w.iter_addresses(0x7ffffffe, chunk=5)],
+            [0x7ffffffe, 0x7fffffff])
+        self.assertEqual(list(self.w.iter_addresses(5, 5)), [])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, list, self.w.iter_addresses(-1, 5))
+        self.assertRaises(
+            ValueError, list, self.w.iter_addresses(0, 0x80000001))
+        self.assertRaises(
+            ValueError, list, self.w.iter_addresses(0, 5, chunk=0))
+
+
+class TestGenerateAddresses(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.from_master_secret(b'generate addresses test seed')
+        cls.expected = cls.w.derive_children(5, 30, output="address")
+
+    def test_in_process(self):
+        self.assertEqual(
+            self.w.generate_addresses(5, 30, workers=1, chunk_size=7),
+            self.expected)
+
+    def test_workers(self):
+        for w in [self.w, self.w.public_copy()]:
+            self.assertEqual(
+                w.generate_addresses(5, 30, workers=3, chunk_size=7),
+                self.expected)
+
+    def test_progress(self):
+        calls = []
+        self.w.generate_addresses(
+            5, 30, workers=2, chunk_size=10,
+            progress=lambda done, count: calls.append((done, count)))
+        self.assertEqual(calls, [(10, 30), (20, 30), (30, 30)])
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        try:
+            self.w.generate_addresses(
+                5, 30, workers=2, chunk_size=10, cancel=cancel,
+                progress=lambda done, count: cancel.set())
+        except GenerationCancelledError as e:
+            self.assertEqual(e.addresses, self.expected[:10])
+        else:
+            self.fail("GenerationCancelledError not raised")
+
+    def test_chunks(self):
+        for workers in [1, 2]:
+            chunks = list(self.w.iter_address_chunks(
+                5, 30, workers=workers, chunk_size=7, public_keys=True))
+            self.assertEqual([len(chunk) for chunk in chunks],
+                             [7, 7, 7, 7, 2])
+            records = [record for chunk in chunks for record in chunk]
+            self.assertEqual(
+                [address for _, _, address in records], self.expected)
+            self.assertEqual(records[3][:2], (
+                8, self.w.get_child(8).public_key.get_key(compressed=True)))
+
+    def test_invalid(self):
+        self.assertEqual(self.w.generate_addresses(0, 0), [])
+        self.assertRaises(ValueError, self.w.generate_addresses, 0, -1)
+        self.assertRaises(ValueError, self.w.generate_addresses, -1, 1)
+        self.assertRaises(
+            ValueError, self.w.generate_addresses, 0x7fffffff, 2)
+        self.assertRaises(
+            ValueError, self.w.generate_addresses, 0, 1, chunk_size=0)
+
+
 class TestCrackPrivateKey(TestCase):
     def setUp(self):
         self.w = Wallet.new_random_wallet()
@@ -0,0 +1,154 @@
+import threading
+from unittest import TestCase
+
+from bitmerchant.wallet.cache import CacheStats
+from bitmerchant.wallet.cache import DerivationCache
+from bitmerchant.wallet.cache import DeserializeCache
+from bitmerchant.wallet.cache import PathCache
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDerivationCache(TestCase):
+    def test_get_set(self):
+        cache = DerivationCache(maxsize=10)
+        self.assertEqual(cache.get("a"), None)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats(), CacheStats(
+            hits=1, misses=1, evictions=0, size=1, maxsize=10))
+
+    def test_eviction(self):
+        cache = DerivationCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Touch a so that b is the least recently used
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_disabled(self):
+        cache = DerivationCache(maxsize=0)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_maxsize(self):
+        self.assertRaises(ValueError, DerivationCache, -1)
+
+    def test_ttl(self):
+        timer = FakeTimer()
+        cache = DerivationCache(maxsize=10, ttl=5, timer=timer)
+        cache.set("a", 1)
+        timer.now = 4
+        self.assertEqual(cache.get("a"), 1)
+        timer.now = 6
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(cache.stats().size, 0)
+
+    def test_clear_and_reset(self):
+        cache = DerivationCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 1)
+        cache.reset_stats()
+        self.assertEqual(cache.stats(), CacheStats(
+            hits=0, misses=0, evictions=0, size=0, maxsize=1024))
+
+    def test_discard(self):
+        cache = DerivationCache()
+        cache.set("a", 1)
+        self.assertTrue(cache.discard("a"))
+        self.assertFalse(cache.discard("a"))
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_hit_rate(self):
+        cache = DerivationCache()
+        self.assertEqual(cache.stats().hit_rate, 0.0)
+        cache.set("a", 1)
+        for key in "aaab":
+            cache.get(key)
+        self.assertEqual(cache.stats().hit_rate, 0.75)
+
+    def test_threads(self):
+        cache = DerivationCache(maxsize=50)
+
+        def work(offset):
+            for i in range(200):
+                cache.set((offset, i), i)
+                cache.get((offset, i))
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(stats.hits + stats.misses, 800)
+        self.assertEqual(stats.size, 50)
+        self.assertEqual(stats.evictions, 750)
+
+
+class TestPathCache(TestCase):
+    def test_longest_prefix(self):
+        cache = PathCache(maxsize=10)
+        self.assertEqual(cache.longest_prefix("root", (1, 2, 3)), (0, None))
+        cache.set("root", (1,), "a")
+        cache.set("root", (1, 2), "b")
+        self.assertEqual(cache.longest_prefix("root", (1, 2, 3)), (2, "b"))
+        self.assertEqual(cache.longest_prefix("root", (1, 5)), (1, "a"))
+        self.assertEqual(cache.longest_prefix("other", (1, 2)), (0, None))
+        self.assertEqual(cache.stats(), CacheStats(
+            hits=2, misses=2, evictions=0, size=2, maxsize=10))
+
+    def test_eviction(self):
+        cache = PathCache(maxsize=2)
+        for i in range(3):
+            cache.set("root", (i,), i)
+        self.assertEqual(cache.longest_prefix("root", (0,)), (0, None))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_pin(self):
+        cache = PathCache(maxsize=1)
+        cache.pin("root", (0,), "pinned")
+        cache.set("root", (1,), 1)
+        cache.set("root", (2,), 2)
+        self.assertEqual(cache.longest_prefix("root", (0, 1)), (1, "pinned"))
+        self.assertEqual(len(cache), 2)
+        # Setting a pinned prefix doesn't unpin it
+        cache.set("root", (0,), "new")
+        self.assertEqual(cache.longest_prefix("root", (0,)), (1, "pinned"))
+        cache.unpin("root", (0,))
+        self.assertEqual(cache.longest_prefix("root", (0,)), (0, None))
+
+    def test_clear(self):
+        cache = PathCache()
+        cache.set("root", (0,), 0)
+        cache.pin("root", (1,), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestDeserializeCache(TestCase):
+    def test_defaults(self):
+        cache = DeserializeCache()
+        self.assertEqual(cache.maxsize, 128)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
@@ -0,0 +1,102 @@
+import argparse
+import json
+from mock import patch
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import six
+
+from bitmerchant import cli
+from bitmerchant.network import BitcoinTestNet
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.utils import hash160
+from bitmerchant.wallet.utils import long_to_bytes
+
+
+class TestParsers(TestCase):
+    def test_range(self):
+        self.assertEqual(cli.parse_range("0:10"), (0, 10))
+        self.assertEqual(cli.parse_range(":10"), (0, 10))
+        self.assertEqual(cli.parse_range("5:2147483648"), (5, 0x80000000))
+        for value in ["10", "a:b", "5:4", "-1:2", "0:2147483649"]:
+            self.assertRaises(
+                argparse.ArgumentTypeError, cli.parse_range, value)
+
+    def test_network(self):
+        self.assertEqual(cli.parse_network("BitcoinTestNet"), BitcoinTestNet)
+        self.assertEqual(cli.parse_network("bitcointestnet"), BitcoinTestNet)
+        self.assertRaises(
+            argparse.ArgumentTypeError, cli.parse_network, "foo")
+
+
+class TestDerive(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.from_master_secret(
+            b'cli test seed', network=BitcoinTestNet)
+        cls.key = cls.w.serialize_b58(private=False)
+        cls.children = [cls.w.get_child(i) for i in range(5, 12)]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmpdir, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _derive(self, *args):
+        cli.main(["derive", self.key, "--range", "5:12", "-q",
+                  "--network", "BitcoinTestNet", "-o", self.output] +
+                 list(args))
+
+    def test_csv(self):
+        for workers in ["1", "3"]:
+            self._derive("--workers", workers, "--chunk-size", "2")
+            with open(self.output) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines, [
+                "%s,%s" % (child.child_number, child.to_address())
+                for child in self.children])
+
+    def test_jsonl(self):
+        self._derive("--format", "jsonl")
+        with open(self.output) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records, [
+            {"index": child.child_number, "address": child.to_address()}
+            for child in self.children])
+
+    def test_bin(self):
+        self._derive("--format", "bin", "--workers", "2", "--chunk-size", "3")
+        with open(self.output, "rb") as f:
+            data = f.read()
+        self.assertEqual(data, b"".join(
+            long_to_bytes(child.child_number, 4) +
+            hash160(child.public_key.get_key_bytes(compressed=True))
+            for child in self.children))
+        self.assertEqual(len(data), cli.BIN_RECORD_SIZE * 7)
+
+    def test_private_key_and_stdout(self):
+        args = cli.build_parser().parse_args(
+            ["derive", self.w.serialize_b58(), "--range", "5:7",
+             "--network", "BitcoinTestNet"])
+        stdout = six.StringIO()
+        stderr = six.StringIO()
+        cli.derive(args, stdout=stdout, stderr=stderr)
+        self.assertEqual(stdout.getvalue(), "".join(
+            "%s,%s\n" % (child.child_number, child.to_address())
+            for child in self.children[:2]))
+        self.assertTrue("Derived 2 addresses" in stderr.getvalue())
+
+    def test_invalid(self):
+        with patch('sys.stderr', six.StringIO()):
+            self.assertRaises(SystemExit, cli.main, ["derive"])
+            self.assertRaises(SystemExit, self._derive, "--chunk-size", "0")
+            self.assertRaises(SystemExit, self._derive, "--format", "x")
+            self.assertRaises(SystemExit, self._derive, "--network", "x")
+            for key in ["xpub123", self.key[:-1] + "1"]:
+                self.assertRaises(SystemExit, cli.main, ["derive", key])
+            # A testnet key, but the default network
+            self.assertRaises(SystemExit, cli.main, ["derive", self.key])
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+
+from bitmerchant.network import BitcoinTestNet
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.discovery import discover_account
+from bitmerchant.wallet.discovery import discover_accounts
+from bitmerchant.wallet.discovery import load_used_addresses
+from bitmerchant.wallet.discovery import scan_chain
+
+
+class TestScanChain(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.master = Wallet.from_master_secret(b'discovery test seed')
+        cls.chain = cls.master.get_child_for_path("m/44'/0'/0'/0")
+        cls.addresses = cls.chain.derive_children(0, 40, output="address")
+
+    def _used(self, *child_numbers):
+        return set(self.addresses[i] for i in child_numbers)
+
+    def test_gap_limit(self):
+        used = self._used(0, 3, 12, 21)
+        self.assertEqual(scan_chain(self.chain, used, gap_limit=10),
+                         [0, 3, 12, 21])
+        # 21 is more than 5 after 12
+        self.assertEqual(scan_chain(self.chain, used, gap_limit=5),
+                         [0, 3])
+
+    def test_stops_exactly_at_the_gap(self):
+        oracle = Mock(side_effect=self._used(2, 9).__contains__)
+        for window in [1, 4, 7, 100]:
+            oracle.reset_mock()
+            self.assertEqual(
+                scan_chain(self.chain, oracle, gap_limit=7, window=window),
+                [2, 9])
+            self.assertEqual(oracle.call_count, 9 + 1 + 7)
+
+    def test_unused(self):
+        self.assertEqual(scan_chain(self.chain, set()), [])
+
+    def test_public_key(self):
+        serialized = self.chain.serialize_b58(private=False)
+        self.assertEqual(
+            scan_chain(serialized, self._used(1, 4), gap_limit=5), [1, 4])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, scan_chain, self.chain, set(), 0)
+        self.assertRaises(
+            ValueError, scan_chain, self.chain, set(), 5, -1)
+
+
+class TestDiscoverAccounts(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.master = Wallet.from_master_secret(
+            b'discovery test seed', network=BitcoinTestNet)
+
+    def _addresses(self, account, chain, *child_numbers):
+        node = self.master.get_child_for_path(
+            "m/44'/1'/%d'/%d" % (account, chain))
+        return set(node.get_child(i).to_address() for i in child_numbers)
+
+    def test_discover_account(self):
+        used = self._addresses(0, 0, 0, 4) | self._addresses(0, 1, 2)
+        account = self.master.get_child_for_path("m/44'/1'/0'")
+        for concurrent in [True, False]:
+            self.assertEqual(
+                discover_account(account.public_copy(), used, gap_limit=5,
+                                 concurrent=concurrent),
+                {0: [0, 4], 1: [2]})
+
+    def test_discover_accounts(self):
+        used = (self._addresses(0, 0, 1) | self._addresses(1, 1, 3) |
+                # Account 3 is after an unused account, so it isn't found
+                self._addresses(3, 0, 0))
+        self.assertEqual(
+            discover_accounts(self.master.serialize_b58(), used, coin_type=1,
+                              gap_limit=5, network=BitcoinTestNet),
+            {0: {0: [1], 1: []}, 1: {0: [], 1: [3]}})
+
+    def test_public_master(self):
+        self.assertRaises(
+            ValueError, discover_accounts, self.master.public_copy(), set())
+
+    def test_oracle_errors(self):
+        def oracle(address):
+            raise IOError("block explorer is down")
+        account = self.master.get_child_for_path("m/44'/1'/0'")
+        self.assertRaises(IOError, discover_account, account, oracle)
+
+
+class TestLoadUsedAddresses(TestCase):
+    def test_load(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "used.txt")
+            with open(path, "w") as f:
+                f.write("# used addresses\n1abc\n\n  1def  \n")
+            self.assertEqual(load_used_addresses(path),
+                             set(["1abc", "1def"]))
+        finally:
+            shutil.rmtree(tmpdir)
@@ -0,0 +1,126 @@
+from unittest import TestCase
+
+from bitmerchant import hooks
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.cache import DerivationCache
+from bitmerchant.wallet.cache import DeserializeCache
+from bitmerchant.wallet.cache import PathCache
+
+
+class Recorder(object):
+    def __init__(self):
+        self.started = []
+        self.ended = []
+
+    def on_start(self, operation):
+        self.started.append(operation.name)
+        return "token"
+
+    def on_end(self, operation, started):
+        self.ended.append((operation, started))
+
+    def names(self):
+        return [operation.name for operation, _ in self.ended]
+
+
+class TestHooks(TestCase):
+    def setUp(self):
+        self.caches = (Wallet.derivation_cache, Wallet.path_cache,
+                       Wallet.deserialize_cache)
+        Wallet.derivation_cache = DerivationCache(maxsize=16)
+        Wallet.path_cache = PathCache(maxsize=16)
+        Wallet.deserialize_cache = None
+        self.wallet = Wallet.from_master_secret(b"hooks")
+        self.xpub = self.wallet.serialize_b58(private=False)
+        self.recorder = Recorder()
+        self.hook = hooks.register(
+            self.recorder.on_start, self.recorder.on_end)
+
+    def tearDown(self):
+        hooks.clear()
+        (Wallet.derivation_cache, Wallet.path_cache,
+         Wallet.deserialize_cache) = self.caches
+
+    def test_get_child(self):
+        self.wallet.get_child(3, is_prime=True)
+        self.wallet.get_child(3, is_prime=True)
+        self.assertEqual(self.recorder.started, ["get_child", "get_child"])
+        (first, started), (second, _) = self.recorder.ended
+        self.assertEqual(started, "token")
+        self.assertEqual(first.index, 0x80000003)
+        self.assertIs(first.cache_hit, False)
+        self.assertIs(second.cache_hit, True)
+        self.assertTrue(first.duration > 0)
+        self.assertTrue(first.start_time > 0)
+        self.assertIsNone(first.error)
+
+    def test_get_child_for_path(self):
+        self.wallet.get_child_for_path("m/0/1")
+        self.wallet.get_child_for_path("m/0/2")
+        self.assertEqual(self.recorder.names(), [
+            "get_child", "get_child", "get_child_for_path",
+            "get_child", "get_child_for_path"])
+        first = self.recorder.ended[2][0]
+        second = self.recorder.ended[4][0]
+        self.assertEqual(first.path, "m/0/1")
+        self.assertIs(first.cache_hit, False)
+        self.assertIs(second.cache_hit, True)
+
+    def test_deserialize(self):
+        Wallet.deserialize(self.xpub)
+        Wallet.deserialize_cache = DeserializeCache(maxsize=4)
+        Wallet.deserialize(self.xpub)
+        Wallet.deserialize(self.xpub)
+        self.assertEqual(
+            [operation.cache_hit for operation, _ in self.recorder.ended],
+            [None, False, True])
+
+    def test_serialize_b58(self):
+        self.wallet.serialize_b58(private=False)
+        self.assertEqual(self.recorder.names(), ["serialize_b58"])
+
+    def test_bulk(self):
+        self.wallet.derive_children(5, 3, output="address")
+        self.wallet.get_children_addresses([1, 2])
+        self.wallet.generate_addresses(0, 4, workers=1, chunk_size=4)
+        list(self.wallet.iter_addresses(0, 5, chunk=3))
+        # The first of each, since generate_addresses uses iter_addresses
+        operations = {}
+        for operation, _ in self.recorder.ended:
+            operations.setdefault(operation.name, operation)
+        self.assertEqual(operations["get_children"].index, 5)
+        self.assertEqual(operations["get_children"].count, 3)
+        self.assertEqual(operations["get_children_addresses"].count, 2)
+        self.assertEqual(operations["generate_addresses"].count, 4)
+        self.assertEqual(self.recorder.names()[-2:],
+                         ["iter_addresses", "iter_addresses"])
+        last = self.recorder.ended[-1][0]
+        self.assertEqual(last.index, 3)
+        self.assertEqual(last.count, 2)
+
+    def test_error(self):
+        self.assertRaises(ValueError, self.wallet.get_child, 2 ** 31)
+        operation, started = self.recorder.ended[0]
+        self.assertIsInstance(operation.error, ValueError)
+        self.assertEqual(started, "token")
+
+    def test_slower_than(self):
+        hooks.clear()
+        slow = Recorder()
+        hooks.register(slow.on_start, slow.on_end, slower_than=60)
+        fast = Recorder()
+        hooks.register(on_end=fast.on_end, slower_than=0)
+        self.wallet.get_child(0)
+        self.assertEqual(slow.started, [])
+        self.assertEqual(slow.ended, [])
+        self.assertEqual(fast.names(), ["get_child"])
+        self.assertIsNone(fast.ended[0][1])
+
+    def test_unregister(self):
+        self.assertTrue(hooks.unregister(self.hook))
+        self.assertFalse(hooks.unregister(self.hook))
+        self.wallet.get_child(0)
+        self.assertEqual(self.recorder.ended, [])
+
+    def test_register_needs_a_callback(self):
+        self.assertRaises(ValueError, hooks.register)
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from bitmerchant.network import BitcoinTestNet
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.index import AddressIndex
+from bitmerchant.wallet.index import HEADER_SIZE
+from bitmerchant.wallet.index import InvalidIndexFileError
+from bitmerchant.wallet.index import RECORD_SIZE
+from bitmerchant.wallet.utils import hash160
+
+
+class TestAddressIndex(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.from_master_secret(
+            b'address index test seed', network=BitcoinTestNet)
+        cls.addresses = cls.w.derive_children(0, 60, output="address")
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "addresses.idx")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_lookup(self):
+        with AddressIndex.build(self.path, self.w, 10, 40,
+                                run_size=7) as index:
+            self.assertEqual(len(index), 30)
+            for i in range(10, 40):
+                self.assertEqual(index.lookup(self.addresses[i]), i)
+                self.assertTrue(self.addresses[i] in index)
+            for i in list(range(10)) + list(range(40, 60)):
+                self.assertEqual(index.lookup(self.addresses[i]), None)
+
+    def test_hash160(self):
+        child = self.w.get_child(3)
+        with AddressIndex.build(self.path, self.w, 0, 5) as index:
+            self.assertEqual(index.lookup(hash160(
+                child.public_key.get_key_bytes(compressed=True))), 3)
+            self.assertEqual(index.lookup(b'\0' * 20), None)
+
+    def test_sorted(self):
+        AddressIndex.build(self.path, self.w, 0, 20, run_size=3).close()
+        with open(self.path, "rb") as f:
+            data = f.read()[HEADER_SIZE:]
+        records = [data[i:i + RECORD_SIZE]
+                   for i in range(0, len(data), RECORD_SIZE)]
+        self.assertEqual(len(records), 20)
+        self.assertEqual(records, sorted(records))
+
+    def test_extend_and_reopen(self):
+        AddressIndex.build(self.path, self.w, 0, 10).close()
+        with AddressIndex(self.path, network=BitcoinTestNet) as index:
+            self.assertEqual((index.start, index.stop), (0, 10))
+            self.assertEqual(index.lookup(self.addresses[50]), None)
+            index.extend(60, run_size=20)
+            self.assertEqual(index.stop, 60)
+            # Shrinking is a no-op
+            index.extend(30)
+            self.assertEqual(index.stop, 60)
+            for i, address in enumerate(self.addresses):
+                self.assertEqual(index.lookup(address), i)
+        self.assertEqual(os.listdir(self.tmpdir), ["addresses.idx"])
+        with AddressIndex(self.path, network=BitcoinTestNet) as index:
+            self.assertEqual(index.lookup(self.addresses[59]), 59)
+
+    def test_empty(self):
+        with AddressIndex.build(self.path, self.w) as index:
+            self.assertEqual(len(index), 0)
+            self.assertEqual(index.lookup(self.addresses[0]), None)
+
+    def test_wrong_network(self):
+        with AddressIndex.build(self.path, self.w, 0, 2) as index:
+            self.assertRaises(
+                ValueError, index.lookup, Wallet.from_master_secret(
+                    b'address index test seed').to_address())
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an index" * 10)
+        self.assertRaises(InvalidIndexFileError, AddressIndex, self.path)
+        AddressIndex.build(self.path, self.w, 0, 2).close()
+        with open(self.path, "ab") as f:
+            f.write(b"\0" * 5)
+        self.assertRaises(
+            InvalidIndexFileError, AddressIndex, self.path,
+            network=BitcoinTestNet)
+
+    def test_wrong_network_file(self):
+        AddressIndex.build(self.path, self.w, 0, 2).close()
+        self.assertRaises(InvalidIndexFileError, AddressIndex, self.path)
+
+    def test_invalid_range(self):
+        self.assertRaises(
+            ValueError, AddressIndex.build, self.path, self.w, 5, 4)
+        with AddressIndex.build(self.path, self.w) as index:
+            self.assertRaises(ValueError, index.extend, 0x80000001)
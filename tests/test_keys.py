@@ -1,12 +1,12 @@
 from binascii import unhexlify
 from unittest import TestCase
 
-import base58
 
 from bitmerchant.network import BitcoinMainNet
 from bitmerchant.network import BitcoinTestNet
 from bitmerchant.network import DogecoinMainNet
 from bitmerchant.network import LitecoinMainNet
+from bitmerchant.wallet.b58 import b58encode
 from bitmerchant.wallet.keys import ChecksumException
 from bitmerchant.wallet.keys import IncompatibleNetworkException
 from bitmerchant.wallet.keys import KeyParseError  # TODO test this
@@ -109,7 +109,7 @@ class TestWIF(_TestPrivateKeyBase):
 
     def test_bad_checksum(self):
         wif = self.key.export_to_wif()
-        bad_checksum = base58.b58encode(
+        bad_checksum = b58encode(
             unhexlify(ensure_bytes('FFFFFFFF')))
         wif = wif[:-8] + bad_checksum
         self.assertRaises(ChecksumException, PrivateKey.from_wif, wif)
@@ -194,6 +194,27 @@ class TestPublicKey(_TestPublicKeyBase):
         self.assertEqual(
             PublicKey.from_hex_key(compressed_key), self.public_key)
 
+    def test_compressed_lazy(self):
+        compressed_key = self.public_key.get_key_bytes(compressed=True)
+        key = PublicKey.from_hex_key(compressed_key)
+        # Nothing so far needed the y coordinate
+        self.assertEqual(key.get_key_bytes(compressed=True), compressed_key)
+        self.assertEqual(key, self.public_key)
+        self.assertEqual(key._y, None)
+        self.assertEqual(key.to_public_pair(),
+                         self.public_key.to_public_pair())
+        self.assertEqual(key.get_key(compressed=False),
+                         self.public_key.get_key(compressed=False))
+
+    def test_compressed_not_on_curve(self):
+        # There is no point on the curve with x = 5
+        key = PublicKey.from_hex_key(b"\x02" + b"\0" * 31 + b"\x05")
+        self.assertRaises(KeyParseError, key.to_public_pair)
+        self.assertRaises(KeyParseError, key.to_point)
+        # x is out of range
+        self.assertRaises(
+            KeyParseError, PublicKey.from_hex_key, b"\x02" + b"\xff" * 32)
+
     def test_point(self):
         self.assertEqual(PublicKey.from_point(self.public_key.to_point()),
                          self.public_key)
@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.cache import DerivationCache
+from bitmerchant.wallet.metrics import Histogram
+from bitmerchant.wallet.metrics import Metrics
+
+
+class TestHistogram(TestCase):
+    def test_observe(self):
+        histogram = Histogram([1, 2, 5])
+        histogram.observe(0.5)
+        histogram.observe(2)
+        histogram.observe(3, count=2)
+        histogram.observe(10)
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 18.5)
+        self.assertEqual(histogram.cumulative_counts(), [
+            (1, 1), (2, 2), (5, 4), (float("inf"), 5)])
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.caches = (Wallet.derivation_cache, Wallet.path_cache,
+                       Wallet.deserialize_cache)
+        Wallet.derivation_cache = DerivationCache(maxsize=16)
+        Wallet.path_cache = Wallet.deserialize_cache = None
+        self.wallet = Wallet.from_master_secret(b"metrics")
+        self.xpub = self.wallet.serialize_b58(private=False)
+        self.metrics = Wallet.metrics = Metrics()
+
+    def tearDown(self):
+        Wallet.metrics = None
+        (Wallet.derivation_cache, Wallet.path_cache,
+         Wallet.deserialize_cache) = self.caches
+
+    def test_off_by_default(self):
+        Wallet.metrics = None
+        self.wallet.get_child(0)
+        self.assertEqual(self.metrics.snapshot()["derivations"]["private"], 0)
+
+    def test_derivations(self):
+        self.wallet.get_child(0)
+        self.wallet.get_child(0, is_prime=True)
+        public = Wallet.deserialize(self.xpub)
+        public.get_child(1)
+        # Served by the derivation cache
+        public.get_child(1)
+        public.get_children([2, 3])
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["derivations"], {
+            "private": 1, "private_prime": 1, "public": 3})
+        self.assertEqual(snapshot["ec_operations"], {
+            "scalar_multiply": 3, "point_add": 3})
+        self.assertEqual(snapshot["deserialize_calls"], 1)
+        self.assertEqual(snapshot["latency"]["derive_public"]["count"], 3)
+        self.assertEqual(snapshot["latency"]["deserialize"]["count"], 1)
+        derivation = snapshot["caches"]["derivation"]
+        self.assertEqual(derivation["hits"], 1)
+        self.assertEqual(derivation["misses"], 3)
+        self.assertEqual(derivation["maxsize"], 16)
+        self.assertNotIn("path", snapshot["caches"])
+
+    def test_public_key_of_private_node(self):
+        child = self.wallet.get_child(0)
+        child.to_address()
+        child.to_address()
+        self.assertEqual(
+            self.metrics.snapshot()["ec_operations"]["scalar_multiply"], 1)
+
+    def test_deferred_parent_fingerprint(self):
+        child = self.wallet.get_child(0, is_prime=True).get_child(
+            1, is_prime=True)
+        before = self.metrics.snapshot()["ec_operations"]["scalar_multiply"]
+        child.parent_fingerprint
+        self.assertEqual(
+            self.metrics.snapshot()["ec_operations"]["scalar_multiply"],
+            before + 1)
+
+    def test_reset(self):
+        self.wallet.get_child(0)
+        self.metrics.reset()
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["derivations"]["private"], 0)
+        self.assertEqual(snapshot["latency"], {})
+
+    def test_render_prometheus(self):
+        self.wallet.get_child(0)
+        Wallet.deserialize(self.xpub)
+        text = self.metrics.render_prometheus(labels={"worker": "1"})
+        lines = text.splitlines()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn("# TYPE bitmerchant_derivations_total counter", lines)
+        self.assertIn(
+            'bitmerchant_derivations_total{kind="private",worker="1"} 1',
+            lines)
+        self.assertIn(
+            'bitmerchant_cache_misses_total{cache="derivation",worker="1"} 1',
+            lines)
+        self.assertIn(
+            "# TYPE bitmerchant_operation_duration_seconds histogram", lines)
+        self.assertIn(
+            'bitmerchant_operation_duration_seconds_bucket{'
+            'operation="deserialize",le="+Inf",worker="1"} 1', lines)
+        self.assertIn(
+            'bitmerchant_operation_duration_seconds_count{'
+            'operation="derive_private",worker="1"} 1', lines)
+        for line in lines:
+            if not line.startswith("#"):
+                float(line.rsplit(" ", 1)[1])
+
+    def test_render_escapes_labels(self):
+        text = self.metrics.render_prometheus(labels={"host": 'a"b\\c'})
+        self.assertIn('host="a\\"b\\\\c"', text)
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import six
+
+from bitmerchant.network import BitcoinTestNet
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet.nodefile import HEADER_SIZE
+from bitmerchant.wallet.nodefile import InvalidNodeFileError
+from bitmerchant.wallet.nodefile import NodeFile
+
+
+class TestNodeFile(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.w = Wallet.from_master_secret(
+            b'node file test seed', network=BitcoinTestNet)
+        cls.children = cls.w.derive_children(0, 20)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "nodes.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_public(self):
+        with NodeFile.write(self.path, self.children) as nodes:
+            self.assertEqual(len(nodes), 20)
+            self.assertFalse(nodes.has_indexes)
+            self.assertEqual(nodes.network, BitcoinTestNet)
+            for i, child in enumerate(self.children):
+                node = nodes[i]
+                self.assertEqual(node, child.public_copy())
+                self.assertEqual(node.private_key, None)
+            self.assertEqual(nodes[-1], self.children[-1].public_copy())
+            self.assertEqual(list(nodes)[3], nodes[3])
+            self.assertRaises(IndexError, nodes.__getitem__, 20)
+            self.assertRaises(ValueError, nodes.get_index, 0)
+        self.assertEqual(
+            os.path.getsize(self.path), HEADER_SIZE + 20 * 78)
+
+    def test_private_with_indexes(self):
+        indexes = [1000 + i for i in range(20)]
+        with NodeFile.write(self.path, iter(self.children), private=True,
+                            indexes=indexes) as nodes:
+            self.assertTrue(nodes.has_indexes)
+            for i, child in enumerate(self.children):
+                self.assertEqual(nodes[i], child)
+                self.assertEqual(nodes.get_index(i), 1000 + i)
+
+    def test_raw(self):
+        NodeFile.write(self.path, self.children).close()
+        nodes = NodeFile(self.path, network=BitcoinTestNet)
+        raw = nodes.raw(5)
+        if six.PY3:
+            self.assertTrue(isinstance(raw, memoryview))
+        self.assertEqual(
+            bytes(raw), self.children[5]._serialize_bytes(private=False))
+        self.assertEqual(Wallet.deserialize(raw, network=BitcoinTestNet),
+                         self.children[5].public_copy())
+        self.assertEqual(
+            Wallet.deserialize(bytearray(raw), network=BitcoinTestNet),
+            self.children[5].public_copy())
+        if six.PY3:
+            raw.release()
+        nodes.close()
+
+    def test_mismatched_indexes(self):
+        for indexes in [range(19), range(21)]:
+            self.assertRaises(ValueError, NodeFile.write, self.path,
+                              self.children, indexes=indexes)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_private_needs_private_keys(self):
+        self.assertRaises(
+            ValueError, NodeFile.write, self.path,
+            [self.w.public_copy()], private=True)
+
+    def test_empty(self):
+        with NodeFile.write(self.path, []) as nodes:
+            self.assertEqual(len(nodes), 0)
+            self.assertEqual(list(nodes), [])
+
+    def test_invalid_files(self):
+        NodeFile.write(self.path, self.children).close()
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for invalid in [b"", data[:4], b"XXXX" + data[4:], data[:-1]]:
+            with open(self.path, "wb") as f:
+                f.write(invalid)
+            self.assertRaises(InvalidNodeFileError, NodeFile, self.path)
@@ -0,0 +1,62 @@
+from binascii import hexlify
+import hashlib
+import os
+from unittest import TestCase
+
+from mock import patch
+
+from bitmerchant.wallet import utils
+from bitmerchant.wallet.ripemd160 import ripemd160
+from bitmerchant.wallet.utils import hash160
+from bitmerchant.wallet.utils import hash160_many
+
+
+class TestRipemd160(TestCase):
+    # From https://homes.esat.kuleuven.be/~bosselae/ripemd160.html
+    vectors = [
+        (b"", "9c1185a5c5e9fc54612808977ee8f548b2258d31"),
+        (b"a", "0bdc9d2d256b3ee9daae347be6f4dc835a467ffe"),
+        (b"abc", "8eb208f7e05d987a9b044a8e98c6b087f15a0bfc"),
+        (b"message digest", "5d0689ef49d2fae572b881b123a85ffa21595f36"),
+        (b"abcdefghijklmnopqrstuvwxyz",
+         "f71c27109c692c1b56bbdceb5b9d2865b3708dbc"),
+        (b"abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq",
+         "12a053384a9c0c88e405a06c27dcf49ada62eb2b"),
+        (b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
+         "b0e20b6e3116640286ed3a87a5713079b21f5189"),
+        (b"1234567890" * 8, "9b752e45573d4b39f4dbd3323cab82bf63326bfb"),
+    ]
+
+    def test_vectors(self):
+        for data, expected in self.vectors:
+            self.assertEqual(hexlify(ripemd160(data)), expected.encode())
+
+    def test_block_boundaries(self):
+        # Padding spills into a second block from 56 bytes
+        for length in [55, 56, 63, 64, 65, 119, 120, 128]:
+            data = b"\xa5" * length
+            self.assertEqual(utils.ripemd160(data), ripemd160(data))
+
+
+class TestHash160(TestCase):
+    def test_selected_implementation(self):
+        self.assertTrue(utils.RIPEMD160_IMPLEMENTATION in
+                        ("hashlib", "pycryptodome", "python"))
+        data = os.urandom(33)
+        self.assertEqual(hash160(data),
+                         ripemd160(hashlib.sha256(data).digest()))
+
+    def test_fallback(self):
+        def new(name, *args):
+            raise ValueError("unsupported hash type %s" % name)
+        with patch('hashlib.new', side_effect=new):
+            name, func = utils._select_ripemd160()
+        self.assertNotEqual(name, "hashlib")
+        for data, expected in TestRipemd160.vectors:
+            self.assertEqual(hexlify(func(data)), expected.encode())
+
+    def test_hash160_many(self):
+        datas = [os.urandom(33) for _ in range(10)]
+        self.assertEqual(hash160_many(datas),
+                         [hash160(data) for data in datas])
+        self.assertEqual(hash160_many([]), [])
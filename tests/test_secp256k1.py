@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+from ecdsa import SECP256k1
+
+from bitmerchant.wallet import secp256k1
+
+
+class TestSecp256k1(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.g = SECP256k1.generator
+
+    def _pair(self, point):
+        return (point.x(), point.y())
+
+    def test_domain_parameters(self):
+        self.assertEqual(secp256k1.P, SECP256k1.curve.p())
+        self.assertEqual(secp256k1.N, SECP256k1.order)
+        self.assertEqual(secp256k1.G, self._pair(self.g))
+
+    def test_is_on_curve(self):
+        self.assertTrue(secp256k1.is_on_curve(*secp256k1.G))
+        self.assertFalse(
+            secp256k1.is_on_curve(secp256k1.GX, secp256k1.GY + 1))
+        self.assertFalse(
+            secp256k1.is_on_curve(secp256k1.GX + secp256k1.P, secp256k1.GY))
+
+    def test_multiply_generator(self):
+        for k in [1, 2, 3, 15, 16, 17, 0xdeadbeef, secp256k1.N - 1,
+                  0x18e14a7b6a307f426a94f8114701e7c8e774e7f9a47e2c2035db29a2]:
+            self.assertEqual(secp256k1.multiply_generator(k),
+                             self._pair(self.g * k))
+
+    def test_multiply_infinity(self):
+        self.assertEqual(secp256k1.multiply_generator(0), None)
+        self.assertEqual(secp256k1.multiply_generator(secp256k1.N), None)
+        self.assertEqual(secp256k1.point_multiply(None, 5), None)
+
+    def test_point_multiply(self):
+        point = self._pair(self.g * 12345)
+        self.assertEqual(secp256k1.point_multiply(point, 6789),
+                         self._pair(self.g * (12345 * 6789)))
+
+    def test_point_add(self):
+        p = self._pair(self.g * 5)
+        q = self._pair(self.g * 7)
+        self.assertEqual(secp256k1.point_add(p, q), self._pair(self.g * 12))
+        # Adding a point to itself doubles it
+        self.assertEqual(secp256k1.point_add(p, p), self._pair(self.g * 10))
+        # Adding a point to its negation gives infinity
+        minus_p = (p[0], secp256k1.P - p[1])
+        self.assertEqual(secp256k1.point_add(p, minus_p), None)
+        self.assertEqual(secp256k1.point_add(None, p), p)
+        self.assertEqual(secp256k1.point_add(p, None), p)
+
+    def test_jacobian_add(self):
+        p = secp256k1.jacobian_multiply(secp256k1.G, 5)
+        q = secp256k1.jacobian_multiply(secp256k1.G, 7)
+        self.assertEqual(secp256k1.to_affine(secp256k1.jacobian_add(p, q)),
+                         self._pair(self.g * 12))
+        self.assertEqual(secp256k1.to_affine(secp256k1.jacobian_add(p, p)),
+                         self._pair(self.g * 10))
+
+    def test_tweak_add(self):
+        point = self._pair(self.g * 1000)
+        self.assertEqual(secp256k1.tweak_add(point, 234),
+                         self._pair(self.g * 1234))
+        self.assertEqual(
+            secp256k1.tweak_add(point, secp256k1.N - 1000), None)
+
+    def test_y_from_x(self):
+        for k in [1, 2, 3, 1000]:
+            x, y = self._pair(self.g * k)
+            self.assertEqual(secp256k1.y_from_x(x, y & 1), y)
+            self.assertEqual(secp256k1.y_from_x(x, not y & 1),
+                             secp256k1.P - y)
+
+    def test_y_from_x_invalid(self):
+        # x = 5 has no corresponding point on the curve
+        self.assertRaises(ValueError, secp256k1.y_from_x, 5, True)
+        self.assertRaises(ValueError, secp256k1.y_from_x, secp256k1.P, True)
+
+
+class TestGeneratorTable(TestCase):
+    def setUp(self):
+        self.default_bits = secp256k1.get_generator_window()
+
+    def tearDown(self):
+        secp256k1.set_generator_window(self.default_bits)
+
+    def test_window_sizes(self):
+        g = SECP256k1.generator
+        k = 0x18e14a7b6a307f426a94f8114701e7c8e774e7f9a47e2c2035db29a2
+        expected = ((g * k).x(), (g * k).y())
+        for bits in [1, 3, 4, 7, 8]:
+            secp256k1.set_generator_window(bits)
+            self.assertEqual(secp256k1.get_generator_window(), bits)
+            self.assertEqual(secp256k1.multiply_generator(k), expected)
+            self.assertEqual(secp256k1.multiply_generator(1), secp256k1.G)
+            self.assertEqual(
+                secp256k1.multiply_generator(secp256k1.N - 1),
+                (secp256k1.GX, secp256k1.P - secp256k1.GY))
+
+    def test_invalid_window(self):
+        self.assertRaises(ValueError, secp256k1.set_generator_window, 0)
+        self.assertRaises(ValueError, secp256k1.set_generator_window, 17)
+        self.assertRaises(ValueError, secp256k1.set_generator_window, 4.0)
@@ -0,0 +1,115 @@
+from unittest import TestCase
+
+from bitmerchant.wallet import Wallet
+from bitmerchant.wallet import bip32
+from bitmerchant.wallet import secp256k1
+from bitmerchant.wallet import timing
+from bitmerchant.wallet.keys import PublicKey
+from bitmerchant.wallet.timing import StageStats
+
+
+class TestTiming(TestCase):
+    def setUp(self):
+        self.caches = (Wallet.derivation_cache, Wallet.path_cache,
+                       Wallet.deserialize_cache)
+        Wallet.derivation_cache = Wallet.path_cache = None
+        Wallet.deserialize_cache = None
+        self.wallet = Wallet.from_master_secret(b"timing")
+        self.xpub = self.wallet.serialize_b58(private=False)
+        timing.reset()
+
+    def tearDown(self):
+        timing.disable()
+        timing.reset()
+        (Wallet.derivation_cache, Wallet.path_cache,
+         Wallet.deserialize_cache) = self.caches
+
+    def test_disabled_by_default(self):
+        self.assertFalse(timing.is_enabled())
+        self.wallet.get_child(0).to_address()
+        self.assertEqual(timing.snapshot(), {})
+
+    def test_private_derivation(self):
+        with timing.instrument():
+            self.assertTrue(timing.is_enabled())
+            self.wallet.get_child(0).to_address()
+        self.assertFalse(timing.is_enabled())
+        stats = timing.snapshot()
+        for stage in ["Wallet.get_child", "Wallet.to_address",
+                      "hmac_sha512", "scalar_multiply", "base58_encode"]:
+            self.assertEqual(stats[stage].count, 1, stage)
+            self.assertTrue(stats[stage].total_ns > 0, stage)
+        self.assertEqual(stats["Wallet.__init__"].count, 1)
+        # The parent's fingerprint, and the child's address
+        self.assertEqual(stats["hash160"].count, 2)
+        self.assertNotIn("point_add", stats)
+
+    def test_public_derivation(self):
+        with timing.instrument():
+            Wallet.deserialize(self.xpub).get_child(0)
+        stats = timing.snapshot()
+        self.assertEqual(stats["PublicKey.from_hex_key"].count, 1)
+        self.assertEqual(stats["base58_decode"].count, 1)
+        self.assertEqual(stats["decompress"].count, 1)
+        self.assertEqual(stats["scalar_multiply"].count, 1)
+        self.assertEqual(stats["point_add"].count, 1)
+        self.assertEqual(stats["curve_check"].count, 1)
+        # Inclusive times
+        self.assertTrue(stats["Wallet.get_child"].total_ns >
+                        stats["scalar_multiply"].total_ns)
+
+    def test_serialize_b58(self):
+        with timing.instrument():
+            self.wallet.serialize_b58(private=False)
+        stats = timing.snapshot()
+        self.assertEqual(stats["Wallet.serialize_b58"].count, 1)
+        self.assertEqual(stats["base58_encode"].count, 1)
+
+    def test_results_unchanged(self):
+        child = self.wallet.get_child(5, is_prime=True)
+        with timing.instrument():
+            timed = self.wallet.get_child(5, is_prime=True)
+            self.assertEqual(
+                PublicKey.from_hex_key(child.get_public_key_hex()),
+                child.public_key)
+        self.assertEqual(timed, child)
+        self.assertEqual(timed.to_address(), child.to_address())
+
+    def test_disable_restores_originals(self):
+        get_child = vars(Wallet)["get_child"]
+        from_hex_key = vars(PublicKey)["from_hex_key"]
+        multiply = secp256k1.jacobian_multiply_generator
+        hmac_sha512 = bip32.hmac_sha512
+        timing.enable()
+        timing.enable()
+        self.assertIsNot(vars(Wallet)["get_child"], get_child)
+        self.assertIsInstance(vars(PublicKey)["from_hex_key"], classmethod)
+        timing.disable()
+        self.assertIs(vars(Wallet)["get_child"], get_child)
+        self.assertIs(vars(PublicKey)["from_hex_key"], from_hex_key)
+        self.assertIs(secp256k1.jacobian_multiply_generator, multiply)
+        self.assertIs(bip32.hmac_sha512, hmac_sha512)
+
+    def test_nested_instrument(self):
+        timing.enable()
+        with timing.instrument():
+            pass
+        self.assertTrue(timing.is_enabled())
+
+    def test_reset(self):
+        with timing.instrument():
+            self.wallet.to_address()
+        self.assertTrue(timing.snapshot())
+        timing.reset()
+        self.assertEqual(timing.snapshot(), {})
+
+    def test_counters_accumulate(self):
+        with timing.instrument():
+            self.wallet.get_child(0)
+        with timing.instrument():
+            self.wallet.get_child(1)
+        self.assertEqual(timing.snapshot()["Wallet.get_child"].count, 2)
+
+    def test_mean_ns(self):
+        self.assertEqual(StageStats(count=4, total_ns=100).mean_ns, 25.0)
+        self.assertEqual(StageStats(count=0, total_ns=0).mean_ns, 0.0)